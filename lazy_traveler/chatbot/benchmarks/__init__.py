@@ -0,0 +1,36 @@
+"""
+성능 측정용 마이크로 벤치마크 모음.
+
+lazy_traveler 디렉토리에서 아래처럼 실행합니다.
+    python -m chatbot.benchmarks.bench_graph_compile
+"""
+import os
+import sys
+import time
+
+import django
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def setup_django():
+    """build_vector_store.py와 동일하게 Django 환경을 준비"""
+    if BASE_DIR not in sys.path:
+        sys.path.append(BASE_DIR)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "lazy_traveler.settings")
+    django.setup()
+
+
+def timeit(func, repeat=100):
+    """func를 repeat번 실행한 평균 소요 시간(ms)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def report(title, rows):
+    """(이름, ms) 목록을 표 형태로 출력"""
+    print(f"\n📊 {title}")
+    for name, ms in rows:
+        print(f"  - {name:<40} {ms:10.3f} ms")
@@ -0,0 +1,79 @@
+"""
+동시 질문 분류: 메시지마다 LLM 1회 호출(기존) vs 마이크로 배칭 비교.
+OpenAI 대신 지연 시간과 동시 연결 수 제한을 흉내 낸 로컬 가짜 LLM을 사용합니다.
+    python -m chatbot.benchmarks.bench_classifier_batching
+"""
+import asyncio
+import re
+import time
+
+from . import setup_django, report
+
+setup_django()
+
+from langchain_core.messages import AIMessage  # noqa: E402
+from langchain_core.runnables import RunnableLambda  # noqa: E402
+
+from chatbot.classifier_batcher import MicroBatcher, classify_batch_with_llm  # noqa: E402
+from chatbot.intent_classifier import match_keywords  # noqa: E402
+from chatbot.prompt import query_prompt  # noqa: E402
+
+QUERIES = ["스케줄링 해줘", "맛집 추천해줘", "회원가입 방법 알려줘", "안녕"]
+
+
+class FakeLLM:
+    """요청당 latency 초가 걸리고 동시에 max_connections개까지만 처리하는 가짜 LLM"""
+
+    def __init__(self, latency=0.2, max_connections=8):
+        self.latency = latency
+        self.semaphore = asyncio.Semaphore(max_connections)
+        self.calls = 0
+
+    @staticmethod
+    def _label(question):
+        return match_keywords(question) or "unknown"
+
+    async def _respond(self, prompt_value):
+        async with self.semaphore:
+            self.calls += 1
+            await asyncio.sleep(self.latency)
+
+        text = prompt_value.to_string()
+        numbered = re.findall(r"^(\d+): (.+)$", text, flags=re.MULTILINE)
+        if numbered:
+            return AIMessage(content="\n".join(f"{i}: {self._label(q)}" for i, q in numbered))
+        question = re.search(r"질문: (.+)", text).group(1)
+        return AIMessage(content=self._label(question))
+
+    def runnable(self):
+        return RunnableLambda(self._respond)
+
+
+async def run_single(total):
+    fake = FakeLLM()
+    chain = query_prompt | fake.runnable()
+    start = time.perf_counter()
+    await asyncio.gather(*(chain.ainvoke({"question": QUERIES[i % len(QUERIES)]}) for i in range(total)))
+    return (time.perf_counter() - start) * 1000, fake.calls
+
+
+async def run_batched(total, window_ms, max_batch):
+    fake = FakeLLM()
+    model = fake.runnable()
+    batcher = MicroBatcher(lambda items: classify_batch_with_llm(items, model=model), window_ms, max_batch)
+    start = time.perf_counter()
+    await asyncio.gather(*(batcher.submit(QUERIES[i % len(QUERIES)]) for i in range(total)))
+    return (time.perf_counter() - start) * 1000, fake.calls
+
+
+async def main(total=200):
+    single_ms, single_calls = await run_single(total)
+    rows = [(f"메시지당 1회 호출 (LLM {single_calls}회)", single_ms)]
+    for window_ms, max_batch in [(5, 8), (10, 16), (20, 32)]:
+        batched_ms, batched_calls = await run_batched(total, window_ms, max_batch)
+        rows.append((f"배칭 {window_ms}ms/{max_batch}개 (LLM {batched_calls}회)", batched_ms))
+    report(f"동시 질문 {total}개 분류 총 소요 시간", rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,127 @@
+"""
+동시 WebSocket 클라이언트 N개의 장소 추천 처리량: thread_sensitive sync_to_async(기존) vs 전용 스레드 풀.
+ChatConsumer에 WebsocketCommunicator로 클라이언트를 붙여 stream 모드로 장소 질문을 보냅니다.
+OpenAI 대신 응답 지연(동기 HTTP 호출처럼 스레드를 막음)을 흉내 낸 가짜 임베딩과,
+place_folder 장소에 임의 벡터를 붙인 메모리 인덱스를 사용합니다.
+    python -m chatbot.benchmarks.bench_concurrency
+"""
+import asyncio
+import glob
+import json
+import os
+import time
+import zlib
+
+import numpy as np
+
+from . import setup_django, report
+
+setup_django()
+
+from asgiref.sync import sync_to_async  # noqa: E402
+from channels.testing import WebsocketCommunicator  # noqa: E402
+
+from chatbot import recommendation_LangGraph, utils  # noqa: E402
+from chatbot.consumers import ChatConsumer  # noqa: E402
+from chatbot.place_index import PlaceIndex  # noqa: E402
+from chatbot.vector_versions import current_version  # noqa: E402
+
+PLACE_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "place_folder")
+DIMENSIONS = 256
+USER = (37.5704, 126.9831)
+
+
+class SlowEmbeddings:
+    """호출마다 latency 초 동안 스레드를 막는 가짜 임베딩 (텍스트별로 고정된 임의 벡터)"""
+
+    def __init__(self, latency=0.03):
+        self.latency = latency
+
+    @staticmethod
+    def _vector(text):
+        rng = np.random.default_rng(zlib.crc32(text.encode("utf-8")))
+        vector = rng.standard_normal(DIMENSIONS).astype(np.float32)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts):
+        time.sleep(self.latency)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+class BenchConsumer(ChatConsumer):
+    # 채널 레이어(Redis) 없이 실행
+    channel_layer_alias = "benchmark"
+
+
+def load_index():
+    ids, metadatas, documents = [], [], []
+    for path in glob.glob(os.path.join(PLACE_FOLDER, "*.json")):
+        with open(path, encoding="utf-8") as f:
+            for place in json.load(f):
+                if place["place_id"] in ids:
+                    continue
+                ids.append(place["place_id"])
+                metadatas.append({
+                    "type": "place",
+                    "place_id": place["place_id"],
+                    "name": place.get("name"),
+                    "category": place.get("category"),
+                    "latitude": place.get("latitude"),
+                    "longitude": place.get("longitude"),
+                    "rating": place.get("rating"),
+                })
+                documents.append(place.get("name") or "")
+    vectors = np.asarray([SlowEmbeddings._vector(text) for text in documents], dtype=np.float32)
+    return PlaceIndex(ids, vectors, metadatas, documents)
+
+
+def use_thread_sensitive(enabled):
+    """장소 검색 helper를 기존 방식(thread_sensitive=True, 워커당 스레드 1개) 또는 전용 스레드 풀로 교체"""
+    search = utils.search_place_candidates.func
+    recommendation_LangGraph.search_place_candidates = (
+        sync_to_async(search, thread_sensitive=True) if enabled else utils.search_place_candidates
+    )
+
+
+async def run_client(run_id, client_id, messages):
+    communicator = WebsocketCommunicator(BenchConsumer.as_asgi(), "/ws/chat/")
+    await communicator.connect()
+    await communicator.receive_json_from()
+
+    for message_id in range(messages):
+        await communicator.send_json_to({
+            "message": f"근처 맛집 추천해줘 {run_id}-{client_id}-{message_id}",  # 응답 캐시에 걸리지 않도록 모두 다른 질문
+            "latitude": USER[0],
+            "longitude": USER[1],
+            "stream": True,
+        })
+        while (await communicator.receive_json_from(timeout=30)).get("event") != "final":
+            pass
+
+    await communicator.disconnect()
+
+
+async def run(run_id, clients, messages, thread_sensitive):
+    use_thread_sensitive(thread_sensitive)
+    start = time.perf_counter()
+    await asyncio.gather(*(run_client(run_id, i, messages) for i in range(clients)))
+    return time.perf_counter() - start
+
+
+async def main(messages=5, latency=0.03):
+    utils.embeddings = SlowEmbeddings(latency)
+    current_version().place_index = load_index()
+
+    for clients in [1, 8, 32]:
+        rows = []
+        for name, thread_sensitive in [("thread_sensitive sync_to_async", True), ("전용 스레드 풀", False)]:
+            elapsed = await run(f"{clients}{name}", clients, messages, thread_sensitive)
+            rows.append((f"{name} ({clients * messages / elapsed:.1f} msg/s)", elapsed * 1000))
+        report(f"동시 클라이언트 {clients}개 x 메시지 {messages}개 총 소요 시간 (임베딩 지연 {latency * 1000:.0f}ms)", rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
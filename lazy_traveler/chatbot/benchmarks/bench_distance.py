@@ -0,0 +1,44 @@
+"""
+사용자 → 후보 장소 거리 계산: geopy geodesic vs 스칼라 haversine(calculate_distance) vs numpy 벡터화.
+    python -m chatbot.benchmarks.bench_distance
+"""
+import numpy as np
+from geopy.distance import geodesic
+
+from . import setup_django, timeit, report
+
+setup_django()
+
+from chatbot.geo import haversine_km, haversine_matrix_km  # noqa: E402
+from chatbot.utils import calculate_distance  # noqa: E402
+
+USER = (37.5704, 126.9831)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    for size in [10, 1_000, 100_000]:
+        latitudes = 37.56 + rng.random(size) * 0.05
+        longitudes = 126.96 + rng.random(size) * 0.05
+        points = list(zip(latitudes.tolist(), longitudes.tolist()))
+        repeat = max(1, 10_000 // size)
+
+        rows = [
+            ("geopy geodesic (반복문)", timeit(lambda: [geodesic(USER, p).km for p in points], max(1, repeat // 10))),
+            ("스칼라 haversine (반복문)", timeit(lambda: [calculate_distance(*USER, lat, lon) for lat, lon in points], repeat)),
+            ("numpy 벡터화 haversine", timeit(lambda: haversine_km(*USER, latitudes, longitudes), repeat)),
+        ]
+        report(f"후보 {size:,}곳", rows)
+
+    users = 100
+    user_latitudes = 37.56 + rng.random(users) * 0.05
+    user_longitudes = 126.96 + rng.random(users) * 0.05
+    latitudes = 37.56 + rng.random(5_000) * 0.05
+    longitudes = 126.96 + rng.random(5_000) * 0.05
+    report("사전 계산: 사용자 100명 x 장소 5,000곳", [
+        ("numpy 거리 행렬", timeit(lambda: haversine_matrix_km(user_latitudes, user_longitudes, latitudes, longitudes), 10)),
+    ])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+반경 검색: 전체 장소 haversine 후 필터 vs 격자 인덱스(GridIndex) 조회.
+    python -m chatbot.benchmarks.bench_geo_grid
+"""
+import numpy as np
+
+from . import setup_django, timeit, report
+
+setup_django()
+
+from chatbot.geo import GridIndex, haversine_km  # noqa: E402
+
+USER = (37.5704, 126.9831)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    for size in [1_000, 100_000]:
+        # 서울 도심 약 10km x 10km 범위에 흩어진 장소
+        latitudes = 37.53 + rng.random(size) * 0.09
+        longitudes = 126.93 + rng.random(size) * 0.11
+        grid = GridIndex(latitudes, longitudes, cell_km=0.5)
+
+        for radius in [0.5, 2.0]:
+            brute = np.flatnonzero(haversine_km(*USER, latitudes, longitudes) <= radius)
+            assert np.array_equal(brute, grid.within(*USER, radius))
+            report(f"장소 {size:,}곳, 반경 {radius}km (결과 {len(brute):,}곳)", [
+                ("전체 haversine + 필터", timeit(lambda: np.flatnonzero(haversine_km(*USER, latitudes, longitudes) <= radius), 200)),
+                ("격자 인덱스 조회", timeit(lambda: grid.within(*USER, radius), 200)),
+            ])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+"""
+요청마다 StateGraph를 만들고 compile() 하던 비용 vs 컴파일된 그래프 재사용 비용 비교.
+    python -m chatbot.benchmarks.bench_graph_compile
+"""
+from . import setup_django, timeit, report
+
+setup_django()
+
+from chatbot.recommendation_LangGraph import build_graph, get_compiled_graph  # noqa: E402
+
+
+def main(repeat=200):
+    get_compiled_graph()  # 최초 1회 컴파일 (워커 기동 시점)
+
+    rows = [
+        ("메시지마다 build + compile (기존)", timeit(build_graph, repeat)),
+        ("컴파일된 그래프 재사용 (현재)", timeit(get_compiled_graph, repeat)),
+    ]
+    report(f"그래프 준비 비용 / 메시지 ({repeat}회 평균)", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+장소 top-k 검색: Chroma(HNSW) vs 메모리 numpy 정확 검색 인덱스 (지연 시간, recall@k).
+OpenAI 호출 없이 임의의 정규화 벡터로 임시 Chroma 컬렉션을 만들어 비교합니다.
+    python -m chatbot.benchmarks.bench_place_index
+"""
+import time
+import uuid
+
+import numpy as np
+
+from . import setup_django, report
+
+setup_django()
+
+import chromadb  # noqa: E402
+
+from chatbot.place_index import PlaceIndex  # noqa: E402
+
+CATEGORIES = ["카페", "한식", "관광명소", "주점", "브런치"]
+
+
+def build_collection(vectors):
+    client = chromadb.EphemeralClient()
+    collection = client.create_collection(f"bench-{uuid.uuid4().hex[:8]}")
+    ids = [f"place-{i}" for i in range(len(vectors))]
+    metadatas = [{"type": "place", "category": CATEGORIES[i % len(CATEGORIES)], "place_id": ids[i]} for i in range(len(vectors))]
+    for start in range(0, len(vectors), 1000):
+        end = start + 1000
+        collection.add(
+            ids=ids[start:end],
+            embeddings=vectors[start:end].tolist(),
+            metadatas=metadatas[start:end],
+            documents=[f"장소 {i}" for i in range(start, min(end, len(vectors)))]
+        )
+    return collection, ids, metadatas
+
+
+def main(size=5000, dimensions=1536, queries=50, k=10, batch=8):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((size, dimensions)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    query_vectors = vectors[rng.choice(size, queries)] + 0.3 * rng.standard_normal((queries, dimensions)).astype(np.float32)
+
+    collection, ids, metadatas = build_collection(vectors)
+    index = PlaceIndex(ids, vectors, metadatas, [f"장소 {i}" for i in range(size)])
+    mask = index.mask(where={"type": "place"})
+
+    start = time.perf_counter()
+    chroma_hits = [
+        collection.query(query_embeddings=[q.tolist()], n_results=k, where={"type": "place"})["ids"][0]
+        for q in query_vectors
+    ]
+    chroma_ms = (time.perf_counter() - start) * 1000 / queries
+
+    start = time.perf_counter()
+    exact_hits = [[doc.id for doc, _ in index.search_by_vectors(q, k, mask=mask)[0]] for q in query_vectors]
+    index_ms = (time.perf_counter() - start) * 1000 / queries
+
+    start = time.perf_counter()
+    for i in range(0, queries, batch):
+        index.search_by_vectors(query_vectors[i:i + batch], k, mask=mask)
+    batch_ms = (time.perf_counter() - start) * 1000 / queries
+
+    recall = np.mean([len(set(c) & set(e)) / k for c, e in zip(chroma_hits, exact_hits)])
+
+    report(f"top-{k} 검색 / 질의 ({size}건 x {dimensions}차원, {queries}회 평균)", [
+        ("Chroma HNSW", chroma_ms),
+        ("numpy 정확 검색 (1건씩)", index_ms),
+        (f"numpy 정확 검색 ({batch}건 묶음)", batch_ms),
+    ])
+    print(f"  - Chroma recall@{k} (정확 검색 기준): {recall:.3f}")
+
+
+if __name__ == "__main__":
+    main()
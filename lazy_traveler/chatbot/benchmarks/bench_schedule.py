@@ -0,0 +1,82 @@
+"""
+일정 슬롯 배정: 기존 탐욕 방식 vs 조합 최적화(ScheduleProblem).
+place_folder의 실제 장소로 후보 풀을 만들어 실행 시간, 총 이동 거리, 슬롯 시각에 닫혀 있는 장소 수를 비교합니다.
+    python -m chatbot.benchmarks.bench_schedule
+"""
+import asyncio
+import glob
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+
+from . import setup_django, timeit, report
+
+setup_django()
+
+from langchain_core.documents import Document  # noqa: E402
+
+from chatbot.geo import haversine_km  # noqa: E402
+from chatbot.opening_hours import get_opening_intervals, is_open_at, parse_opening_hours, encode_intervals  # noqa: E402
+from chatbot.schedule_engine import ScheduleProblem, greedy_assignment  # noqa: E402
+from chatbot.utils import CATEGORY_MAPPING, determine_schedule_template  # noqa: E402
+
+PLACE_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "place_folder")
+USER = (37.5704, 126.9831)
+
+
+def load_places():
+    places = {}
+    for path in glob.glob(os.path.join(PLACE_FOLDER, "*.json")):
+        with open(path, encoding="utf-8") as f:
+            for place in json.load(f):
+                metadata = {key: place.get(key) for key in ["name", "category", "latitude", "longitude", "rating", "place_id"]}
+                metadata["opening_hours"] = " | ".join(place.get("opening_hours") or [])
+                try:
+                    metadata["opening_intervals"] = encode_intervals(parse_opening_hours(place.get("opening_hours") or []))
+                except ValueError:
+                    pass
+                places[place["place_id"]] = Document(page_content=place["name"], metadata=metadata, id=place["place_id"])
+    return list(places.values())
+
+
+def evaluate(places, assignment, times):
+    """(총 이동 거리 km, 슬롯 시각에 닫힌 장소 수)"""
+    walk, position, closed = 0.0, USER, 0
+    for slot, row in assignment:
+        metadata = places[row].metadata
+        walk += float(haversine_km(*position, [metadata["latitude"]], [metadata["longitude"]])[0])
+        position = (metadata["latitude"], metadata["longitude"])
+        intervals = get_opening_intervals(metadata)
+        closed += intervals is not None and not is_open_at(intervals, times[slot])
+    return walk, closed
+
+
+def main(pool_size=60):
+    rng = np.random.default_rng(0)
+    catalog = load_places()
+
+    for start_time in [datetime(2025, 4, 1, 9), datetime(2025, 4, 1, 12), datetime(2025, 4, 1, 17)]:
+        _, categories = asyncio.run(determine_schedule_template(start_time))
+        tag_mapping = {category: CATEGORY_MAPPING.get(category, []) for category in categories}
+        pool = [catalog[i] for i in rng.choice(len(catalog), min(pool_size, len(catalog)), replace=False)]
+        distances = haversine_km(*USER, [p.metadata["latitude"] for p in pool], [p.metadata["longitude"] for p in pool])
+        for place, distance in zip(pool, distances.tolist()):
+            place.metadata["distance"] = distance
+        pool = [pool[i] for i in np.argsort(distances)]  # 기존 파이프라인처럼 거리순 정렬
+
+        problem = ScheduleProblem(pool, categories, tag_mapping, start_time)
+        greedy_walk, greedy_closed = evaluate(pool, greedy_assignment(pool, categories, tag_mapping), problem.times)
+        best_walk, best_closed = evaluate(pool, problem.solve(), problem.times)
+
+        report(f"{start_time:%H:%M} {categories} / 후보 {len(pool)}곳", [
+            ("탐욕 배정", timeit(lambda: greedy_assignment(pool, categories, tag_mapping), 200)),
+            ("조합 최적화 (색인 + 풀이)", timeit(lambda: ScheduleProblem(pool, categories, tag_mapping, start_time).solve(), 50)),
+        ])
+        print(f"  탐욕: 이동 {greedy_walk:.2f}km, 슬롯 시각에 닫힌 장소 {greedy_closed}곳")
+        print(f"  최적화: 이동 {best_walk:.2f}km, 슬롯 시각에 닫힌 장소 {best_closed}곳")
+
+
+if __name__ == "__main__":
+    main()
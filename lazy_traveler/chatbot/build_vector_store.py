@@ -1,11 +1,12 @@
 from django.conf import settings
-from langchain_openai import OpenAIEmbeddings
 from langchain_chroma import Chroma
 import json
 import os
 from dotenv import load_dotenv
+import argparse
 import django
 import sys
+import time
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(BASE_DIR)
@@ -14,109 +15,124 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lazy_traveler.settings')
 
 django.setup()
 
+from chatbot.opening_hours import verdict_cache
+from chatbot.vector_ingest import load_qa_records, read_place_rows, merge_place_rows, dedupe_savings, sync_collection
+
 # .env 파일 로드
 load_dotenv()
 
-def build_vector_store():   
-    try:
-        # 1. embeddings 도구 설정
-        embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-
-        current_dir = os.getcwd()
-
-        function_vector_dir = os.path.join(current_dir, 'vector_function')
-        place_vector_dir = os.path.join(current_dir,'vector_place')
-
-        os.makedirs(function_vector_dir, exist_ok=True)
-        os.makedirs(place_vector_dir, exist_ok=True)
+def format_stats(stats):
+    return (
+        f"총 {stats['total']}개 (추가 {stats['added']}, 변경 {stats['updated']}, 삭제 {stats['deleted']}, "
+        f"유지 {stats['unchanged']}, 실패 {stats['failed']}) - {stats['seconds']:.2f}초, {stats['records_per_second']:.1f}건/초"
+    )
+
+def build_vector_store(base_dir=None, fake_embeddings=False, **pipeline_options):
+    """
+    qa_folder/place_folder를 벡터 DB에 증분 반영.
+
+    Args:
+        base_dir: vector_function/vector_place를 만들 디렉토리 (기본: 현재 디렉토리).
+        fake_embeddings: True면 OpenAI 대신 텍스트 해시 기반 가짜 임베딩 사용 (오프라인 테스트용).
+            서비스 중인 벡터 DB에 가짜 벡터가 섞이지 않도록 base_dir를 꼭 지정해야 합니다.
+        pipeline_options: batch_size, concurrency, max_retries, backoff_seconds (없으면 settings 값).
+
+    Returns:
+        dict: {컬렉션 이름: sync_collection 결과}. 재시도 후에도 실패한 레코드 수는 각 결과의 "failed"
+        (임베딩 설정/저장소 오류 등 나머지 예외는 그대로 전파)
+    """
+    if fake_embeddings and not base_dir:
+        raise ValueError("가짜 임베딩은 base_dir를 지정해야 사용할 수 있습니다.")
+
+    start = time.perf_counter()
+    pipeline_options = {key: value for key, value in pipeline_options.items() if value is not None}
+    # 1. embeddings 도구 설정 (서비스와 같은 임베딩 캐시를 사용해 바뀌지 않은 텍스트는 다시 임베딩하지 않음)
+    if fake_embeddings:
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        embeddings = DeterministicFakeEmbedding(size=1536)
+    else:
+        from chatbot.openai_chroma_config import embeddings
+
+    current_dir = base_dir or os.getcwd()
+
+    function_vector_dir = os.path.join(current_dir, 'vector_function')
+    place_vector_dir = os.path.join(current_dir,'vector_place')
+
+    os.makedirs(function_vector_dir, exist_ok=True)
+    os.makedirs(place_vector_dir, exist_ok=True)
+
+    function_vector_store = Chroma(
+        collection_name="function_collection",
+        embedding_function=embeddings,
+        persist_directory=function_vector_dir
+    )
+
+    place_vector_store = Chroma(
+        collection_name="place_collection",
+        embedding_function=embeddings,
+        persist_directory=place_vector_dir
+)
 
-        function_vector_store = Chroma(
-            collection_name="function_collection",
-            embedding_function=embeddings,
-            persist_directory=function_vector_dir
+    # 2. 질문 응답 데이터 / 장소 데이터를 고정 ID + 내용 지문이 붙은 레코드로 변환
+    qa_records = load_qa_records()
+    place_rows = read_place_rows()
+    place_records = merge_place_rows(place_rows)  # 여러 카테고리 파일에 있는 장소는 하나로 병합
+
+    # 3. 새로 생겼거나 바뀐 레코드만 임베딩/upsert, 사라진 레코드는 삭제
+    #    (배치 단위 동시 임베딩 + 재시도, 진행 상황은 각 벡터 디렉토리의 ingest_progress.json)
+    function_stats = sync_collection(
+        function_vector_store, qa_records,
+        progress_path=os.path.join(function_vector_dir, "ingest_progress.json"), **pipeline_options
+    )
+    print(f"✅ 기능(질문 응답) 데이터 {format_stats(function_stats)}")
+
+    place_stats = sync_collection(
+        place_vector_store, place_records,
+        progress_path=os.path.join(place_vector_dir, "ingest_progress.json"), **pipeline_options
+    )
+    print(f"✅ 장소 데이터 {format_stats(place_stats)}")
+
+    stored = place_vector_store._collection.get(limit=1, include=["embeddings"])["embeddings"]
+    if stored is not None and len(stored):
+        savings = dedupe_savings(place_rows, place_records, dimensions=len(stored[0]))
+        print(
+            f"✅ 장소 중복 병합: {len(place_rows)}행 → {len(place_records)}개 "
+            f"(벡터 {savings['vectors']}개, 약 {savings['bytes'] / 1024:.1f}KB 절약)"
         )
 
-        place_vector_store = Chroma(
-            collection_name="place_collection",
-            embedding_function=embeddings,
-            persist_directory=place_vector_dir
-)
+    # 장소 데이터가 바뀌었으면 영업 여부 캐시의 공유 계층(Redis) 무효화
+    # (워커 로컬 캐시는 구축 뒤 새로 시작하거나, VECTOR_STORE_ROOT를 쓰면 버전 교체 때 워커가 직접 비움)
+    if place_stats["added"] or place_stats["updated"] or place_stats["deleted"]:
+        verdict_cache.invalidate(everywhere=True)
 
-        # 4. 질문 응답 데이터 추출 및 벡터화 (function_collection용)
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        qa_folder = os.path.join(script_dir, "qa_folder")
-        qa_files = [f for f in os.listdir(qa_folder) if f.endswith(".json")]
-
-        all_questions = []
-        all_metadatas_qa = []
-
-        for qa_filename in qa_files:
-            with open(os.path.join(qa_folder, qa_filename), "r", encoding="utf-8") as file:
-                qa_data = json.load(file)
-
-            for qa in qa_data.get("질문들", []):  # "질문들" 키 아래의 데이터 처리
-                question = qa.get("question", "Unknown question")
-                answer = qa.get("answer", "Unknown answer")
-
-                # 질문과 답변을 하나의 텍스트로 결합하여 벡터화
-                text_data = f"질문: {question} 답변: {answer}"
-
-                # 메타데이터에 type: qa 추가
-                metadata = {
-                    "question": question,
-                    "answer": answer,
-                    "type": "qa"
-                }
-
-                all_questions.append(text_data)
-                all_metadatas_qa.append(metadata)
-
-        # 5. 장소 데이터 추출 및 벡터화 (place_collection용)
-        place_folder = os.path.join(script_dir, "place_folder")
-        place_files = [f for f in os.listdir(place_folder) if f.endswith(".json")] 
-
-        all_texts_places = []
-        all_metadatas_places = []
-
-        for place_filename in place_files:
-            with open(os.path.join(place_folder, place_filename), "r", encoding="utf-8") as file:
-                places = json.load(file)
-
-            for place in places:
-                text_data = f"{place.get('name', 'Unknown')} {place.get('category', 'Unknown')} {place.get('address', 'Unknown')}"
-
-                metadata = {
-                    "name": place.get('name', 'Unknown'),
-                    "category": place.get('category', 'Unknown'),
-                    "address": place.get('address', 'Unknown'),
-                    "latitude": place.get('latitude', 0),
-                    "longitude": place.get('longitude', 0),
-                    "rating": place.get('rating', 'N/A'),
-                    "review_count": place.get('review_count', 'N/A'),
-                    "opening_hours": ', '.join(place.get('opening_hours', [])) if isinstance(place.get('opening_hours', []), list) else str(place.get('opening_hours', 'N/A')),
-                    "phone": place.get('phone', 'N/A'),
-                    "website": place.get('website', 'N/A'),
-                    "place_id": place.get('place_id', 'N/A'),
-                    "type": "place"
-                }
-
-                all_texts_places.append(text_data)
-                all_metadatas_places.append(metadata)
-
-        # 6. 기능 데이터 벡터 저장 (function_collection에)
-        if all_questions:
-            function_vector_store.add_texts(all_questions, metadatas=all_metadatas_qa)
-            print(f"✅ 총 {len(all_questions)} 개의 기능(질문 응답) 데이터 벡터 저장 완료!")
-
-        # 7. 장소 데이터 벡터 저장 (place_collection에)
-        if all_texts_places:
-            place_vector_store.add_texts(all_texts_places, metadatas=all_metadatas_places)
-            print(f"✅ 총 {len(all_texts_places)} 개의 장소 데이터 벡터 저장 완료!")
-
-        print("✅ 벡터 DB 저장 완료!")
-    except Exception as e:
-        print(f"에러 발생: {str(e)}")
+    failed = function_stats["failed"] + place_stats["failed"]
+    if failed:
+        print(f"❌ {failed}건 저장 실패 - 다시 실행하면 실패한 레코드만 이어서 처리합니다.")
+    else:
+        print(f"✅ 벡터 DB 저장 완료! ({time.perf_counter() - start:.2f}초)")
+    return {"function_collection": function_stats, "place_collection": place_stats}
 
 
 if __name__ == "__main__":  
-    build_vector_store()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="qa_folder/place_folder를 벡터 DB에 증분 반영")
+    parser.add_argument("--batch-size", type=int, help="임베딩 배치 크기 (기본: VECTOR_BUILD_BATCH_SIZE)")
+    parser.add_argument("--concurrency", type=int, help="동시에 임베딩할 배치 수 (기본: VECTOR_BUILD_CONCURRENCY)")
+    parser.add_argument("--max-retries", type=int, help="배치별 최대 재시도 횟수 (기본: VECTOR_BUILD_MAX_RETRIES)")
+    parser.add_argument("--backoff-seconds", type=float, help="첫 재시도 대기 시간(초, 이후 2배씩) (기본: VECTOR_BUILD_BACKOFF_SECONDS)")
+    parser.add_argument("--base-dir", help="vector_function/vector_place를 만들 디렉토리 (기본: 현재 디렉토리)")
+    parser.add_argument("--fake-embeddings", action="store_true", help="OpenAI 대신 가짜 임베딩 사용 (오프라인 테스트용, --base-dir 필수)")
+    args = parser.parse_args()
+    if args.fake_embeddings and not args.base_dir:
+        parser.error("--fake-embeddings는 --base-dir와 함께 사용해야 합니다.")
+
+    results = build_vector_store(
+        base_dir=args.base_dir,
+        fake_embeddings=args.fake_embeddings,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        max_retries=args.max_retries,
+        backoff_seconds=args.backoff_seconds
+    )
+    # 일부 레코드가 끝내 저장되지 않았으면 실패로 종료 (entrypoint가 반쯤 구축된 벡터 DB로 서버를 띄우지 않도록)
+    if any(stats["failed"] for stats in results.values()):
+        sys.exit(1)
\ No newline at end of file
@@ -0,0 +1,226 @@
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+
+class LRUCache:
+    """
+    스레드 안전한 프로세스 내 LRU 캐시.
+
+    Args:
+        maxsize: 최대 항목 수 (초과 시 가장 오래 사용하지 않은 항목부터 제거).
+        ttl: 항목 유효 시간(초). None이면 만료 없음.
+        max_bytes: 항목 크기 합의 상한. None이면 항목 수로만 제한.
+        sizeof: 항목 크기(바이트) 계산 함수. 기본값은 pickle 직렬화 길이 (max_bytes 사용 시).
+    """
+
+    def __init__(self, maxsize=1024, ttl=None, max_bytes=None, sizeof=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or (lambda value: len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)))
+        self.bytes = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _pop(self, key):
+        _, _, size = self._data.pop(key)
+        self.bytes -= size
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, MISSING)
+            if item is MISSING:
+                return default
+            value, expires_at, _ = item
+            if expires_at is not None and expires_at < time.monotonic():
+                self._pop(key)
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        size = self.sizeof(value) if self.max_bytes else 0
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+            self._data[key] = (value, expires_at, size)
+            self.bytes += size
+            while len(self._data) > self.maxsize or (self.max_bytes and self.bytes > self.max_bytes and len(self._data) > 1):
+                self._pop(next(iter(self._data)))
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def values(self):
+        return [value for _, value in self.items()]
+
+    def items(self):
+        now = time.monotonic()
+        with self._lock:
+            return [(key, value) for key, (value, expires_at, _) in self._data.items() if expires_at is None or expires_at >= now]
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TieredCache:
+    """
+    로컬 LRU + (선택) Django 캐시(Redis) 2단 캐시.
+    공유 계층은 버전 키로 무효화하므로 invalidate() 한 번으로 모든 워커의 기존 항목이 무효가 됩니다.
+    적중/미스는 metrics에 "<name>.hit" / "<name>.miss"로 집계됩니다.
+    async 코드에서는 aget/aget_many/aset/aset_many를 사용합니다 (공유 계층 조회가 이벤트 루프를 막지 않도록).
+
+    Args:
+        name: 캐시 이름 (공유 키 접두사, 지표 이름).
+        maxsize: 로컬 LRU 최대 항목 수.
+        ttl: 항목 유효 시간(초). None이면 만료 없음.
+        shared: True면 Django 캐시를 2차 계층으로 사용.
+    """
+
+    def __init__(self, name, maxsize=1024, ttl=None, shared=False):
+        self.name = name
+        self.ttl = ttl
+        self.shared = shared
+        self.local = LRUCache(maxsize=maxsize, ttl=ttl)
+
+    def _version(self):
+        return cache.get_or_set(f"{self.name}:version", 1, timeout=None)
+
+    async def _aversion(self):
+        return await cache.aget_or_set(f"{self.name}:version", 1, timeout=None)
+
+    def _shared_key(self, key):
+        return f"{self.name}:{key}"
+
+    def _get_local(self, keys):
+        """(로컬에서 찾은 항목, 로컬에 없는 키)"""
+        found = {}
+        missing = []
+        for key in keys:
+            value = self.local.get(key, MISSING)
+            if value is MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        return found, missing
+
+    def _merge_shared(self, found, missing, shared_values):
+        for key in missing:
+            value = shared_values.get(self._shared_key(key), MISSING)
+            if value is not MISSING:
+                found[key] = value
+                self.local.set(key, value)
+
+    def _record(self, keys, found):
+        metrics.incr(f"{self.name}.hit", len(found))
+        metrics.incr(f"{self.name}.miss", len(keys) - len(found))
+
+    def get_many(self, keys):
+        found, missing = self._get_local(keys)
+        if missing and self.shared:
+            try:
+                version = self._version()
+                shared_values = cache.get_many([self._shared_key(key) for key in missing], version=version)
+            except Exception as e:
+                logger.warning(f"{self.name} 공유 캐시 조회 실패: {str(e)}")
+                shared_values = {}
+            self._merge_shared(found, missing, shared_values)
+
+        self._record(keys, found)
+        return found
+
+    async def aget_many(self, keys, record=True):
+        """
+        get_many의 async 버전 (공유 계층은 Django 캐시 async API 사용, 이벤트 루프를 막지 않음).
+        record=False면 적중/미스를 집계하지 않습니다 (다른 워커 결과를 기다리는 폴링 등).
+        """
+        found, missing = self._get_local(keys)
+        if missing and self.shared:
+            try:
+                version = await self._aversion()
+                shared_values = await cache.aget_many([self._shared_key(key) for key in missing], version=version)
+            except Exception as e:
+                logger.warning(f"{self.name} 공유 캐시 조회 실패: {str(e)}")
+                shared_values = {}
+            self._merge_shared(found, missing, shared_values)
+
+        if record:
+            self._record(keys, found)
+        return found
+
+    def get(self, key, default=None):
+        return self.get_many([key]).get(key, default)
+
+    async def aget(self, key, default=None, record=True):
+        return (await self.aget_many([key], record=record)).get(key, default)
+
+    def set_many(self, mapping):
+        for key, value in mapping.items():
+            self.local.set(key, value)
+
+        if mapping and self.shared:
+            try:
+                version = self._version()
+                cache.set_many(
+                    {self._shared_key(key): value for key, value in mapping.items()},
+                    timeout=self.ttl,
+                    version=version
+                )
+            except Exception as e:
+                logger.warning(f"{self.name} 공유 캐시 저장 실패: {str(e)}")
+
+    async def aset_many(self, mapping):
+        for key, value in mapping.items():
+            self.local.set(key, value)
+
+        if mapping and self.shared:
+            try:
+                version = await self._aversion()
+                await cache.aset_many(
+                    {self._shared_key(key): value for key, value in mapping.items()},
+                    timeout=self.ttl,
+                    version=version
+                )
+            except Exception as e:
+                logger.warning(f"{self.name} 공유 캐시 저장 실패: {str(e)}")
+
+    def set(self, key, value):
+        self.set_many({key: value})
+
+    async def aset(self, key, value):
+        await self.aset_many({key: value})
+
+    def invalidate(self, everywhere=False):
+        """
+        로컬 항목 삭제 + 공유 계층 버전 증가.
+        everywhere=True면 이 프로세스가 공유 계층을 쓰지 않아도(구축 스크립트 등) 버전을 올려
+        공유 계층을 쓰는 워커들의 기존 항목을 무효화합니다.
+        """
+        self.local.clear()
+        if self.shared or everywhere:
+            try:
+                cache.incr(f"{self.name}:version")
+            except ValueError:
+                cache.set(f"{self.name}:version", 2, timeout=None)
+            except Exception as e:
+                logger.warning(f"{self.name} 공유 캐시 무효화 실패: {str(e)}")
+        metrics.incr(f"{self.name}.invalidate")
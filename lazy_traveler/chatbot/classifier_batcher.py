@@ -0,0 +1,146 @@
+import asyncio
+import json
+import logging
+import re
+
+from django.conf import settings
+
+from . import metrics
+from .openai_chroma_config import llm
+from .prompt import batch_query_prompt, query_prompt
+from .utils import classify_question_with_llm
+
+logger = logging.getLogger(__name__)
+
+QUESTION_TYPES = ["function", "place", "schedule", "unknown"]
+ANSWER_LINE_PATTERN = re.compile(r"^\s*(\d+)\s*[:.)]\s*([a-zA-Z]+)")
+
+
+class MicroBatcher:
+    """
+    동시에 들어온 요청을 짧은 시간(window_ms) 동안 모았다가 handler에 한 번에 넘기는 배처.
+    max_batch개가 모이면 기다리지 않고 바로 처리합니다.
+
+    Args:
+        handler: 입력 리스트를 받아 같은 순서의 결과 리스트를 돌려주는 async 함수.
+        window_ms: 첫 요청 이후 묶음을 기다리는 최대 시간(ms).
+        max_batch: 한 번에 처리할 최대 요청 수.
+    """
+
+    def __init__(self, handler, window_ms=10, max_batch=16):
+        self.handler = handler
+        self.window_ms = window_ms
+        self.max_batch = max_batch
+        self._pending = []
+        self._timer = None
+        self._tasks = set()  # 실행 중인 배치 (끝나기 전에 가비지 컬렉션되지 않도록 참조 유지)
+
+    async def submit(self, item):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_ms / 1000, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        items = [item for item, _ in batch]
+        try:
+            results = await self.handler(items)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+def _normalize(answer):
+    category = answer.strip().lower()
+    return category if category in QUESTION_TYPES else "error"
+
+
+def parse_batch_answers(content, count):
+    """
+    "번호: 카테고리" 응답 → 번호 순서의 카테고리 목록.
+    번호가 1~count 밖이거나 중복/누락되면 None (질문이 하나면 번호 없는 응답도 허용).
+    """
+    answers = {}
+    for line in content.splitlines():
+        match = ANSWER_LINE_PATTERN.match(line)
+        if not match:
+            continue
+        index = int(match.group(1))
+        if index < 1 or index > count or index in answers:
+            return None
+        answers[index] = _normalize(match.group(2))
+
+    if count == 1 and not answers:
+        answers[1] = _normalize(content)
+
+    if len(answers) != count:
+        return None
+    return [answers[i] for i in range(1, count + 1)]
+
+
+async def classify_batch_with_llm(user_queries, model=None):
+    """
+    질문 여러 개를 한 번의 LLM 호출로 분류. 응답 번호가 1~N과 정확히 맞지 않으면 abatch로 개별 분류.
+    질문은 JSON 문자열로 넣어서(줄바꿈 이스케이프) 한 질문이 "2: function" 같은 줄을 끼워 넣어
+    같은 배치의 다른 사용자 질문 분류를 바꾸지 못하게 합니다.
+    """
+    model = model or llm
+    metrics.incr("intent.llm.batches")
+    metrics.incr("intent.llm.queries", len(user_queries))
+
+    questions = "\n".join(
+        f"{i}: {json.dumps(query, ensure_ascii=False)}" for i, query in enumerate(user_queries, start=1)
+    )
+    result = await (batch_query_prompt | model).ainvoke({"questions": questions})
+
+    answers = parse_batch_answers(result.content, len(user_queries))
+    if answers is not None:
+        return answers
+
+    logger.warning(f"배치 분류 응답 형식 오류, 개별 분류로 재시도: {result.content!r}")
+    results = await (query_prompt | model).abatch([{"question": query} for query in user_queries])
+    return [_normalize(r.content) for r in results]
+
+
+_batcher = None
+
+
+async def classify_question_batched(user_query):
+    """
+    동시에 들어온 LLM 분류 요청을 묶어서 처리.
+    INTENT_BATCH_WINDOW_MS가 0이면 기존처럼 메시지마다 바로 호출합니다.
+    """
+    global _batcher
+    if settings.INTENT_BATCH_WINDOW_MS <= 0:
+        return await classify_question_with_llm(user_query)
+
+    if _batcher is None:
+        _batcher = MicroBatcher(
+            classify_batch_with_llm,
+            window_ms=settings.INTENT_BATCH_WINDOW_MS,
+            max_batch=settings.INTENT_BATCH_MAX_SIZE
+        )
+    return await _batcher.submit(user_query)
@@ -1,12 +1,15 @@
 from datetime import datetime
 import json
+import math
 import uuid
 import pytz 
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from .models import ChatHistory
-from .recommendation_LangGraph import get_recommendation
+from .recommendation_LangGraph import stream_recommendation
+from .request_coalescer import coalesced_recommendation
 from .utils import calculate_similarity
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from .recommendations import get_chat_based_recommendations, get_user_tags_by_id
 from .utils import calculate_similarity
@@ -24,10 +27,12 @@ class ChatConsumer(AsyncWebsocketConsumer):
         if self.user:
             self.username = self.user.username
             self.user_info = self.user  # 비동기적으로 사용자 정보를 가져옴
+            self.user_tags = getattr(self.user, "tags", None) or ""  # 요청 병합 키와 일정 추천에 함께 쓰는 선호 태그
             print(f"🟢 인증된 사용자: {self.username}")
         else:
             self.username = "Guest"
             self.user_info = None
+            self.user_tags = ""
             print("🟢 비로그인 사용자: Guest")
 
         # 새로운 session_id 생성
@@ -49,6 +54,8 @@ class ChatConsumer(AsyncWebsocketConsumer):
             longitude = data.get("longitude")
             session_id = data.get("session_id")
             raw_timestamp = data.get("timestamp")
+            stream = data.get("stream", False)  # ✅ true면 진행 단계/html 블록을 순차 전송
+            raw_radius = data.get("radius")  # ✅ 장소 검색 반경(km), 없으면 서버 기본값
 
 
             timestamp = None
@@ -59,6 +66,18 @@ class ChatConsumer(AsyncWebsocketConsumer):
                     await self.send(text_data=json.dumps({"error": "올바른 timestamp 형식이 아닙니다."}))
                     return
 
+            radius_km = None
+            if raw_radius is not None:
+                try:
+                    radius_km = float(raw_radius)
+                except (TypeError, ValueError):
+                    radius_km = -1
+                if not math.isfinite(radius_km) or radius_km < 0:
+                    await self.send(text_data=json.dumps({"error": "올바른 radius 값이 아닙니다."}))
+                    return
+                # 큰 반경은 격자 검색 비용이 커지므로 상한으로 자름
+                radius_km = min(radius_km, settings.PLACE_SEARCH_MAX_RADIUS_KM)
+
 
             if not user_query:
                 await self.send(text_data=json.dumps({"error": "메시지를 입력해주세요."}))
@@ -74,14 +93,26 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 self.session_id = session_id or str(uuid.uuid4())  # 비로그인 사용자는 임시 세션 할당
 
             # ✅ 챗봇 응답 생성
-            response_text = await get_recommendation(
-                user_query=user_query, 
-                session_id=self.session_id, 
-                username=self.username, 
-                latitude=latitude, 
-                longitude=longitude,
-                timestamp= timestamp ## timestamp 추가
-            )
+            if stream:
+                response_text = await self.stream_response(
+                    user_query=user_query,
+                    latitude=latitude,
+                    longitude=longitude,
+                    timestamp=timestamp,
+                    radius_km=radius_km
+                )
+            else:
+                # 동시에 들어온 같은 요청은 한 번만 실행
+                response_text = await coalesced_recommendation(
+                    user_query=user_query, 
+                    session_id=self.session_id, 
+                    username=self.username, 
+                    latitude=latitude, 
+                    longitude=longitude,
+                    timestamp= timestamp, ## timestamp 추가
+                    radius_km=radius_km,
+                    user_tags=self.user_tags  # 메시지마다 DB에서 다시 조회하지 않도록 연결 시 불러온 태그 사용 (병합 키와 그래프가 같은 값 사용)
+                )
 
             # ✅ 채팅 기록 저장 (로그인한 사용자만)
             if self.user and self.user.is_authenticated:
@@ -103,6 +134,10 @@ class ChatConsumer(AsyncWebsocketConsumer):
             if recommendations and response_text.get("question_type") == "schedule":
                 response_payload["recommendations"] = recommendations
 
+            # ✅ 스트리밍 모드에서는 마지막 프레임임을 표시
+            if stream:
+                response_payload["event"] = "final"
+
             # ✅ 응답 전송
             await self.send(text_data=json.dumps(response_payload, ensure_ascii=False))
             
@@ -112,6 +147,27 @@ class ChatConsumer(AsyncWebsocketConsumer):
         except Exception as e:
             await self.send(text_data=json.dumps({"error": f"서버 오류 발생: {str(e)}"}))
 
+    async def stream_response(self, user_query, latitude, longitude, timestamp, radius_km=None):
+        """그래프 실행 중 발생하는 progress/chunk 이벤트를 프레임으로 전송하고 최종 결과를 반환"""
+        async for event, payload in stream_recommendation(
+            user_query=user_query,
+            session_id=self.session_id,
+            username=self.username,
+            latitude=latitude,
+            longitude=longitude,
+            timestamp=timestamp,
+            radius_km=radius_km,
+            user_tags=self.user_tags
+        ):
+            if event == "final":
+                return payload
+
+            await self.send(text_data=json.dumps({
+                "event": event,
+                "session_id": self.session_id,
+                **payload
+            }, ensure_ascii=False))
+
     async def save_chat_history(self, user_query, response_text):
         """로그인한 사용자의 대화 내역을 비동기적으로 저장"""
         try:
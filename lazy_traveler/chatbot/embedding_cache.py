@@ -0,0 +1,184 @@
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from . import metrics
+from .caches import LRUCache, MISSING
+from .executors import run_in_executor
+
+logger = logging.getLogger(__name__)
+
+# SQLite IN (...) 절에 한 번에 넣을 키 개수
+SQLITE_CHUNK = 500
+
+
+def normalize_text(text):
+    """공백/대소문자/끝 문장부호만 다른 질의는 같은 키가 되도록 정규화"""
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.rstrip(" ?!.~")
+
+
+class EmbeddingDiskStore:
+    """key → float32 벡터(BLOB)를 저장하는 SQLite 저장소. 여러 워커 프로세스가 같은 파일을 공유합니다."""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+            self._conn.commit()
+
+    def get_many(self, keys):
+        found = {}
+        keys = list(keys)
+        with self._lock:
+            for i in range(0, len(keys), SQLITE_CHUNK):
+                chunk = keys[i:i + SQLITE_CHUNK]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def set_many(self, mapping):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in mapping.items()]
+            )
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            count, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()
+        return {"entries": count, "bytes": size}
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    임베딩 API 호출 결과를 캐시하는 Embeddings 래퍼.
+    메모리 LRU → 디스크(SQLite) → 실제 임베딩 API 순서로 조회하고,
+    키는 "모델명 + 정규화된 텍스트"의 해시입니다.
+
+    Args:
+        underlying: 실제 임베딩 모델 (예: OpenAIEmbeddings).
+        path: SQLite 파일 경로. 비어 있으면 메모리 캐시만 사용.
+        maxsize: 메모리 LRU 최대 항목 수.
+    """
+
+    def __init__(self, underlying, path=None, maxsize=10000):
+        self.underlying = underlying
+        self.model_name = getattr(underlying, "model", underlying.__class__.__name__)
+        self.memory = LRUCache(maxsize=maxsize)
+        self.disk = None
+        if path:
+            try:
+                self.disk = EmbeddingDiskStore(path)
+            except sqlite3.Error as e:
+                logger.warning(f"임베딩 디스크 캐시를 열 수 없습니다 ({path}): {str(e)}")
+
+    def _key(self, text):
+        return hashlib.sha256(f"{self.model_name}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    def _lookup(self, keys):
+        found = {}
+        missing = []
+        for key in keys:
+            vector = self.memory.get(key, MISSING)
+            if vector is MISSING:
+                missing.append(key)
+            else:
+                found[key] = vector
+        metrics.incr("embedding_cache.hit.memory", len(found))
+
+        if missing and self.disk:
+            try:
+                on_disk = self.disk.get_many(missing)
+            except sqlite3.Error as e:
+                logger.warning(f"임베딩 디스크 캐시 조회 실패: {str(e)}")
+                on_disk = {}
+            for key, vector in on_disk.items():
+                self.memory.set(key, vector)
+            found.update(on_disk)
+            metrics.incr("embedding_cache.hit.disk", len(on_disk))
+
+        metrics.incr("embedding_cache.lookup", len(keys))
+        metrics.incr("embedding_cache.hit", len(found))
+        metrics.incr("embedding_cache.miss", len(keys) - len(found))
+        return found
+
+    def _store(self, mapping):
+        for key, vector in mapping.items():
+            self.memory.set(key, vector)
+        if mapping and self.disk:
+            try:
+                self.disk.set_many(mapping)
+            except sqlite3.Error as e:
+                logger.warning(f"임베딩 디스크 캐시 저장 실패: {str(e)}")
+
+    def _plan(self, texts):
+        """(텍스트별 키, 캐시된 벡터, 새로 임베딩할 키→텍스트)"""
+        keys = [self._key(text) for text in texts]
+        found = self._lookup(list(dict.fromkeys(keys)))
+        pending = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in pending:
+                pending[key] = text
+        return keys, found, pending
+
+    def _finish(self, keys, found, pending, vectors):
+        new_vectors = {key: np.asarray(vector, dtype=np.float32) for key, vector in zip(pending, vectors)}
+        self._store(new_vectors)
+        found.update(new_vectors)
+        return [found[key].tolist() for key in keys]
+
+    def embed_documents(self, texts):
+        keys, found, pending = self._plan(texts)
+        vectors = self.underlying.embed_documents(list(pending.values())) if pending else []
+        return self._finish(keys, found, pending, vectors)
+
+    def embed_query(self, text):
+        keys, found, pending = self._plan([text])
+        vectors = [self.underlying.embed_query(text)] if pending else []
+        return self._finish(keys, found, pending, vectors)[0]
+
+    async def _run_blocking(self, func, *args):
+        """디스크 캐시(SQLite 조회/저장 + 락)를 쓰면 이벤트 루프를 막지 않도록 전용 스레드 풀에서 실행"""
+        if self.disk is None:
+            return func(*args)
+        return await run_in_executor(func)(*args)
+
+    async def aembed_documents(self, texts):
+        keys, found, pending = await self._run_blocking(self._plan, texts)
+        vectors = await self.underlying.aembed_documents(list(pending.values())) if pending else []
+        return await self._run_blocking(self._finish, keys, found, pending, vectors)
+
+    async def aembed_query(self, text):
+        keys, found, pending = await self._run_blocking(self._plan, [text])
+        vectors = [await self.underlying.aembed_query(text)] if pending else []
+        return (await self._run_blocking(self._finish, keys, found, pending, vectors))[0]
+
+    def stats(self):
+        """적중률과 사용 중인 메모리/디스크 바이트"""
+        counters = metrics.snapshot()
+        lookups = counters.get("embedding_cache.lookup", 0)
+        vectors = self.memory.values()
+        disk = self.disk.stats() if self.disk else {"entries": 0, "bytes": 0}
+        return {
+            "hit_ratio": counters.get("embedding_cache.hit", 0) / lookups if lookups else 0.0,
+            "memory_entries": len(vectors),
+            "memory_bytes": sum(vector.nbytes for vector in vectors),
+            "disk_entries": disk["entries"],
+            "disk_bytes": disk["bytes"],
+        }
@@ -0,0 +1,22 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from . import metrics
+
+# 벡터 검색, 거리/랭킹 계산, 일정 조합, 동기 LLM 호출용 전용 스레드 풀.
+# @sync_to_async 기본값(thread_sensitive=True)은 워커의 모든 연결을 스레드 하나에 줄 세우므로,
+# ORM을 쓰지 않는 작업은 이 풀에서 동시에 실행합니다. ORM 접근은 계속 sync_to_async / database_sync_to_async 사용.
+
+_executor = ThreadPoolExecutor(max_workers=settings.CHATBOT_EXECUTOR_WORKERS, thread_name_prefix="chatbot")
+
+metrics.register_gauge(
+    "executor",
+    lambda: {"workers": settings.CHATBOT_EXECUTOR_WORKERS, "queued": _executor._work_queue.qsize()}
+)
+
+
+def run_in_executor(func):
+    """동기 함수를 전용 스레드 풀에서 실행하는 async 함수로 감쌈 (@sync_to_async 대신 데코레이터로 사용)"""
+    return sync_to_async(func, thread_sensitive=False, executor=_executor)
@@ -0,0 +1,117 @@
+import math
+from collections import defaultdict
+
+import numpy as np
+
+# 위경도 거리 계산 (haversine, 구면 근사). 후보 전체를 numpy 배열로 한 번에 계산합니다.
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE_LAT = 111.32
+
+
+def haversine_km(latitude, longitude, latitudes, longitudes):
+    """한 지점에서 여러 지점까지의 거리(km) 배열"""
+    lat1 = np.radians(latitude)
+    lat2 = np.radians(np.asarray(latitudes, dtype=np.float64))
+    dlat = lat2 - lat1
+    dlon = np.radians(np.asarray(longitudes, dtype=np.float64) - longitude)
+
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def haversine_matrix_km(user_latitudes, user_longitudes, latitudes, longitudes):
+    """여러 사용자 x 여러 장소 거리(km) 행렬 (사전 계산 작업용)"""
+    user_lat = np.radians(np.asarray(user_latitudes, dtype=np.float64))[:, None]
+    user_lon = np.radians(np.asarray(user_longitudes, dtype=np.float64))[:, None]
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))[None, :]
+    lon = np.radians(np.asarray(longitudes, dtype=np.float64))[None, :]
+
+    a = np.sin((lat - user_lat) / 2) ** 2 + np.cos(user_lat) * np.cos(lat) * np.sin((lon - user_lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def coordinates_of(docs):
+    """
+    문서들의 (위도 배열, 경도 배열).
+    장소 메모리 인덱스에 있는 문서는 로드 시 만들어 둔 좌표 배열을 그대로 쓰고, 없으면 메타데이터에서 읽습니다.
+    """
+    from .place_index import get_place_index
+
+    place_index = get_place_index()
+    if place_index is not None:
+        rows = [place_index.row_of.get(getattr(doc, "id", None)) for doc in docs]
+        if None not in rows:
+            return place_index.latitudes[rows], place_index.longitudes[rows]
+
+    latitudes = np.array([float(doc.metadata.get("latitude") or 0) for doc in docs], dtype=np.float64)
+    longitudes = np.array([float(doc.metadata.get("longitude") or 0) for doc in docs], dtype=np.float64)
+    return latitudes, longitudes
+
+
+def distances_from(latitude, longitude, docs):
+    """사용자 위치에서 문서(장소)들까지의 거리(km) 배열"""
+    if not docs:
+        return np.zeros(0, dtype=np.float64)
+    latitudes, longitudes = coordinates_of(docs)
+    return haversine_km(float(latitude), float(longitude), latitudes, longitudes)
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """반경 radius_km 원을 감싸는 (최소 위도, 최대 위도, 최소 경도, 최대 경도)"""
+    lat_delta = radius_km / KM_PER_DEGREE_LAT
+    lon_delta = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(latitude)), 1e-6))
+    return latitude - lat_delta, latitude + lat_delta, longitude - lon_delta, longitude + lon_delta
+
+
+class GridIndex:
+    """
+    위경도를 cell_km 크기의 격자로 나눈 공간 인덱스.
+    반경 검색 시 반경을 덮는 격자 칸의 후보만 모은 뒤 haversine으로 정확히 거릅니다.
+
+    Args:
+        latitudes: 장소 위도 배열.
+        longitudes: 장소 경도 배열.
+        cell_km: 격자 한 칸의 크기(km).
+    """
+
+    def __init__(self, latitudes, longitudes, cell_km=0.5):
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)
+        reference_lat = float(self.latitudes.mean()) if len(self.latitudes) else 37.57
+        self.cell_lat = cell_km / KM_PER_DEGREE_LAT
+        self.cell_lon = cell_km / (KM_PER_DEGREE_LAT * math.cos(math.radians(reference_lat)))
+
+        cells = defaultdict(list)
+        lat_cells = np.floor(self.latitudes / self.cell_lat).astype(np.int64)
+        lon_cells = np.floor(self.longitudes / self.cell_lon).astype(np.int64)
+        for row, cell in enumerate(zip(lat_cells.tolist(), lon_cells.tolist())):
+            cells[cell].append(row)
+        self.cells = {cell: np.array(rows, dtype=np.int64) for cell, rows in cells.items()}
+        # 장소가 있는 격자 칸의 범위 (반경이 커도 이 범위 밖의 칸은 보지 않음)
+        self.lat_bounds = (int(lat_cells.min()), int(lat_cells.max())) if len(lat_cells) else (0, -1)
+        self.lon_bounds = (int(lon_cells.min()), int(lon_cells.max())) if len(lon_cells) else (0, -1)
+
+    def within(self, latitude, longitude, radius_km):
+        """반경 radius_km 이내 장소의 행 번호 배열"""
+        min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_km)
+        lat_range = self._cell_range(min_lat / self.cell_lat, max_lat / self.cell_lat, self.lat_bounds)
+        lon_range = self._cell_range(min_lon / self.cell_lon, max_lon / self.cell_lon, self.lon_bounds)
+
+        candidates = [self.cells[(i, j)] for i in lat_range for j in lon_range if (i, j) in self.cells]
+        if not candidates:
+            return np.zeros(0, dtype=np.int64)
+
+        rows = np.concatenate(candidates)
+        distances = haversine_km(latitude, longitude, self.latitudes[rows], self.longitudes[rows])
+        return np.sort(rows[distances <= radius_km])
+
+    @staticmethod
+    def _cell_range(low, high, bounds):
+        """[low, high] 구간을 덮는 격자 칸 번호 중 장소가 있는 범위(bounds) 안쪽만"""
+        first, last = bounds
+        low = max(low, first)
+        high = min(high, last)
+        if low > high:
+            return range(0)
+        return range(math.floor(low), math.floor(high) + 1)
@@ -0,0 +1,44 @@
+import re
+
+from . import metrics
+
+# 질문 분류 fast path: 명확한 표현은 LLM 호출 전에 키워드 규칙으로 바로 분류하고, 나머지만 LLM으로 넘깁니다.
+# (임베딩 centroid 분류는 text-embedding-3-small 유사도 분포에서 확신도가 임계값에 거의 닿지 않아
+#  분류는 못 하면서 질문마다 임베딩 호출만 늘려서 쓰지 않습니다.)
+
+# 순서대로 검사 (기능 질문을 먼저 확인해서 "일정 기능 사용법" 같은 질문이 schedule로 가지 않도록)
+KEYWORD_RULES = [
+    ("function", re.compile(r"(회원\s*가입|로그인|로그아웃|비밀번호|태그\s*(변경|수정|설정|선택)|대화\s*(내역|기록)|마이\s*페이지).*(방법|어떻게|알려|하나요|하나|할\s*수|돼|되나요)")),
+    ("schedule", re.compile(r"(스케줄링|스케줄|일정|코스).*(해\s*줘|짜\s*줘|만들어\s*줘|추천|바꿔\s*줘|해\s*줄래|짜\s*줄래|부탁)")),
+    ("place", re.compile(r"(맛집|카페|식당|음식점|관광지|명소|술집|빵집|베이커리|브런치|갈\s*만한|가볼\s*만한|놀\s*만한).*(추천|알려\s*줘|어디|있어|찾아)")),
+]
+
+# 후속 질문의 끝맺음 ("해줘", "다시 짜줄래?", "있어?" 등). 후속 질문 패턴은 문장 전체에 맞춰서
+# 장소/카테고리 단어가 더 붙은 질문("다른 거 맛집 추천")은 새 질문으로 처리합니다.
+FOLLOW_UP_ENDING = r"\s*(좀\s*)?(다시\s*)?(해|짜|바꿔|만들어|보여|알려|추천해|추천|없어|있어|있나|없나)?\s*(줘|줄래|주세요|줘요|봐|봐요|요)?\s*[?!.~]*\s*$"
+
+# 직전 일정의 다른 안을 요청하는 질문 (예: "다른 일정으로 해줘", "일정 다른 걸로 바꿔줘")
+ALTERNATIVE_SCHEDULE_PATTERN = re.compile(
+    r"^\s*((다른|딴|새로운)\s*(일정|스케줄|코스)\s*(으로|로|을|를|은|는|도)?"
+    r"|(일정|스케줄|코스)\s*(을|를|은|는)?\s*(다른|딴|새로운)\s*(걸로|거로|것으로|거|걸|것|안)\s*(으로|로)?)"
+    + FOLLOW_UP_ENDING
+)
+
+
+def match_keywords(user_query):
+    """키워드 규칙에 걸리면 라벨, 아니면 None"""
+    for label, pattern in KEYWORD_RULES:
+        if pattern.search(user_query):
+            return label
+    return None
+
+
+async def classify_question_fast(user_query, fallback):
+    """키워드 규칙에 걸리면 그 라벨을, 아니면 fallback(LLM 분류)의 결과를 반환"""
+    metrics.incr("intent.total")
+    label = match_keywords(user_query)
+    if label:
+        metrics.incr("intent.fast_path")
+        return label
+
+    return await fallback(user_query)
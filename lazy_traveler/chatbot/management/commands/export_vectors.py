@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from chatbot.openai_chroma_config import VECTOR_STORE_DIRS, embeddings, open_vector_store
+from chatbot.vector_snapshot import export_snapshot
+
+
+class Command(BaseCommand):
+    help = "Chroma 컬렉션(임베딩/ID/메타데이터)을 벡터 스냅샷 디렉토리로 내보냅니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="스냅샷 디렉토리")
+        parser.add_argument("--source", default=None, help="벡터 DB가 있는 디렉토리 (기본: 현재 디렉토리)")
+        parser.add_argument(
+            "--collections", nargs="+", default=list(VECTOR_STORE_DIRS), choices=list(VECTOR_STORE_DIRS),
+            help="내보낼 컬렉션 (기본: 전체)"
+        )
+
+    def handle(self, *args, **options):
+        vector_stores = {name: open_vector_store(name, base_dir=options["source"]) for name in options["collections"]}
+        manifest = export_snapshot(options["output"], vector_stores, embedding_model=embeddings.model_name)
+
+        for name, entry in manifest["collections"].items():
+            self.stdout.write(f"✅ {name}: {entry['count']}건 ({entry['dimensions']}차원) → {entry['file']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ 스냅샷 저장 완료: {options['output']} (모델 {manifest['embedding_model']}, content_hash {manifest['content_hash'][:12]})"
+        ))
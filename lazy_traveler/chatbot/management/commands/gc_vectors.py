@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from chatbot.vector_versions import gc_versions
+
+
+class Command(BaseCommand):
+    help = "활성 버전, 실행 중인 워커가 참조하는 버전, 최근 버전을 제외한 벡터 DB 버전을 삭제합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keep", type=int, default=None, help="남길 이전 버전 수 (기본: VECTOR_STORE_KEEP_VERSIONS)")
+
+    def handle(self, *args, **options):
+        if not settings.VECTOR_STORE_ROOT:
+            raise CommandError("VECTOR_STORE_ROOT가 설정되지 않았습니다.")
+
+        removed = gc_versions(keep=options["keep"])
+        for version in removed:
+            self.stdout.write(f"🗑️ 이전 버전 삭제: {version}")
+        self.stdout.write(self.style.SUCCESS(f"✅ {len(removed)}개 버전 삭제"))
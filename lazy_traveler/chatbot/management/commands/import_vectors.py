@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from chatbot.opening_hours import verdict_cache
+from chatbot.openai_chroma_config import VECTOR_STORE_DIRS, embeddings, open_vector_store
+from chatbot.vector_snapshot import SnapshotError, import_snapshot
+
+
+class Command(BaseCommand):
+    help = "벡터 스냅샷을 Chroma 벡터 DB로 가져옵니다 (임베딩 API 호출 없음)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("snapshot", help="스냅샷 디렉토리 (export_vectors 결과)")
+        parser.add_argument("--target", default=None, help="벡터 DB를 만들 디렉토리 (기본: 현재 디렉토리)")
+        parser.add_argument("--force", action="store_true", help="임베딩 모델이 현재 설정과 달라도 가져오기")
+
+    def handle(self, *args, **options):
+        vector_stores = {name: open_vector_store(name, base_dir=options["target"]) for name in VECTOR_STORE_DIRS}
+        try:
+            results = import_snapshot(
+                options["snapshot"],
+                vector_stores,
+                embedding_model=None if options["force"] else embeddings.model_name
+            )
+        except SnapshotError as e:
+            raise CommandError(str(e))
+
+        for name, result in results.items():
+            self.stdout.write(f"✅ {name}: {result['imported']}건 가져옴, {result['deleted']}건 삭제")
+
+        # 장소 데이터가 바뀌었을 수 있으므로 영업 여부 캐시의 공유 계층(Redis) 무효화
+        verdict_cache.invalidate(everywhere=True)
+        self.stdout.write(self.style.SUCCESS("✅ 스냅샷 가져오기 완료!"))
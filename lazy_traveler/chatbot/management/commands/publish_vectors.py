@@ -0,0 +1,89 @@
+import os
+import shutil
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from chatbot.openai_chroma_config import VECTOR_STORE_DIRS, embeddings, open_vector_store
+from chatbot.vector_snapshot import SnapshotError, import_snapshot, read_manifest
+from chatbot.vector_versions import (
+    gc_versions, new_version_id, read_pointer, read_version_info, version_dir, write_pointer, write_version_info
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "현재 활성 버전을 복사한 새 벡터 DB 버전에 변경분을 반영하고 활성 버전으로 교체합니다. "
+        "실행 중인 워커는 VECTOR_STORE_POLL_SECONDS 안에 새 버전으로 전환됩니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--snapshot", help="구축 대신 가져올 벡터 스냅샷 디렉토리 (export_vectors 결과)")
+        parser.add_argument("--fake-embeddings", action="store_true", help="OpenAI 대신 가짜 임베딩 사용 (오프라인 테스트용)")
+        parser.add_argument("--no-gc", action="store_true", help="교체 후 이전 버전을 정리하지 않음")
+
+    def handle(self, *args, **options):
+        if not settings.VECTOR_STORE_ROOT:
+            raise CommandError("VECTOR_STORE_ROOT가 설정되지 않았습니다.")
+
+        current = read_pointer()
+        version = new_version_id()
+        target = version_dir(version)
+
+        manifest = None
+        if options["snapshot"]:
+            try:
+                manifest = read_manifest(options["snapshot"], embeddings.model_name)
+            except SnapshotError as e:
+                raise CommandError(str(e))
+            if current and read_version_info(current).get("content_hash") == manifest["content_hash"]:
+                self.stdout.write(f"✅ 활성 버전 {current}과 같은 스냅샷이라 교체하지 않습니다.")
+                return
+
+        # 1. 활성 버전을 복사 (바뀌지 않은 레코드는 다시 임베딩하지 않음)
+        if current:
+            shutil.copytree(version_dir(current), target)
+        else:
+            os.makedirs(target)
+        write_version_info(version, {"created_at": time.time(), "parent": current})
+
+        # 2. 변경분 반영
+        try:
+            if manifest:
+                vector_stores = {name: open_vector_store(name, base_dir=target) for name in VECTOR_STORE_DIRS}
+                import_snapshot(options["snapshot"], vector_stores, embedding_model=embeddings.model_name)
+                changed = True
+            else:
+                from chatbot.build_vector_store import build_vector_store
+
+                stats = build_vector_store(base_dir=target, fake_embeddings=options["fake_embeddings"])
+                failed = sum(result["failed"] for result in stats.values())
+                if failed:
+                    # 레코드가 빠진 버전으로 워커가 교체되지 않도록 게시하지 않음 (활성 버전 유지)
+                    raise CommandError(f"벡터 DB 구축 중 {failed}건 저장 실패 - 새 버전을 게시하지 않습니다.")
+                changed = current is None or any(
+                    result["added"] or result["updated"] or result["deleted"] for result in stats.values()
+                )
+        except BaseException:
+            shutil.rmtree(target, ignore_errors=True)
+            raise
+
+        if not changed:
+            shutil.rmtree(target, ignore_errors=True)
+            self.stdout.write(f"✅ 변경 사항이 없어 활성 버전 {current}을 유지합니다.")
+            return
+
+        # 3. 활성 버전 교체
+        write_version_info(version, {
+            "created_at": read_version_info(version).get("created_at", time.time()),
+            "parent": current,
+            "content_hash": manifest["content_hash"] if manifest else None,
+        })
+        write_pointer(version)
+        self.stdout.write(self.style.SUCCESS(f"✅ 활성 벡터 DB 버전: {current} → {version}"))
+
+        # 4. 어떤 워커도 참조하지 않는 이전 버전 정리
+        if not options["no_gc"]:
+            for removed in gc_versions():
+                self.stdout.write(f"🗑️ 이전 버전 삭제: {removed}")
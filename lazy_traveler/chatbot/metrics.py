@@ -0,0 +1,46 @@
+import threading
+from collections import Counter
+
+# 워커 프로세스 단위의 간단한 카운터 모음 (캐시 적중률, LLM 호출 수 등)
+_counters = Counter()
+_lock = threading.Lock()
+
+# report()에 함께 내보낼 비율 지표: 이름 → (분자 카운터, 분모 카운터)
+RATIOS = {
+    "intent.fast_path_ratio": ("intent.fast_path", "intent.total"),
+    "embedding_cache.hit_ratio": ("embedding_cache.hit", "embedding_cache.lookup"),
+    "session_pool.hit_ratio": ("session_pool.hit", "session_pool.lookup"),
+}
+
+# report()에 함께 내보낼 현재 상태 값: 이름 → 인자 없는 함수 (예: 캐시 사용 바이트)
+_gauges = {}
+
+
+def incr(name: str, amount: int = 1):
+    with _lock:
+        _counters[name] += amount
+
+
+def snapshot() -> dict:
+    with _lock:
+        return dict(_counters)
+
+
+def ratio(numerator: str, denominator: str) -> float:
+    """예: ratio("cache.hit", "cache.lookup")"""
+    with _lock:
+        total = _counters[denominator]
+        return _counters[numerator] / total if total else 0.0
+
+
+def register_gauge(name: str, func):
+    _gauges[name] = func
+
+
+def report() -> dict:
+    """카운터 전체, RATIOS에 등록된 비율 지표, 등록된 gauge 값"""
+    return {
+        "counters": snapshot(),
+        "ratios": {name: ratio(numerator, denominator) for name, (numerator, denominator) in RATIOS.items()},
+        "gauges": {name: func() for name, func in _gauges.items()},
+    }
@@ -1,9 +1,13 @@
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 
 from langchain_chroma import Chroma
+from django.conf import settings
 import openai
 import os
 from dotenv import load_dotenv  
+from .embedding_cache import CachedEmbeddings
+from .vector_versions import VersionedVectorStore
+from . import metrics
 
 
 # .env 파일 로드
@@ -18,20 +22,33 @@ function_vector_dir = os.path.join(current_dir, 'vector_function')
 place_vector_dir = os.path.join(current_dir,'vector_place')
 
 
-# embeddings 도구 설정
-embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-
-function_vector_store = Chroma(
-    collection_name="function_collection",
-    embedding_function=embeddings,
-    persist_directory=function_vector_dir
+# embeddings 도구 설정 (동일/유사 질의는 메모리·디스크 캐시에서 재사용)
+embeddings = CachedEmbeddings(
+    OpenAIEmbeddings(model="text-embedding-3-small"),
+    path=settings.EMBEDDING_CACHE_PATH,
+    maxsize=settings.EMBEDDING_CACHE_SIZE
 )
+metrics.register_gauge("embedding_cache", embeddings.stats)
 
-place_vector_store = Chroma(
-    collection_name="place_collection",
-    embedding_function=embeddings,
-    persist_directory=place_vector_dir
-)
+# 컬렉션 이름 → 벡터 DB 디렉토리 이름
+VECTOR_STORE_DIRS = {
+    "function_collection": "vector_function",
+    "place_collection": "vector_place",
+}
+
+
+def open_vector_store(collection_name, base_dir=None, embedding_function=None):
+    """base_dir(기본: 현재 디렉토리) 아래 컬렉션의 Chroma 벡터 DB"""
+    return Chroma(
+        collection_name=collection_name,
+        embedding_function=embedding_function or embeddings,
+        persist_directory=os.path.join(base_dir or current_dir, VECTOR_STORE_DIRS[collection_name])
+    )
+
+
+# 현재 벡터 DB 버전의 컬렉션 (VECTOR_STORE_ROOT의 활성 버전이 바뀌면 워커 재시작 없이 교체됨, vector_versions 참고)
+function_vector_store = VersionedVectorStore("function_collection")
+place_vector_store = VersionedVectorStore("place_collection")
 
 # LLM 설정
 llm = ChatOpenAI(model="gpt-4o-mini")
\ No newline at end of file
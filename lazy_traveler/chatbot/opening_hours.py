@@ -0,0 +1,183 @@
+import re
+import hashlib
+from bisect import bisect_right
+from datetime import datetime
+from functools import lru_cache
+
+from django.conf import settings
+
+from .caches import TieredCache
+
+# 구글 지도 영업시간 문자열(예: "월요일: 오후 12:00~10:00")을 주간 분(minute) 구간으로 변환.
+# 한 주의 시작(월요일 00:00)을 0으로 두고, 각 구간은 [시작, 끝) 형태의 분 단위 정수.
+# 벡터 DB 구축 시 파싱해서 메타데이터("opening_intervals")에 저장하고,
+# 조회 시에는 bisect로 O(log n) 판정합니다. 파싱할 수 없는 문자열만 LLM으로 판단합니다.
+
+WEEKDAYS = ["월요일", "화요일", "수요일", "목요일", "금요일", "토요일", "일요일"]
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+DAY_PATTERN = re.compile(r"([월화수목금토일]요일)\s*:")
+TIME_PATTERN = re.compile(r"^(?:(오전|오후)\s*)?(\d{1,2}):(\d{2})$")
+
+
+class OpeningHoursParseError(ValueError):
+    pass
+
+
+def _to_minutes(meridiem, hour, minute):
+    if hour > 12 or minute >= 60:
+        raise OpeningHoursParseError(f"잘못된 시각: {meridiem} {hour}:{minute}")
+    hour = hour % 12
+    if meridiem == "오후":
+        hour += 12
+    return hour * 60 + minute
+
+
+def _parse_span(span):
+    """'오전 11:30 ~ 오후 2:00' → (690, 840). 종료 시각의 오전/오후가 생략되면 시작 시각을 따름"""
+    parts = [part.strip() for part in span.split("~")]
+    if len(parts) != 2:
+        raise OpeningHoursParseError(f"시간 구간 형식 오류: {span}")
+
+    start_match = TIME_PATTERN.match(parts[0])
+    end_match = TIME_PATTERN.match(parts[1])
+    if not start_match or not end_match or not start_match.group(1):
+        raise OpeningHoursParseError(f"시간 구간 형식 오류: {span}")
+
+    start_meridiem = start_match.group(1)
+    end_meridiem = end_match.group(1) or start_meridiem
+
+    start = _to_minutes(start_meridiem, int(start_match.group(2)), int(start_match.group(3)))
+    end = _to_minutes(end_meridiem, int(end_match.group(2)), int(end_match.group(3)))
+
+    # 종료가 시작보다 같거나 이르면 자정을 넘기는 영업 (예: 오후 7:00 ~ 오전 3:00)
+    if end <= start:
+        end += MINUTES_PER_DAY
+    return start, end
+
+
+def _parse_day(body):
+    """요일 하나의 영업시간 → 당일 0시 기준 분 구간 목록"""
+    body = body.strip()
+    if body == "휴무일":
+        return []
+    if body == "24시간 영업":
+        return [(0, MINUTES_PER_DAY)]
+    return [_parse_span(span) for span in body.split(",") if span.strip()]
+
+
+def _normalize(intervals):
+    """주 경계를 넘는 구간을 잘라 [0, 1주) 안으로 모으고, 겹치는 구간은 병합"""
+    pieces = []
+    for start, end in intervals:
+        if end > MINUTES_PER_WEEK:
+            pieces.append((start, MINUTES_PER_WEEK))
+            pieces.append((0, end - MINUTES_PER_WEEK))
+        else:
+            pieces.append((start, end))
+
+    merged = []
+    for start, end in sorted(pieces):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def parse_opening_hours(opening_hours):
+    """
+    영업시간(요일별 문자열 리스트 또는 ', '로 이어 붙인 문자열)을 주간 분 구간 리스트로 변환.
+
+    Raises:
+        OpeningHoursParseError: 7개 요일을 모두 해석하지 못한 경우.
+    """
+    if isinstance(opening_hours, (list, tuple)):
+        opening_hours = ", ".join(opening_hours)
+
+    # "월요일: ..., 화요일: ..." → ["", "월요일", "...", "화요일", "..."]
+    tokens = DAY_PATTERN.split(opening_hours or "")
+    if tokens[0].strip(" ,"):
+        raise OpeningHoursParseError(f"요일 없이 시작하는 영업시간: {opening_hours}")
+
+    days = {}
+    for day, body in zip(tokens[1::2], tokens[2::2]):
+        if day in days:
+            raise OpeningHoursParseError(f"중복된 요일: {day}")
+        days[day] = _parse_day(body.strip(" ,"))
+
+    if len(days) != len(WEEKDAYS):
+        raise OpeningHoursParseError(f"요일 정보 누락: {opening_hours}")
+
+    intervals = []
+    for index, day in enumerate(WEEKDAYS):
+        offset = index * MINUTES_PER_DAY
+        intervals.extend((offset + start, offset + end) for start, end in days[day])
+
+    return _normalize(intervals)
+
+
+def encode_intervals(intervals):
+    """Chroma 메타데이터(스칼라만 허용)에 넣기 위한 압축 문자열. 예: '720-1320,2160-2760'"""
+    return ",".join(f"{start}-{end}" for start, end in intervals)
+
+
+@lru_cache(maxsize=4096)
+def decode_intervals(text):
+    """encode_intervals의 역변환. bisect용으로 (시작 목록, 끝 목록) 튜플을 반환"""
+    starts, ends = [], []
+    for item in filter(None, text.split(",")):
+        start, end = item.split("-")
+        starts.append(int(start))
+        ends.append(int(end))
+    return tuple(starts), tuple(ends)
+
+
+@lru_cache(maxsize=4096)
+def _parse_cached(opening_hours):
+    try:
+        return encode_intervals(parse_opening_hours(opening_hours))
+    except OpeningHoursParseError:
+        return None
+
+
+def get_opening_intervals(metadata):
+    """
+    장소 메타데이터에서 영업 구간을 가져옴.
+    빌드 시 저장된 "opening_intervals"를 우선 사용하고, 없으면(이전 빌드) 원문을 파싱.
+    파싱 불가면 None (→ LLM 판단으로 대체).
+    """
+    encoded = metadata.get("opening_intervals")
+    if encoded is None:
+        encoded = _parse_cached(metadata.get("opening_hours") or "")
+    if encoded is None:
+        return None
+    return decode_intervals(encoded)
+
+
+def is_open_at(intervals, when: datetime):
+    """decode_intervals 결과에 대해 when 시각에 영업 중인지 판정 (O(log n))"""
+    starts, ends = intervals
+    minute = when.weekday() * MINUTES_PER_DAY + when.hour * 60 + when.minute
+    index = bisect_right(starts, minute) - 1
+    return index >= 0 and minute < ends[index]
+
+
+# LLM으로 판단한 영업 여부 캐시: (place_id, 요일, 시간 버킷) → True/False
+# 벡터 DB를 다시 구축하면 build_vector_store/import_vectors가 공유 계층을, 버전 교체 때 각 워커가 로컬 계층을 무효화합니다.
+verdict_cache = TieredCache(
+    "opening_hours",
+    maxsize=settings.OPENING_HOURS_CACHE_SIZE,
+    ttl=settings.OPENING_HOURS_CACHE_TTL,
+    shared=settings.OPENING_HOURS_CACHE_SHARED
+)
+
+
+def verdict_cache_key(metadata, when: datetime):
+    place_id = metadata.get("place_id")
+    if not place_id or place_id == "N/A":
+        # place_id가 없으면 영업시간 원문으로 구분
+        place_id = hashlib.sha1(metadata.get("opening_hours", "").encode("utf-8")).hexdigest()[:16]
+    bucket = (when.hour * 60 + when.minute) // settings.OPENING_HOURS_CACHE_BUCKET_MINUTES
+    return f"{place_id}:{when.weekday()}:{bucket}"
@@ -0,0 +1,225 @@
+import logging
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+from django.conf import settings
+from langchain_core.documents import Document
+
+from .geo import GridIndex
+from .opening_hours import MINUTES_PER_WEEK, get_opening_intervals
+from .vector_ingest import place_categories
+from .vector_versions import current_version
+
+logger = logging.getLogger(__name__)
+
+# 영업 여부 비트맵 해상도 (분). 각 슬롯은 슬롯 시작 시각의 영업 여부를 기록
+OPEN_SLOT_MINUTES = 15
+OPEN_SLOTS = MINUTES_PER_WEEK // OPEN_SLOT_MINUTES
+
+
+class PlaceIndex:
+    """
+    place_collection 전체를 메모리에 올린 정확(exact) top-k 검색 인덱스.
+    종로 카탈로그는 수천 건 수준이라 float32 행렬 하나와 행렬-벡터 곱으로 충분히 빠릅니다.
+    점수는 Chroma(l2)와 같은 제곱 유클리드 거리이며, 낮을수록 가깝습니다.
+
+    Args:
+        ids: 문서 ID 리스트.
+        vectors: (N, D) 임베딩 행렬.
+        metadatas: 문서별 메타데이터.
+        documents: 문서별 page_content.
+    """
+
+    def __init__(self, ids, vectors, metadatas, documents):
+        self.ids = list(ids)
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.norms = np.einsum("ij,ij->i", self.vectors, self.vectors)
+        self.metadatas = [metadata or {} for metadata in metadatas]
+        self.documents = list(documents)
+        self._columns = {}
+        # 카테고리 집합 (N, C) bool 행렬 (여러 카테고리에 속한 장소는 한 행에 여러 열이 True)
+        self.category_names, self.category_matrix = self._build_category_matrix()
+        self.row_of = {doc_id: row for row, doc_id in enumerate(self.ids)}
+        # 거리 계산용 좌표 배열 (카탈로그 로드 시 한 번만 변환)
+        self.latitudes = np.array([float(metadata.get("latitude") or 0) for metadata in self.metadatas], dtype=np.float64)
+        self.longitudes = np.array([float(metadata.get("longitude") or 0) for metadata in self.metadatas], dtype=np.float64)
+        self.grid = GridIndex(self.latitudes, self.longitudes, cell_km=settings.PLACE_GRID_CELL_KM)
+        self.open_bitmap, self.hours_known = self._build_open_bitmap()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def column(self, key):
+        """메타데이터 key 값 배열 (필터용, 키별로 한 번만 만듦)"""
+        if key not in self._columns:
+            self._columns[key] = np.array([metadata.get(key) for metadata in self.metadatas], dtype=object)
+        return self._columns[key]
+
+    @classmethod
+    def from_chroma(cls, vector_store, where=None):
+        data = vector_store._collection.get(where=where, include=["embeddings", "metadatas", "documents"])
+        vectors = data["embeddings"]
+        if vectors is None or len(vectors) == 0:
+            vectors = np.zeros((0, 0), dtype=np.float32)
+        return cls(data["ids"], vectors, data["metadatas"], data["documents"])
+
+    @classmethod
+    def from_snapshot(cls, path, embedding_model=None, collection="place_collection"):
+        """벡터 스냅샷(vector_snapshot)에서 장소(type=place)만 로드. 임베딩 모델이 다르면 SnapshotError"""
+        from .vector_snapshot import load_collection, read_manifest
+
+        manifest = read_manifest(path, embedding_model)
+        ids, vectors, metadatas, documents = load_collection(path, manifest, collection)
+        rows = [row for row, metadata in enumerate(metadatas) if metadata.get("type") == "place"]
+        if not rows:
+            return cls([], np.zeros((0, 0), dtype=np.float32), [], [])
+        return cls([ids[row] for row in rows], vectors[rows], [metadatas[row] for row in rows], [documents[row] for row in rows])
+
+    def _build_category_matrix(self):
+        category_sets = [place_categories(metadata) for metadata in self.metadatas]
+        names = sorted({category for categories in category_sets for category in categories})
+        column_of = {name: column for column, name in enumerate(names)}
+        matrix = np.zeros((len(self.ids), len(names)), dtype=bool)
+        for row, categories in enumerate(category_sets):
+            matrix[row, [column_of[category] for category in categories]] = True
+        return names, matrix
+
+    def category_mask(self, categories):
+        """카테고리 집합이 categories 중 하나라도 포함하는 장소"""
+        columns = [column for column, name in enumerate(self.category_names) if name in set(categories)]
+        return self.category_matrix[:, columns].any(axis=1)
+
+    def _build_open_bitmap(self):
+        bitmap = np.zeros((len(self.ids), OPEN_SLOTS), dtype=bool)
+        known = np.zeros(len(self.ids), dtype=bool)
+        slot_starts = np.arange(OPEN_SLOTS) * OPEN_SLOT_MINUTES
+
+        for row, metadata in enumerate(self.metadatas):
+            intervals = get_opening_intervals(metadata)
+            if intervals is None:
+                continue
+            known[row] = True
+            for start, end in zip(*intervals):
+                bitmap[row] |= (slot_starts >= start) & (slot_starts < end)
+        return bitmap, known
+
+    def mask(self, where=None, categories=None, open_at: datetime | None = None, include_unknown_hours=False, near=None):
+        """
+        메타데이터 필터 → bool 마스크. 지원하지 않는 where 조건이면 None.
+
+        Args:
+            where: Chroma 형식의 단순 필터 ({"key": 값} 또는 {"key": {"$in": [...]}}).
+            categories: 허용할 카테고리 목록 (장소의 카테고리 집합 중 하나라도 포함되면 통과).
+                where의 "category" 조건도 같은 방식으로 처리합니다.
+            open_at: 이 시각에 영업 중인 장소만 (비트맵 조회).
+            include_unknown_hours: open_at 사용 시 영업시간을 해석하지 못한 장소 포함 여부.
+            near: (위도, 경도, 반경 km) 이내 장소만 (격자 인덱스 조회).
+        """
+        mask = np.ones(len(self.ids), dtype=bool)
+
+        for key, condition in (where or {}).items():
+            if isinstance(condition, dict) and set(condition) != {"$in"}:
+                return None
+            allowed = list(condition["$in"]) if isinstance(condition, dict) else [condition]
+            if key == "category":
+                mask &= self.category_mask(allowed)
+            else:
+                mask &= np.isin(self.column(key), allowed)
+
+        if categories is not None:
+            mask &= self.category_mask(categories)
+
+        if open_at is not None:
+            minute = open_at.weekday() * 24 * 60 + open_at.hour * 60 + open_at.minute
+            open_now = self.open_bitmap[:, minute // OPEN_SLOT_MINUTES]
+            if include_unknown_hours:
+                open_now = open_now | ~self.hours_known
+            mask &= open_now
+
+        if near is not None:
+            nearby = np.zeros(len(self.ids), dtype=bool)
+            nearby[self.grid.within(*near)] = True
+            mask &= nearby
+
+        return mask
+
+    def search_by_vectors(self, query_vectors, k, mask=None):
+        """
+        여러 질의 벡터를 한 번에 검색. 질의별 [(Document, 거리), ...] (가까운 순) 리스트 반환.
+        """
+        queries = np.atleast_2d(np.asarray(query_vectors, dtype=np.float32))
+        if len(self.ids) == 0:
+            return [[] for _ in range(len(queries))]
+
+        # ||q - x||^2 = ||q||^2 + ||x||^2 - 2 q·x  → (Q, N)
+        distances = (
+            np.einsum("ij,ij->i", queries, queries)[:, None]
+            + self.norms[None, :]
+            - 2.0 * queries @ self.vectors.T
+        )
+        if mask is not None:
+            distances[:, ~mask] = np.inf
+
+        k = min(k, len(self.ids) if mask is None else int(mask.sum()))
+        if k <= 0:
+            return [[] for _ in range(len(queries))]
+
+        top = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        results = []
+        for row, candidates in enumerate(top):
+            ordered = candidates[np.argsort(distances[row, candidates])]
+            results.append([
+                (
+                    # 메타데이터는 요청별로 수정(distance 등)되므로 복사본 전달
+                    Document(page_content=self.documents[i], metadata=dict(self.metadatas[i]), id=self.ids[i]),
+                    float(max(distances[row, i], 0.0))
+                )
+                for i in ordered
+            ])
+        return results
+
+
+_place_index_lock = threading.Lock()
+
+# 로드에 실패한 버전의 인덱스를 다시 시도할 때까지 기다리는 시간(초) (그동안은 Chroma 검색)
+PLACE_INDEX_RETRY_SECONDS = 30
+
+
+def load_place_index(version):
+    """
+    벡터 DB 버전(vector_versions.VectorVersion)의 place_collection을 메모리 인덱스로 로드. 실패하면 None.
+    PLACE_INDEX_SNAPSHOT은 버전 관리를 쓰지 않을 때(VECTOR_STORE_ROOT가 비어 있을 때)만 사용합니다.
+    버전 관리를 쓰면 고정된 스냅샷이 버전 교체를 따라가지 못하므로 항상 그 버전의 Chroma에서 로드합니다.
+    """
+    from .openai_chroma_config import embeddings
+    try:
+        if settings.PLACE_INDEX_SNAPSHOT and not settings.VECTOR_STORE_ROOT:
+            place_index = PlaceIndex.from_snapshot(settings.PLACE_INDEX_SNAPSHOT, embedding_model=embeddings.model_name)
+        else:
+            place_index = PlaceIndex.from_chroma(version.stores["place_collection"], where={"type": "place"})
+        logger.info(f"장소 메모리 인덱스 로드 완료 ({version.version}): {len(place_index)}건")
+        return place_index
+    except Exception as e:
+        logger.warning(f"장소 메모리 인덱스 로드 실패 ({version.version}): {str(e)}")
+        return None
+
+
+def get_place_index(version=None):
+    """
+    벡터 DB 버전(기본: 현재 버전)의 장소 메모리 인덱스 (버전마다 한 번 로드해서 재사용).
+    PLACE_INDEX_ENABLED가 False이거나 로드에 실패하면 None (→ Chroma 검색 사용).
+    실패는 저장하지 않고 PLACE_INDEX_RETRY_SECONDS 뒤에 다시 로드합니다.
+    """
+    if not settings.PLACE_INDEX_ENABLED:
+        return None
+    version = version or current_version()
+    if version.place_index is None and time.monotonic() >= version.place_index_retry_at:
+        with _place_index_lock:
+            if version.place_index is None and time.monotonic() >= version.place_index_retry_at:
+                version.place_index = load_place_index(version)
+                if version.place_index is None:
+                    version.place_index_retry_at = time.monotonic() + PLACE_INDEX_RETRY_SECONDS
+    place_index = version.place_index
+    return place_index if place_index is not None and len(place_index) else None
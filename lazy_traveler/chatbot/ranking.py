@@ -0,0 +1,87 @@
+import numpy as np
+from django.conf import settings
+
+# 장소 후보 랭킹: 유사도 / 거리 감쇠 / 평점 / 리뷰 수(log)를 가중합한 점수로 한 번에 정렬합니다.
+# 각 신호는 0~1 범위로 맞춘 뒤 질문 유형별 가중치를 곱해 더합니다.
+
+DEFAULT_RANKING_WEIGHTS = {
+    "place": {"similarity": 0.5, "distance": 0.3, "rating": 0.15, "reviews": 0.05},
+    "schedule": {"similarity": 0.3, "distance": 0.4, "rating": 0.2, "reviews": 0.1},
+}
+SIGNALS = ("similarity", "distance", "rating", "reviews")
+
+# 평점이 없는 장소는 중간 수준 평점으로 취급
+DEFAULT_RATING = 3.5
+MAX_RATING = 5.0
+
+
+def ranking_weights(question_type):
+    """질문 유형별 가중치 (settings.PLACE_RANKING_WEIGHTS 값이 기본값을 덮어씀)"""
+    weights = dict(DEFAULT_RANKING_WEIGHTS.get(question_type, DEFAULT_RANKING_WEIGHTS["place"]))
+    weights.update(settings.PLACE_RANKING_WEIGHTS.get(question_type, {}))
+    return weights
+
+
+def numeric_column(docs, key):
+    """메타데이터 key 값을 float 배열로 ('N/A', None 등 숫자가 아닌 값은 nan)"""
+    values = np.full(len(docs), np.nan, dtype=np.float64)
+    for i, doc in enumerate(docs):
+        try:
+            values[i] = float(doc.metadata.get(key))
+        except (TypeError, ValueError):
+            pass
+    return values
+
+
+def rank_scores(vector_scores, distances_km, ratings, review_counts, question_type="place"):
+    """
+    후보 전체의 랭킹 점수 배열 (높을수록 좋음).
+
+    Args:
+        vector_scores: 벡터 검색 거리 (제곱 L2, 낮을수록 유사). 정규화된 임베딩이면 코사인 = 1 - d/2.
+        distances_km: 사용자 위치에서의 거리(km).
+        ratings: 평점 (없으면 nan).
+        review_counts: 리뷰 수 (없으면 nan).
+        question_type: 가중치를 고를 질문 유형 ("place", "schedule").
+    """
+    vector_scores = np.asarray(vector_scores, dtype=np.float64)
+    if len(vector_scores) == 0:
+        return np.zeros(0, dtype=np.float64)
+
+    # 1️⃣ 유사도: 코사인 유사도를 후보 안에서 0~1로 min-max 정규화
+    cosine = np.clip(1.0 - vector_scores / 2.0, 0.0, 1.0)
+    spread = cosine.max() - cosine.min()
+    similarity = (cosine - cosine.min()) / spread if spread > 0 else np.ones_like(cosine)
+
+    # 2️⃣ 거리 감쇠: exp(-거리 / 기준 거리)
+    distance = np.exp(-np.asarray(distances_km, dtype=np.float64) / settings.PLACE_RANKING_DISTANCE_SCALE_KM)
+
+    # 3️⃣ 평점
+    rating = np.nan_to_num(np.asarray(ratings, dtype=np.float64), nan=DEFAULT_RATING) / MAX_RATING
+
+    # 4️⃣ 리뷰 수: log1p를 후보 중 최댓값으로 나눔
+    reviews = np.log1p(np.nan_to_num(np.asarray(review_counts, dtype=np.float64), nan=0.0).clip(min=0))
+    reviews = reviews / reviews.max() if reviews.max() > 0 else np.zeros_like(reviews)
+
+    weights = ranking_weights(question_type)
+    signals = {"similarity": similarity, "distance": distance, "rating": rating, "reviews": reviews}
+    return sum(weights.get(name, 0.0) * signals[name] for name in SIGNALS)
+
+
+def rank_places(docs, vector_scores, distances_km, question_type="place"):
+    """
+    문서들을 랭킹 점수 내림차순으로 정렬한 [(doc, 점수), ...].
+    점수는 doc.metadata["rank_score"]에도 기록합니다.
+    """
+    scores = rank_scores(
+        vector_scores,
+        distances_km,
+        numeric_column(docs, "rating"),
+        numeric_column(docs, "review_count"),
+        question_type=question_type
+    )
+    for doc, score in zip(docs, scores.tolist()):
+        doc.metadata["rank_score"] = score
+
+    order = np.argsort(-scores, kind="stable")
+    return [(docs[i], float(scores[i])) for i in order]
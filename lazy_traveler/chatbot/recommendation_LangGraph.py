@@ -1,21 +1,30 @@
 from langgraph.graph import StateGraph, END, START
+from langchain_core.callbacks import adispatch_custom_event
+from langchain_core.runnables import RunnableConfig
 from datetime import datetime
 from .prompt import place_prompt
 from typing import TypedDict
 from .utils import (
     get_user_tags,
-    sort_places_by_distance,
+    rank_places_by_preferences,
     schedule_to_html,
-    build_schedule_by_categories_with_preferences,
+    build_alternative_schedules,
     determine_schedule_template,
     get_preferred_tags_by_schedule,
-    classify_question_with_llm,
     format_place_results_to_html,
+    place_result_to_html,
+    schedule_item_to_html,
     filter_open_places_with_llm,
-    search_places,
+    search_place_candidates,
+    search_function_answer,
     fast_search_places_by_preferred_tags
 )
-from .openai_chroma_config import function_vector_store, llm
+from .openai_chroma_config import llm
+from .intent_classifier import classify_question_fast, ALTERNATIVE_SCHEDULE_PATTERN
+from .session_pool import MORE_RESULTS_PATTERN, get_pool, save_pool, next_page, has_pending_schedule
+from .response_cache import cached_response, response_key
+from django.conf import settings
+from .classifier_batcher import classify_question_batched
 
 # ✅ 상태를 정의하는 TypedDict 클래스
 class MyState(TypedDict):
@@ -27,11 +36,52 @@ class MyState(TypedDict):
     longitude: float
     question_type: str  # 추가된 question_type 필드
     timestamp: datetime
+    radius_km: float | None  # 장소 검색 반경 (None이면 PLACE_SEARCH_RADIUS_KM)
+    user_tags: str | None  # 선호 태그 (None이면 username으로 조회, 요청 병합 키와 같은 값을 쓰도록 호출 측에서 전달)
+
+
+# ✅ 스트리밍 모드에서 노드 시작 시 클라이언트로 보내는 진행 단계
+STAGE_LABELS = {
+    "classify_question": "classifying",
+    "handle_function_query": "searching",
+    "handle_place_query": "searching",
+    "handle_place_more": "answering",
+    "handle_schedule_query": "searching",
+    "handle_schedule_alternative": "answering",
+    "handle_unknown_query": "answering",
+}
+
+
+# ✅ 한 번에 보여주는 추천 장소 수
+PLACE_PAGE_SIZE = 3
+
+
+# 스트리밍 중간 이벤트 전송 (astream_events의 on_custom_event로 전달됨, 일반 ainvoke에서는 무시됨)
+async def emit(config: RunnableConfig, name: str, data: dict):
+    await adispatch_custom_event(name, data, config=config)
 
 
 # ✅ 1. 질문 분류 노드
 async def classify_question(state: MyState) -> MyState:
-    question_type = await classify_question_with_llm(state["user_query"])
+    # 후속 질문은 세션 후보 풀에서 바로 응답 (분류/검색/LLM 호출 없음)
+    # - "다른 일정으로 해줘": 만들어 둔 다음 일정 (없으면 아직 쓰지 않은 후보로 새로 구성)
+    # - "더 보여줘": 직전 장소 추천의 다음 페이지
+    follow_up = None
+    if ALTERNATIVE_SCHEDULE_PATTERN.search(state["user_query"]):
+        if has_pending_schedule(await get_pool(state["session_id"], "schedule")):
+            follow_up = ("schedule", "handle_schedule_alternative")
+    elif MORE_RESULTS_PATTERN.search(state["user_query"]):
+        pool = await get_pool(state["session_id"], "place")
+        if pool and len(pool["shown_ids"]) < len(pool["docs"]):
+            follow_up = ("place", "handle_place_more")
+
+    if follow_up:
+        state["question_type"], state["__condition__"] = follow_up
+        state["response"] = ""
+        return state
+
+    # 로컬 분류기로 먼저 분류하고, 확신이 없을 때만 LLM 호출 (동시 요청은 묶어서 호출)
+    question_type = await classify_question_fast(state["user_query"], classify_question_batched)
     
     mapping = {
         "function": "handle_function_query",
@@ -50,11 +100,7 @@ async def classify_question(state: MyState) -> MyState:
 
 # ✅ 2. 기능 질문 처리
 async def handle_function_query(state: MyState) -> MyState:
-    function_results = function_vector_store.similarity_search_with_score(
-        query=state["user_query"],
-        k=1,
-        filter={"type": "qa"}
-    )
+    function_results = await search_function_answer(state["user_query"])
     
     if function_results and function_results[0][1] <= 1.1:
         state["response"] = function_results[0][0].metadata.get("answer", "기능 관련 정보를 찾을 수 없습니다.")
@@ -65,8 +111,37 @@ async def handle_function_query(state: MyState) -> MyState:
 
 
 # ✅ 3. 장소 검색 처리
-async def handle_place_query(state: MyState) -> MyState:
-    place_results = await search_places(state["user_query"], state["latitude"], state["longitude"])
+async def handle_place_query(state: MyState, config: RunnableConfig) -> MyState:
+    # 같은 동네에서 같은 질문이면 응답 캐시 사용 (동시에 놓친 요청은 검색을 한 번만 실행)
+    key = response_key("place", state["user_query"], state["latitude"], state["longitude"], None, radius_km=state.get("radius_km"))
+    candidates = await cached_response(key, lambda: search_place_candidates(
+        state["user_query"], state["latitude"], state["longitude"], radius_km=state.get("radius_km")
+    ))
+    place_results = candidates[:PLACE_PAGE_SIZE]
+
+    # 랭킹된 후보 전체를 세션에 보관 ("더 보여줘" 시 다음 페이지)
+    await save_pool(state["session_id"], "place", {
+        "docs": [doc for doc, _ in candidates],
+        "shown_ids": [doc.metadata.get("place_id") for doc, _ in place_results]
+    })
+    return await respond_with_places(state, config, place_results)
+
+
+# ✅ 3-1. "더 보여줘" 처리 (세션 후보 풀의 다음 페이지)
+async def handle_place_more(state: MyState, config: RunnableConfig) -> MyState:
+    pool = await get_pool(state["session_id"], "place")
+    page = next_page(pool, PLACE_PAGE_SIZE) if pool else []
+    if not page:
+        # 분류 직후 만료된 경우 새로 검색
+        return await handle_place_query(state, config)
+
+    await save_pool(state["session_id"], "place", pool)
+    return await respond_with_places(state, config, [(doc, doc.metadata.get("distance", 0)) for doc in page])
+
+
+async def respond_with_places(state: MyState, config: RunnableConfig, place_results) -> MyState:
+    for doc, _ in place_results[:3]:
+        await emit(config, "chunk", {"html": place_result_to_html(doc)})
     # state["response"] = await format_place_results_to_html(place_results)
     state["response"] = {
     "type": "place",
@@ -77,11 +152,10 @@ async def handle_place_query(state: MyState) -> MyState:
 
 
 # ✅ 4. 일정 스케줄링 처리
-async def handle_schedule_query(state: MyState) -> MyState:
+async def handle_schedule_query(state: MyState, config: RunnableConfig) -> MyState:
     # datetime_input이 주어지지 않으면 현재 시간(now) 사용
     now = state["timestamp"] 
     current_time = now.strftime("%Y-%m-%d %H:%M:%S")
-    start_time = now
 
     schedule_type, schedule_categories = await determine_schedule_template(now)
     if schedule_type == "불가시간":
@@ -89,16 +163,27 @@ async def handle_schedule_query(state: MyState) -> MyState:
         return state
 
 
-    user_tags = await get_user_tags(state["username"])
-    preferred_tag_mapping = await get_preferred_tags_by_schedule(user_tags, schedule_categories)
-    docs = await fast_search_places_by_preferred_tags(state["user_query"], preferred_tag_mapping)
+    user_tags = state.get("user_tags")
+    if user_tags is None:
+        user_tags = await get_user_tags(state["username"])
 
-    sorted_docs = await sort_places_by_distance(docs, state["latitude"], state["longitude"])
-    filtered_docs = await filter_open_places_with_llm(sorted_docs, now)
+    # 같은 동네/시간대/선호 태그에서 같은 질문이면 응답 캐시 사용 (동시에 놓친 요청은 한 번만 계산)
+    key = response_key("schedule", state["user_query"], state["latitude"], state["longitude"], now, user_tags=user_tags)
+    pool = await cached_response(key, lambda: build_schedule_pool(state, config, user_tags, schedule_categories))
 
-    schedule = await build_schedule_by_categories_with_preferences(
-        filtered_docs, schedule_categories, preferred_tag_mapping, start_time
+    # 캐시된 후보는 같은 시간 구간의 다른 요청이 만든 것일 수 있으므로 일정(슬롯 시각)은 요청 시각으로 매번 구성
+    await emit(config, "progress", {"stage": "building schedule"})
+    # 같은 후보 풀에서 서로 다른 일정 여러 개를 한 번에 생성 (첫 번째가 최적 일정)
+    schedules = await build_alternative_schedules(
+        pool["docs"], schedule_categories, pool["preferred_tag_mapping"], now, settings.SCHEDULE_ALTERNATIVES
     )
+    # 캐시된 풀은 여러 요청이 공유하므로 세션별 일정/진행 상태는 새로 만듦
+    pool = {**pool, "start_time": now, "time_context": current_time, "schedules": schedules, "next": 0, "shown_ids": []}
+    schedule = take_next_schedule(pool)
+    await save_pool(state["session_id"], "schedule", pool)
+
+    for place in schedule:
+        await emit(config, "chunk", {"html": schedule_item_to_html(place)})
 
     schedule_text = await schedule_to_html(schedule)
 
@@ -106,12 +191,78 @@ async def handle_schedule_query(state: MyState) -> MyState:
     "type": "schedule",
     "schedule_text": schedule_text,
     "time_context": current_time,
-    "question": state["user_query"]
+    "question": state["user_query"],
+    "alternatives": [await schedule_to_html(alternative) for alternative in schedules[1:]]
 }
 
     return state
 
 
+# 검색 → 랭킹 → 영업시간 확인. 일정을 뺀 세션 후보 풀 형태로 반환 (요청 시각과 무관한 부분만 캐시)
+async def build_schedule_pool(state: MyState, config: RunnableConfig, user_tags, schedule_categories) -> dict:
+    now = state["timestamp"]
+    preferred_tag_mapping = await get_preferred_tags_by_schedule(user_tags, schedule_categories)
+    docs = await fast_search_places_by_preferred_tags(state["user_query"], preferred_tag_mapping)
+
+    sorted_docs = await rank_places_by_preferences(docs, state["latitude"], state["longitude"], question_type="schedule")
+    await emit(config, "progress", {"stage": "checking hours"})
+    filtered_docs = await filter_open_places_with_llm(sorted_docs, now)
+
+    # 영업 확인까지 끝난 후보 ("다른 일정으로 해줘" 시 재사용)
+    open_ids = {doc.metadata.get("place_id") for doc in filtered_docs}
+    return {
+        "docs": filtered_docs,
+        "verdicts": {doc.metadata.get("place_id"): doc.metadata.get("place_id") in open_ids for doc in sorted_docs},
+        "schedule_categories": schedule_categories,
+        "preferred_tag_mapping": preferred_tag_mapping,
+    }
+
+
+def take_next_schedule(pool):
+    schedule = pool["schedules"][pool["next"]]
+    pool["next"] += 1
+    pool["shown_ids"] = pool["shown_ids"] + [place["place_id"] for place in schedule]
+    return schedule
+
+
+# ✅ 4-1. 대안 일정 요청 처리 (세션 후보 풀에서 다음 일정 반환)
+async def handle_schedule_alternative(state: MyState, config: RunnableConfig) -> MyState:
+    pool = await get_pool(state["session_id"], "schedule")
+    if not has_pending_schedule(pool):
+        # 분류 직후 만료된 경우 새로 일정 생성
+        return await handle_schedule_query(state, config)
+
+    if pool["next"] >= len(pool["schedules"]):
+        # 만들어 둔 일정을 모두 보여줬으면 아직 보여주지 않은 후보로 다시 구성
+        shown_ids = set(pool["shown_ids"])
+        remaining = [doc for doc in pool["docs"] if doc.metadata.get("place_id") not in shown_ids]
+        pool["schedules"] = [
+            schedule
+            for schedule in await build_alternative_schedules(
+                remaining, pool["schedule_categories"], pool["preferred_tag_mapping"], pool["start_time"], settings.SCHEDULE_ALTERNATIVES
+            )
+            if schedule
+        ]
+        pool["next"] = 0
+        if not pool["schedules"]:
+            return await handle_schedule_query(state, config)
+
+    schedule = take_next_schedule(pool)
+    await save_pool(state["session_id"], "schedule", pool)
+
+    for place in schedule:
+        await emit(config, "chunk", {"html": schedule_item_to_html(place)})
+
+    state["response"] = {
+    "type": "schedule",
+    "schedule_text": await schedule_to_html(schedule),
+    "time_context": pool["time_context"],
+    "question": state["user_query"],
+    "alternatives": []
+}
+    return state
+
+
 # ✅ 5. 알 수 없는 질문 처리
 async def handle_unknown_query(state: MyState) -> MyState:
     state["response"] = "죄송합니다.😢 기능, 장소, 일정 스케줄링에 대해 문의해 주세요. 😊 예) '회원가입 하는 법', '스케줄링 해줘', '맛집 추천해줘'"
@@ -121,45 +272,29 @@ async def handle_unknown_query(state: MyState) -> MyState:
 def route_condition(state: dict) -> str:
     return state["__condition__"]
 
-async def get_recommendation(
-    user_query: str,
-    session_id: str | None = None,
-    username: str | None = None,
-    latitude: float = 37.5704,
-    longitude: float = 126.9831,
-    timestamp: datetime | None = None) -> str: #####
-
-
-    state: MyState = {
-        "user_query": user_query,
-        "response": "",
-        "session_id": session_id,
-        "username": username,
-        "latitude": latitude if latitude is not None else 37.5704,
-        "longitude": longitude if longitude is not None else 126.9831,
-        "question_type": "",
-        "timestamp": timestamp or datetime(2025, 4, 1, 12, 0, 0) ##### datetime.now()수정
-    }
-
-    # ✅ LangGraph 생성
+# ✅ LangGraph 생성 및 컴파일 (프로세스당 1회)
+def build_graph():
     graph = StateGraph(MyState)
 
     # 📌 노드 추가
     graph.add_node("classify_question", classify_question)
     graph.add_node("handle_function_query", handle_function_query)
     graph.add_node("handle_place_query", handle_place_query)
+    graph.add_node("handle_place_more", handle_place_more)
     graph.add_node("handle_schedule_query", handle_schedule_query)
+    graph.add_node("handle_schedule_alternative", handle_schedule_alternative)
     graph.add_node("handle_unknown_query", handle_unknown_query)
 
-
-# ✅ 분기 설정(condition_key 명시)
+    # ✅ 분기 설정(condition_key 명시)
     graph.add_conditional_edges(
             "classify_question",
             path=route_condition,
             path_map={
                 "handle_function_query": "handle_function_query",
                 "handle_place_query": "handle_place_query",
+                "handle_place_more": "handle_place_more",
                 "handle_schedule_query": "handle_schedule_query",
+                "handle_schedule_alternative": "handle_schedule_alternative",
                 "handle_unknown_query": "handle_unknown_query"
             }
         )
@@ -168,20 +303,94 @@ async def get_recommendation(
     graph.add_edge(START, "classify_question")
     graph.add_edge("handle_function_query", END)
     graph.add_edge("handle_place_query", END)
+    graph.add_edge("handle_place_more", END)
     graph.add_edge("handle_schedule_query", END)
+    graph.add_edge("handle_schedule_alternative", END)
     graph.add_edge("handle_unknown_query", END)
 
     # ✅ 그래프 컴파일
-    compiled_graph = graph.compile()
+    return graph.compile()
+
+
+_compiled_graph = None
+
+def get_compiled_graph():
+    """컴파일된 그래프를 지연 생성 후 재사용 (요청마다 StateGraph를 다시 만들지 않음)"""
+    global _compiled_graph
+    if _compiled_graph is None:
+        _compiled_graph = build_graph()
+    return _compiled_graph
 
-    # ✅ 그래프를 YAML 파일로 저장 (옵션)
-    # compiled_graph.save("chatbot_graph.yaml")
 
-    # ✅ 실행
-    result = await compiled_graph.ainvoke(state)
+def build_state(user_query, session_id, username, latitude, longitude, timestamp, radius_km=None, user_tags=None) -> MyState:
+    return {
+        "user_query": user_query,
+        "response": "",
+        "session_id": session_id,
+        "username": username,
+        "latitude": latitude if latitude is not None else 37.5704,
+        "longitude": longitude if longitude is not None else 126.9831,
+        "question_type": "",
+        "timestamp": timestamp or datetime(2025, 4, 1, 12, 0, 0), ##### datetime.now()수정
+        "radius_km": radius_km,
+        "user_tags": user_tags
+    }
+
 
+def to_result(result: dict) -> dict:
     return {
     "user_query": result["user_query"],
     "response": result["response"],
     "question_type": result.get("question_type", "unknown")
-}
\ No newline at end of file
+}
+
+
+async def get_recommendation(
+    user_query: str,
+    session_id: str | None = None,
+    username: str | None = None,
+    latitude: float = 37.5704,
+    longitude: float = 126.9831,
+    timestamp: datetime | None = None, #####
+    radius_km: float | None = None,
+    user_tags: str | None = None) -> str:
+
+    state = build_state(user_query, session_id, username, latitude, longitude, timestamp, radius_km, user_tags)
+
+    # ✅ 실행 (그래프는 재사용, 요청별 상태만 전달)
+    result = await get_compiled_graph().ainvoke(state)
+
+    return to_result(result)
+
+
+async def stream_recommendation(
+    user_query: str,
+    session_id: str | None = None,
+    username: str | None = None,
+    latitude: float = 37.5704,
+    longitude: float = 126.9831,
+    timestamp: datetime | None = None,
+    radius_km: float | None = None,
+    user_tags: str | None = None):
+    """
+    get_recommendation의 스트리밍 버전.
+    그래프 실행 중 (event, data) 튜플을 순서대로 yield 합니다.
+    - ("progress", {"stage": ...}): 노드/단계 진행 상황
+    - ("chunk", {"html": ...}): 장소/일정 html 블록
+    - ("final", {...}): get_recommendation과 동일한 최종 결과 (항상 마지막)
+    """
+    state = build_state(user_query, session_id, username, latitude, longitude, timestamp, radius_km, user_tags)
+    result = None
+
+    async for event in get_compiled_graph().astream_events(state, version="v2"):
+        kind = event["event"]
+        name = event["name"]
+
+        if kind == "on_chain_start" and event["metadata"].get("langgraph_node") == name and name in STAGE_LABELS:
+            yield "progress", {"stage": STAGE_LABELS[name]}
+        elif kind == "on_custom_event":
+            yield name, event["data"]
+        elif kind == "on_chain_end" and not event["parent_ids"]:
+            result = event["data"]["output"]
+
+    yield "final", to_result(result)
@@ -13,10 +13,21 @@ from .utils import (
     classify_question_with_llm,
     format_place_results_to_html,
     filter_open_places_with_llm,
-    search_places
+    search_places,
+    search_function_answer
     )
-from .openai_chroma_config import function_vector_store, llm
+from .openai_chroma_config import llm, embeddings
+from .semantic_cache import SemanticLLMCache, cached_llm_response
+from .response_cache import geo_cell, time_bucket
+from django.conf import settings
 
+# ✅ 일정 안내 LLM 응답 캐시 (같은 일정 데이터 + 비슷한 질문이면 LLM 재호출 없음)
+schedule_response_cache = SemanticLLMCache(
+    embeddings,
+    maxsize=settings.SEMANTIC_CACHE_SIZE,
+    ttl=settings.SEMANTIC_CACHE_TTL,
+    threshold=settings.SEMANTIC_CACHE_THRESHOLD
+) if settings.SEMANTIC_CACHE_ENABLED else None
 
 
 async def get_recommendation(user_query, session_id=None, username=None, latitude=None, longitude=None):
@@ -32,11 +43,7 @@ async def get_recommendation(user_query, session_id=None, username=None, latitud
     question_type = await classify_question_with_llm(user_query)
 
     if question_type == "function":
-        function_results = function_vector_store.similarity_search_with_score(
-            query=user_query,
-            k=1,
-            filter={"type":"qa" }
-        )
+        function_results = await search_function_answer(user_query)
         # print("function_results[0][1]:",function_results[0][1])
         if not function_results or function_results[0][1] > 1.1:
             return "기능 관련 정보를 찾을 수 없습니다."
@@ -108,13 +115,22 @@ async def get_recommendation(user_query, session_id=None, username=None, latitud
     # ✅ LLM 모델 설정
     chain = place_prompt | llm
 
-    # LLM 호출
-    result = await chain.ainvoke({
-        "context": context,
-        "location_context": f"현재 사용자의 위치는 위도 {latitude}, 경도 {longitude}입니다.",
-        "time_context": f"현재 시간은 {current_time}입니다.",
-        "question": user_query
-    })
-    # print("result:", result)
+    # LLM 호출 (프롬프트 맥락이 같고 질문이 비슷하면 캐시된 응답 사용)
+    # 맥락 = 이 세션의 대화 기록 + 일정 데이터, 위치 격자 칸, 시간 구간: 다른 사용자의 대화 기록으로
+    # 만들어진 응답이 재사용되지 않도록 프롬프트에 들어가는 값을 모두 키에 포함
+    prompt_payload = "\0".join([context, geo_cell(latitude, longitude), time_bucket(now)])
+    response = await cached_llm_response(
+        schedule_response_cache,
+        chain,
+        {
+            "context": context,
+            "location_context": f"현재 사용자의 위치는 위도 {latitude}, 경도 {longitude}입니다.",
+            "time_context": f"현재 시간은 {current_time}입니다.",
+            "question": user_query
+        },
+        payload=prompt_payload,
+        question=user_query
+    )
+    # print("result:", response)
 
-    return result.content.strip() if result.content else "추천을 제공할 수 없습니다."
\ No newline at end of file
+    return response or "추천을 제공할 수 없습니다."
\ No newline at end of file
@@ -0,0 +1,91 @@
+import hashlib
+import logging
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .embedding_cache import normalize_text
+from .intent_classifier import ALTERNATIVE_SCHEDULE_PATTERN
+from .recommendation_LangGraph import get_recommendation
+from .response_cache import geo_cell, tag_fingerprint, time_bucket
+from .session_pool import MORE_RESULTS_PATTERN, get_pool, save_pool
+from .singleflight import SingleFlight
+from .utils import get_user_tags
+
+logger = logging.getLogger(__name__)
+
+# 같은 질문이 동시에 여러 번 들어오면(중복 전송, UI 예시 문구) 그래프를 한 번만 실행하고 결과를 나눠 받습니다.
+# 키는 정규화된 질문 + 답에 영향을 주는 맥락(위경도 격자 칸, 시간 구간, 선호 태그, 검색 반경)이며,
+# 세션 후보 풀을 쓰는 후속 질문("더 보여줘" 등)은 세션마다 답이 다르므로 세션 ID도 키에 넣습니다.
+
+_singleflight = SingleFlight("request_coalescing")
+
+
+def request_key(user_query, session_id, latitude, longitude, timestamp, user_tags, radius_km):
+    follow_up = ALTERNATIVE_SCHEDULE_PATTERN.search(user_query) or MORE_RESULTS_PATTERN.search(user_query)
+    parts = [
+        normalize_text(user_query),
+        geo_cell(latitude if latitude is not None else 37.5704, longitude if longitude is not None else 126.9831),
+        time_bucket(timestamp),
+        tag_fingerprint(user_tags),
+        "" if radius_km is None else f"{float(radius_km):g}",
+        (session_id or "") if follow_up else "",
+    ]
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+async def copy_session_pool(source_session_id, target_session_id, kind):
+    """함께 기다린 요청의 세션에도 실행한 요청의 후보 풀을 복사 (이후 "더 보여줘" 등에 사용)"""
+    if not target_session_id or source_session_id == target_session_id or kind not in ("place", "schedule"):
+        return
+    pool = await get_pool(source_session_id, kind)
+    if pool is not None:
+        await save_pool(target_session_id, kind, dict(pool))
+
+
+async def coalesced_recommendation(
+    user_query: str,
+    session_id: str | None = None,
+    username: str | None = None,
+    latitude: float = 37.5704,
+    longitude: float = 126.9831,
+    timestamp: datetime | None = None,
+    radius_km: float | None = None,
+    user_tags: str | None = None) -> dict:
+    """
+    get_recommendation과 같은 결과. 동시에 들어온 같은 요청은 한 번만 실행합니다.
+    REQUEST_COALESCING_SHARED가 True면 Django 캐시(Redis) 락으로 다른 워커의 같은 요청도 합칩니다.
+
+    Args:
+        user_tags: 선호 태그 (ChatConsumer가 연결 시 불러온 사용자 정보의 태그). None이면 username으로 조회합니다.
+            키와 그래프 실행에 같은 값을 써서, 병합된 요청끼리 다른 태그로 계산한 결과를 받지 않도록 합니다.
+    """
+    if not settings.REQUEST_COALESCING_ENABLED:
+        return await get_recommendation(user_query, session_id, username, latitude, longitude, timestamp, radius_km, user_tags)
+
+    if user_tags is None:
+        user_tags = await get_user_tags(username) if username else ""
+    key = request_key(user_query, session_id, latitude, longitude, timestamp, user_tags, radius_km)
+    result_key = f"request_coalescing:result:{key}"
+
+    async def run():
+        result = await get_recommendation(user_query, session_id, username, latitude, longitude, timestamp, radius_km, user_tags)
+        outcome = {"result": result, "session_id": session_id}
+        if settings.REQUEST_COALESCING_SHARED:
+            try:
+                # 기다리는 다른 워커가 가져갈 수 있게 잠깐 보관
+                await cache.aset(result_key, outcome, timeout=settings.REQUEST_COALESCING_RESULT_TTL)
+            except Exception as e:
+                logger.warning(f"요청 병합 결과 저장 실패: {str(e)}")
+        return outcome
+
+    if settings.REQUEST_COALESCING_SHARED:
+        outcome = await _singleflight.do_distributed(
+            key, run, lambda: cache.aget(result_key), lock_timeout=settings.REQUEST_COALESCING_LOCK_TIMEOUT
+        )
+    else:
+        outcome = await _singleflight.do(key, run)
+
+    await copy_session_pool(outcome["session_id"], session_id, outcome["result"].get("question_type"))
+    return outcome["result"]
@@ -0,0 +1,107 @@
+import hashlib
+import math
+import time
+
+from django.conf import settings
+
+from . import metrics
+from .caches import LRUCache, MISSING, TieredCache
+from .embedding_cache import normalize_text
+from .geo import KM_PER_DEGREE_LAT
+from .singleflight import SingleFlight
+
+# 장소/일정 응답 캐시. 같은 동네(위경도 격자 칸), 같은 시간대, 같은 선호 태그에서
+# 같은 질문이 들어오면 검색/영업시간 확인 없이 저장된 응답을 돌려줍니다.
+# 거리 등은 처음 계산한 사용자 위치 기준이므로 격자 칸 크기만큼 차이가 날 수 있습니다.
+# 일정은 영업 확인까지 끝난 후보만 캐시하고, 슬롯 시각이 요청 시각에 따라 달라지므로 일정 구성은 요청마다 합니다.
+
+response_cache = TieredCache(
+    "response_cache",
+    maxsize=settings.RESPONSE_CACHE_SIZE,
+    ttl=settings.RESPONSE_CACHE_TTL,
+    shared=settings.RESPONSE_CACHE_SHARED
+)
+_singleflight = SingleFlight("response_cache")
+
+# 키별 적중 수/절약한 시간 (상위 항목만 지표로 노출)
+_savings = LRUCache(maxsize=1000)
+
+metrics.RATIOS["response_cache.hit_ratio"] = ("response_cache.served", "response_cache.lookup")
+metrics.register_gauge("response_cache.top_saved", lambda: top_savings(20))
+
+
+def geo_cell(latitude, longitude, cell_km=None):
+    """위경도를 cell_km 크기 격자 칸 번호로 양자화"""
+    cell_km = cell_km or settings.RESPONSE_CACHE_CELL_KM
+    cell_lat = cell_km / KM_PER_DEGREE_LAT
+    cell_lon = cell_km / (KM_PER_DEGREE_LAT * math.cos(math.radians(float(latitude))))
+    return f"{math.floor(float(latitude) / cell_lat)}:{math.floor(float(longitude) / cell_lon)}"
+
+
+def time_bucket(when, bucket_minutes=None):
+    """날짜 + 하루 중 bucket_minutes 단위 구간 번호 (요일별 영업시간이 달라 날짜까지 포함). 시간과 무관한 응답은 when=None"""
+    if when is None:
+        return ""
+    bucket_minutes = bucket_minutes or settings.RESPONSE_CACHE_BUCKET_MINUTES
+    return f"{when:%Y%m%d}:{(when.hour * 60 + when.minute) // bucket_minutes}"
+
+
+def tag_fingerprint(user_tags):
+    """태그 순서/공백과 무관한 선호 태그 지문"""
+    tags = sorted({tag.strip() for tag in (user_tags or "").split(",") if tag.strip()})
+    return hashlib.sha1(",".join(tags).encode("utf-8")).hexdigest()[:12]
+
+
+def response_key(kind, user_query, latitude, longitude, when, user_tags=None, radius_km=None):
+    parts = [
+        kind,
+        normalize_text(user_query),
+        geo_cell(latitude, longitude),
+        time_bucket(when),
+        tag_fingerprint(user_tags),
+        "" if radius_km is None else f"{float(radius_km):g}",
+    ]
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+def _record_saving(key, elapsed_ms):
+    metrics.incr("response_cache.saved_ms", int(elapsed_ms))
+    saving = _savings.get(key) or {"hits": 0, "saved_ms": 0.0}
+    _savings.set(key, {"hits": saving["hits"] + 1, "saved_ms": saving["saved_ms"] + elapsed_ms})
+
+
+def top_savings(count):
+    """절약한 시간이 큰 순서의 키별 {key, hits, saved_ms}"""
+    return sorted(
+        ({"key": key[:16], **saving} for key, saving in _savings.items()),
+        key=lambda saving: saving["saved_ms"],
+        reverse=True
+    )[:count]
+
+
+async def cached_response(key, compute):
+    """
+    key의 저장된 응답을 돌려주고, 없으면 compute()(async)로 만들어 저장.
+    동시에 같은 키를 놓친 요청들은 compute를 한 번만 실행합니다 (RESPONSE_CACHE_SHARED면 워커 간에도).
+    """
+    metrics.incr("response_cache.lookup")
+    entry = await response_cache.aget(key, MISSING)
+    if entry is not MISSING:
+        metrics.incr("response_cache.served")
+        _record_saving(key, entry["elapsed_ms"])
+        return entry["value"]
+
+    async def compute_and_store():
+        start = time.perf_counter()
+        value = await compute()
+        await response_cache.aset(key, {"value": value, "elapsed_ms": (time.perf_counter() - start) * 1000})
+        return value
+
+    if settings.RESPONSE_CACHE_SHARED:
+        async def lookup():
+            # 다른 워커의 결과를 기다리며 반복 조회하므로 적중/미스로 집계하지 않음
+            entry = await response_cache.aget(key, record=False)
+            return entry["value"] if entry else None
+
+        return await _singleflight.do_distributed(key, compute_and_store, lookup, lock_timeout=settings.RESPONSE_CACHE_LOCK_TIMEOUT)
+    return await _singleflight.do(key, compute_and_store)
@@ -0,0 +1,175 @@
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+
+from .geo import coordinates_of, haversine_matrix_km
+from .opening_hours import get_opening_intervals, is_open_at
+from .ranking import DEFAULT_RATING, MAX_RATING, numeric_column
+from .vector_ingest import place_categories
+
+# 일정 슬롯 배정: 슬롯별 후보를 카테고리로 한 번만 색인한 뒤,
+# (선호도 + 평점 + 슬롯 시각 영업 여부) - 이동 거리 를 최대화하는 조합을 찾습니다.
+# 슬롯마다 상위 후보 몇 곳만 남기고 모든 조합을 numpy로 한 번에 평가합니다 (슬롯 4개 x 후보 6곳 = 1,296가지).
+
+DEFAULT_SCHEDULE_WEIGHTS = {
+    "preference": 1.0,  # 검색 랭킹 점수 (rank_score)
+    "rating": 0.5,      # 평점 / 5
+    "open": 2.0,        # 해당 슬롯 시각에 영업 중이면 1
+    "walk_km": 0.3,     # 사용자 위치 → 첫 장소 → ... → 마지막 장소 이동 거리(km)
+}
+
+
+def schedule_weights():
+    weights = dict(DEFAULT_SCHEDULE_WEIGHTS)
+    weights.update(settings.SCHEDULE_WEIGHTS)
+    return weights
+
+
+def matches_tags(categories, tags):
+    """장소 카테고리 중 하나라도 태그를 포함하는지 (예: "베트남 음식" ⊇ "베트남 음식")"""
+    return any(tag in category for category in categories for tag in tags)
+
+
+def slot_times(start_time, count):
+    """슬롯 i의 시작 시각 (start_time + i시간)"""
+    return [start_time + timedelta(hours=i) for i in range(count)]
+
+
+class ScheduleProblem:
+    """
+    일정 슬롯 배정 문제.
+
+    Args:
+        places: 후보 장소 문서 (랭킹 순으로 정렬된 상태).
+        schedule_categories: 슬롯별 일정 카테고리 (예: ["맛집", "볼거리", "카페", "볼거리"]).
+        preferred_tag_mapping: 일정 카테고리 → 허용 세부 카테고리 태그.
+        start_time: 첫 슬롯 시각.
+        slot_candidates: 슬롯별로 남길 상위 후보 수.
+    """
+
+    def __init__(self, places, schedule_categories, preferred_tag_mapping, start_time, slot_candidates=None):
+        self.places = places
+        self.schedule_categories = schedule_categories
+        self.preferred_tag_mapping = preferred_tag_mapping
+        self.times = slot_times(start_time, len(schedule_categories))
+        self.weights = schedule_weights()
+        slot_candidates = slot_candidates or settings.SCHEDULE_SLOT_CANDIDATES
+
+        # 1️⃣ 카테고리 집합별로 한 번만 태그 매칭 (여러 카테고리에 속한 장소는 그중 하나만 맞아도 후보)
+        rows_by_categories = {}
+        for row, place in enumerate(places):
+            rows_by_categories.setdefault(tuple(place_categories(place.metadata)), []).append(row)
+
+        # 2️⃣ 장소별 공통 점수 (선호도 + 평점)
+        count = len(places)
+        preference = numeric_column(places, "rank_score")
+        order_preference = 1.0 - np.arange(count) / max(count, 1)  # 랭킹 점수가 없으면 입력 순서 사용
+        preference = np.where(np.isnan(preference), order_preference, preference)
+        rating = np.nan_to_num(numeric_column(places, "rating"), nan=DEFAULT_RATING) / MAX_RATING
+        base_value = self.weights["preference"] * preference + self.weights["rating"] * rating
+        intervals = [get_opening_intervals(place.metadata) for place in places]
+
+        # 3️⃣ 슬롯별 후보와 점수 (영업 여부는 슬롯 시각 기준, 해석 불가한 영업시간은 이미 검사를 통과한 것으로 간주)
+        self.slot_rows = []
+        self.slot_values = []
+        for category, when in zip(schedule_categories, self.times):
+            tags = preferred_tag_mapping.get(category, [])
+            rows = np.array(sorted(
+                row
+                for category_set, category_rows in rows_by_categories.items()
+                if matches_tags(category_set, tags)
+                for row in category_rows
+            ), dtype=np.int64)
+            values = np.zeros(0, dtype=np.float64)
+            if len(rows):
+                open_at_slot = np.array([
+                    1.0 if intervals[row] is None or is_open_at(intervals[row], when) else 0.0 for row in rows
+                ])
+                values = base_value[rows] + self.weights["open"] * open_at_slot
+                top = np.argsort(-values, kind="stable")[:slot_candidates]
+                rows, values = rows[top], values[top]
+            self.slot_rows.append(rows)
+            self.slot_values.append(values)
+
+        # 4️⃣ 후보 간 이동 거리 행렬 (사용자 위치 → 장소 거리는 metadata["distance"])
+        if count:
+            latitudes, longitudes = coordinates_of(places)
+            self.distance_matrix = haversine_matrix_km(latitudes, longitudes, latitudes, longitudes)
+        else:
+            self.distance_matrix = np.zeros((0, 0), dtype=np.float64)
+        self.origin_distances = np.nan_to_num(numeric_column(places, "distance"), nan=0.0)
+
+    def _combinations(self, max_combinations):
+        """후보가 있는 슬롯들의 (슬롯 번호, 조합 행 배열 (C, S), 조합 점수 (C,))"""
+        slots = [i for i, rows in enumerate(self.slot_rows) if len(rows)]
+        if not slots:
+            return slots, np.zeros((0, 0), dtype=np.int64), np.zeros(0)
+
+        # 조합 수가 상한을 넘으면 슬롯별 후보 수를 줄임
+        limit = max(len(self.slot_rows[i]) for i in slots)
+        while limit > 1 and np.prod([min(len(self.slot_rows[i]), limit) for i in slots]) > max_combinations:
+            limit -= 1
+
+        positions = np.stack(np.meshgrid(
+            *[np.arange(min(len(self.slot_rows[i]), limit)) for i in slots], indexing="ij"
+        ), axis=-1).reshape(-1, len(slots))
+        rows = np.stack([self.slot_rows[i][positions[:, s]] for s, i in enumerate(slots)], axis=1)
+        values = sum(self.slot_values[i][positions[:, s]] for s, i in enumerate(slots))
+
+        # 같은 장소를 두 번 방문하는 조합 제외
+        ordered = np.sort(rows, axis=1)
+        distinct = (ordered[:, 1:] != ordered[:, :-1]).all(axis=1)
+        rows, values = rows[distinct], values[distinct]
+
+        walk = self.origin_distances[rows[:, 0]]
+        for s in range(1, len(slots)):
+            walk = walk + self.distance_matrix[rows[:, s - 1], rows[:, s]]
+        return slots, rows, values - self.weights["walk_km"] * walk
+
+    def solve(self, max_combinations=None):
+        """최적 배정 [(슬롯 번호, 장소 행), ...]. 후보가 없는 슬롯은 건너뜀"""
+        return self.solve_many(1, max_combinations=max_combinations)[0]
+
+    def solve_many(self, count, max_shared=None, max_combinations=None):
+        """
+        점수 순으로 서로 다른 배정 최대 count개 (첫 번째가 최적 배정).
+        먼저 고른 배정들과 겹치는 장소가 max_shared곳 이하인 조합만 다음 후보로 채택합니다.
+        """
+        max_shared = settings.SCHEDULE_ALTERNATIVE_MAX_SHARED if max_shared is None else max_shared
+        slots, rows, scores = self._combinations(max_combinations or settings.SCHEDULE_MAX_COMBINATIONS)
+        if len(scores) == 0:
+            # 후보가 모자라 중복 없는 조합이 없으면 기존 방식으로 채울 수 있는 슬롯만 채움
+            return [greedy_assignment(self.places, self.schedule_categories, self.preferred_tag_mapping)]
+
+        # 후보 풀이 작아 count개를 못 채우면 겹침 허용치를 늘려가며 채움 (장소 구성이 완전히 같은 일정은 제외)
+        order = np.argsort(-scores, kind="stable")
+        chosen = {}
+        chosen_sets = []
+        for allowed in range(max_shared, max(len(slots), max_shared + 1)):
+            for index in order:
+                if len(chosen) >= count:
+                    break
+                place_rows = set(rows[index].tolist())
+                if index not in chosen and all(len(place_rows & other) <= allowed for other in chosen_sets):
+                    chosen[index] = list(zip(slots, rows[index].tolist()))
+                    chosen_sets.append(place_rows)
+        return list(chosen.values())
+
+
+def greedy_assignment(places, schedule_categories, preferred_tag_mapping):
+    """
+    기존 방식(슬롯마다 정렬된 후보를 처음부터 훑어 첫 매칭 선택)의 배정 결과. 비교/벤치마크용.
+    """
+    assignment = []
+    used_place_ids = set()
+    for i, category in enumerate(schedule_categories):
+        tags = preferred_tag_mapping.get(category, [])
+        for row, place in enumerate(places):
+            if place.metadata.get("place_id") in used_place_ids:
+                continue
+            if matches_tags(place_categories(place.metadata), tags):
+                assignment.append((i, row))
+                used_place_ids.add(place.metadata.get("place_id"))
+                break
+    return assignment
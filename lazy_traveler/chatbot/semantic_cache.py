@@ -0,0 +1,99 @@
+import hashlib
+import logging
+
+import numpy as np
+from django.conf import settings
+
+from . import metrics
+from .caches import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# 일정 안내 LLM 응답의 의미 기반 캐시.
+# 질문 외의 프롬프트 맥락(payload: 대화 기록 + 일정 데이터, 위치 격자 칸, 시간 구간)이 완전히 같고,
+# 질문 임베딩의 코사인 유사도가 임계값 이상이면 LLM을 다시 호출하지 않고 이전 응답을 재사용합니다.
+# payload에 대화 기록이 들어가므로 한 사용자의 기록으로 만든 응답이 다른 사용자에게 재사용되지 않습니다.
+
+# 같은 맥락에 대해 보관할 최대 질문 수
+MAX_QUESTIONS_PER_PAYLOAD = 8
+
+metrics.RATIOS["semantic_cache.hit_ratio"] = ("semantic_cache.hit", "semantic_cache.lookup")
+
+
+def payload_key(payload):
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SemanticLLMCache:
+    """
+    프롬프트 맥락(payload) 해시 → [(질문 임베딩, 응답, 사용 토큰 수), ...].
+
+    Args:
+        embeddings: 질문 임베딩 모델 (CachedEmbeddings).
+        maxsize: 보관할 최대 맥락 수.
+        ttl: 항목 유효 시간(초).
+        threshold: 재사용할 최소 질문 코사인 유사도.
+    """
+
+    def __init__(self, embeddings, maxsize=512, ttl=3600, threshold=0.92):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.entries = LRUCache(maxsize=maxsize, ttl=ttl)
+
+    async def lookup(self, payload, question):
+        """(캐시된 응답 또는 None, 질문 임베딩 또는 None). 같은 맥락이 없으면 임베딩하지 않음"""
+        metrics.incr("semantic_cache.lookup")
+        candidates = self.entries.get(payload_key(payload))
+        if not candidates:
+            metrics.incr("semantic_cache.miss")
+            return None, None
+
+        vector = np.asarray(await self.embeddings.aembed_query(question), dtype=np.float32)
+        matrix = np.stack([candidate_vector for candidate_vector, _, _ in candidates])
+        similarities = matrix @ vector / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(vector) + 1e-12)
+        best = int(np.argmax(similarities))
+
+        if similarities[best] >= self.threshold:
+            _, response, tokens = candidates[best]
+            metrics.incr("semantic_cache.hit")
+            metrics.incr("semantic_cache.tokens_saved", tokens)
+            return response, vector
+
+        metrics.incr("semantic_cache.miss")
+        return None, vector
+
+    async def store(self, payload, question, response, tokens, vector=None):
+        if vector is None:
+            vector = np.asarray(await self.embeddings.aembed_query(question), dtype=np.float32)
+
+        key = payload_key(payload)
+        candidates = list(self.entries.get(key) or [])
+        candidates.append((vector, response, tokens))
+        self.entries.set(key, candidates[-MAX_QUESTIONS_PER_PAYLOAD:])
+
+
+async def cached_llm_response(cache, chain, inputs, payload, question):
+    """
+    chain.ainvoke(inputs)의 응답 내용을 의미 기반 캐시와 함께 반환.
+    캐시를 끈 경우(cache가 None)에는 항상 LLM을 호출합니다.
+    """
+    vector = None
+    if cache is not None:
+        try:
+            response, vector = await cache.lookup(payload, question)
+        except Exception as e:
+            logger.warning(f"의미 기반 캐시 조회 실패: {str(e)}")
+            response = None
+        if response is not None:
+            return response
+
+    result = await chain.ainvoke(inputs)
+    response = result.content.strip() if result.content else ""
+
+    if cache is not None and response:
+        tokens = (getattr(result, "usage_metadata", None) or {}).get("total_tokens", 0)
+        try:
+            await cache.store(payload, question, response, tokens, vector=vector)
+        except Exception as e:
+            logger.warning(f"의미 기반 캐시 저장 실패: {str(e)}")
+    return response
@@ -0,0 +1,101 @@
+import logging
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import metrics
+from .caches import LRUCache
+from .intent_classifier import FOLLOW_UP_ENDING
+
+logger = logging.getLogger(__name__)
+
+# 세션별 직전 후보 풀. 같은 세션의 후속 질문("더 보여줘", "다른 일정으로 해줘")은
+# 임베딩/Chroma/영업시간 확인 없이 이 풀에서 다음 결과를 만듭니다.
+#
+# 장소 풀 ("place"): {"docs": 랭킹 순 Document 목록(metadata["distance"] 포함), "shown_ids": [...]}
+# 일정 풀 ("schedule"): {"docs": 영업 중으로 확인된 Document 목록, "verdicts": {place_id: bool},
+#                       "schedule_categories", "preferred_tag_mapping", "start_time", "time_context",
+#                       "schedules": 만들어 둔 일정들, "next": 다음에 보여줄 일정 번호, "shown_ids": [...]}
+
+# 직전 장소 추천의 다음 결과를 요청하는 질문 (예: "더 보여줘", "다음 장소 보여줘").
+# 문장 전체에 맞춰서 "카페 또 추천해줘"처럼 장소/카테고리 단어가 붙은 질문은 새 검색으로 처리합니다.
+MORE_RESULTS_PATTERN = re.compile(
+    r"^\s*(다른\s*(곳|거|데)\s*)?(더|또|다음)\s*(거|것|곳|장소|데|페이지|결과)?" + FOLLOW_UP_ENDING
+)
+
+_pools = LRUCache(
+    maxsize=settings.SESSION_POOL_MAX_ENTRIES,
+    ttl=settings.SESSION_POOL_TTL,
+    max_bytes=settings.SESSION_POOL_MAX_BYTES
+)
+metrics.register_gauge("session_pool", lambda: {"entries": len(_pools), "bytes": _pools.bytes})
+
+
+def _key(session_id, kind):
+    return f"session_pool:{kind}:{session_id}"
+
+
+async def get_pool(session_id, kind):
+    """세션의 kind("place" | "schedule") 후보 풀. 없거나 만료됐으면 None"""
+    if not session_id:
+        return None
+
+    key = _key(session_id, kind)
+    pool = _pools.get(key)
+    if pool is None and settings.SESSION_POOL_SHARED:
+        # 다른 워커에서 만든 풀 (Redis)
+        try:
+            pool = await cache.aget(key)
+        except Exception as e:
+            logger.warning(f"세션 후보 풀 공유 캐시 조회 실패: {str(e)}")
+        if pool is not None:
+            _pools.set(key, pool)
+
+    metrics.incr("session_pool.lookup")
+    metrics.incr("session_pool.hit" if pool is not None else "session_pool.miss")
+    return pool
+
+
+async def save_pool(session_id, kind, pool):
+    """후보 풀 저장 (shown_ids 등을 바꾼 뒤에도 다시 호출)"""
+    if not session_id:
+        return
+
+    key = _key(session_id, kind)
+    _pools.set(key, pool)
+    if settings.SESSION_POOL_SHARED:
+        try:
+            await cache.aset(key, pool, timeout=settings.SESSION_POOL_TTL)
+        except Exception as e:
+            logger.warning(f"세션 후보 풀 공유 캐시 저장 실패: {str(e)}")
+
+
+async def clear_pools(session_id):
+    """세션의 모든 후보 풀 삭제 (새 세션 시작 등)"""
+    for kind in ("place", "schedule"):
+        key = _key(session_id, kind)
+        _pools.delete(key)
+        if settings.SESSION_POOL_SHARED:
+            try:
+                await cache.adelete(key)
+            except Exception as e:
+                logger.warning(f"세션 후보 풀 공유 캐시 삭제 실패: {str(e)}")
+
+
+def next_page(pool, page_size):
+    """장소 풀에서 아직 보여주지 않은 다음 page_size개 (shown_ids 갱신)"""
+    shown_ids = set(pool["shown_ids"])
+    page = [doc for doc in pool["docs"] if doc.metadata.get("place_id") not in shown_ids][:page_size]
+    pool["shown_ids"] = pool["shown_ids"] + [doc.metadata.get("place_id") for doc in page]
+    return page
+
+
+def has_pending_schedule(pool):
+    """만들어 둔 일정이 남았거나, 아직 일정에 쓰지 않은 후보가 있는지"""
+    if pool is None:
+        return False
+    if pool["next"] < len(pool["schedules"]):
+        return True
+    shown_ids = set(pool["shown_ids"])
+    return any(doc.metadata.get("place_id") not in shown_ids for doc in pool["docs"])
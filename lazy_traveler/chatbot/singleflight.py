@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import time
+
+from django.core.cache import cache
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    같은 키로 동시에 들어온 작업을 한 번만 실행하고, 나머지는 그 결과를 함께 기다리게 합니다.
+    워커 안에서는 실행 중인 Task를 공유하고, lock_timeout을 주면 Django 캐시(Redis)의 add를
+    분산 락으로 써서 다른 워커의 같은 작업도 기다리게 할 수 있습니다 (Django 캐시 async API 사용).
+    합쳐진 요청 수는 metrics에 "<name>.coalesced"로 집계됩니다.
+
+    Args:
+        name: 지표 이름, 분산 락 키 접두사.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._inflight = {}
+
+    async def do(self, key, func):
+        """func()(인자 없는 async 함수)를 key당 한 번만 실행하고 결과를 공유"""
+        task = self._inflight.get(key)
+        if task is not None:
+            metrics.incr(f"{self.name}.coalesced")
+            return await asyncio.shield(task)
+
+        task = asyncio.ensure_future(func())
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # 요청한 쪽이 취소돼도 기다리는 다른 요청을 위해 작업은 계속 실행
+        return await asyncio.shield(task)
+
+    async def do_distributed(self, key, func, lookup, lock_timeout=30, wait_timeout=10, poll_interval=0.05):
+        """
+        여러 워커에 걸친 singleflight.
+        락을 얻은 워커만 func()를 실행하고(func가 결과를 공유 저장소에 저장), 나머지 워커는
+        lookup()이 결과를 돌려줄 때까지 기다립니다. 락이 풀렸거나 wait_timeout이 지나면 직접 실행합니다.
+
+        Args:
+            key: 작업 키.
+            func: 결과를 만들고 공유 저장소에 저장하는 async 함수.
+            lookup: 공유 저장소에서 결과를 찾는 async 함수 (없으면 None).
+            lock_timeout: 락 유효 시간(초). 락을 잡은 워커가 죽어도 이 시간이 지나면 풀림.
+            wait_timeout: 다른 워커의 결과를 기다리는 최대 시간(초).
+        """
+        return await self.do(key, lambda: self._run_distributed(key, func, lookup, lock_timeout, wait_timeout, poll_interval))
+
+    async def _run_distributed(self, key, func, lookup, lock_timeout, wait_timeout, poll_interval):
+        lock_key = f"{self.name}:lock:{key}"
+        try:
+            acquired = await cache.aadd(lock_key, 1, timeout=lock_timeout)
+        except Exception as e:
+            logger.warning(f"{self.name} 분산 락 획득 실패: {str(e)}")
+            return await func()
+
+        if acquired:
+            try:
+                return await func()
+            finally:
+                try:
+                    await cache.adelete(lock_key)
+                except Exception as e:
+                    logger.warning(f"{self.name} 분산 락 해제 실패: {str(e)}")
+
+        # 다른 워커가 실행 중 → 결과가 저장될 때까지 대기
+        deadline = time.monotonic() + wait_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(poll_interval)
+            result = await lookup()
+            if result is not None:
+                metrics.incr(f"{self.name}.coalesced_remote")
+                return result
+            try:
+                if await cache.aget(lock_key) is None:
+                    break
+            except Exception as e:
+                logger.warning(f"{self.name} 분산 락 확인 실패: {str(e)}")
+                break
+
+        result = await lookup()
+        if result is not None:
+            metrics.incr(f"{self.name}.coalesced_remote")
+            return result
+        return await func()
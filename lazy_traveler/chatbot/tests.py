@@ -1,3 +1,556 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from langchain_chroma import Chroma
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from . import recommendation_LangGraph, request_coalescer
+from .caches import TieredCache
+from .classifier_batcher import MicroBatcher
+from .geo import GridIndex, haversine_km
+from .intent_classifier import ALTERNATIVE_SCHEDULE_PATTERN
+from .opening_hours import (
+    OpeningHoursParseError, decode_intervals, encode_intervals, is_open_at, parse_opening_hours
+)
+from .place_index import PlaceIndex
+from .recommendation_LangGraph import stream_recommendation
+from .schedule_engine import ScheduleProblem
+from .session_pool import MORE_RESULTS_PATTERN
+from .singleflight import SingleFlight
+from .vector_ingest import (
+    call_with_retry, collection_embedding_model, make_record, merge_place_rows, place_categories, sync_collection
+)
+from .vector_snapshot import SnapshotError, export_snapshot, import_snapshot
+from .vector_versions import (
+    gc_versions, list_versions, version_dir, write_pointer, write_version_info
+)
+
+# OpenAI 없이 실행되는 테스트 (임베딩은 DeterministicFakeEmbedding)
+#     python manage.py test chatbot
+
+WEEK = [
+    "월요일: 오전 11:00~오후 9:00",
+    "화요일: 휴무일",
+    "수요일: 오전 11:00~오후 9:00",
+    "목요일: 오전 11:00~오후 9:00",
+    "금요일: 오후 7:00~오전 3:00",
+    "토요일: 24시간 영업",
+    "일요일: 오전 11:30~오후 2:00, 오후 5:00~10:00",
+]
+
+
+class FlakyEmbeddings(DeterministicFakeEmbedding):
+    """처음 failures번 호출은 실패하는 가짜 임베딩"""
+
+    failures: int = 0
+    calls: int = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError("rate limited")
+        return super().embed_documents(texts)
+
+
+def place(place_id, name, category, **extra):
+    return {"place_id": place_id, "name": name, "category": category, "address": "서울 종로구", "opening_hours": WEEK, **extra}
+
+
+def random_places(count, seed=0):
+    """종로 일대 임의 좌표"""
+    rng = np.random.default_rng(seed)
+    return 37.55 + rng.random(count) * 0.06, 126.95 + rng.random(count) * 0.06
+
+
+class StreamRecommendationTests(SimpleTestCase):
+    async def test_progress_then_chunks_then_final(self):
+        docs = [
+            Document(page_content=f"카페 {i}", metadata={"place_id": f"stream-{i}", "name": f"카페 {i}", "distance": 0.1 * i})
+            for i in range(3)
+        ]
+
+        async def classify(user_query, fallback):
+            return "place"
+
+        async def search(*args, **kwargs):
+            return [(doc, doc.metadata["distance"]) for doc in docs]
+
+        with mock.patch.object(recommendation_LangGraph, "classify_question_fast", classify), \
+                mock.patch.object(recommendation_LangGraph, "search_place_candidates", search):
+            events = [event async for event in stream_recommendation("스트리밍 테스트용 카페 추천", session_id="stream-test")]
+
+        names = [name for name, _ in events]
+        first_chunk = names.index("chunk")
+        self.assertEqual(events[0], ("progress", {"stage": "classifying"}))
+        self.assertEqual(set(names[:first_chunk]), {"progress"})
+        self.assertEqual(names[first_chunk:], ["chunk"] * 3 + ["final"])  # final은 항상 마지막 한 번
+        self.assertIn("카페 0", events[first_chunk][1]["html"])
+        self.assertEqual(events[-1][1]["question_type"], "place")
+
+
+class OpeningHoursParserTests(SimpleTestCase):
+    def test_parse_week(self):
+        intervals = parse_opening_hours(WEEK)
+        starts_ends = decode_intervals(encode_intervals(intervals))
+
+        self.assertTrue(is_open_at(starts_ends, datetime(2025, 3, 24, 12, 0)))   # 월 12:00
+        self.assertFalse(is_open_at(starts_ends, datetime(2025, 3, 24, 21, 0)))  # 월 21:00 (종료 시각 제외)
+        self.assertFalse(is_open_at(starts_ends, datetime(2025, 3, 25, 12, 0)))  # 화 휴무
+        self.assertTrue(is_open_at(starts_ends, datetime(2025, 3, 29, 2, 0)))    # 금 → 토 새벽 영업
+        self.assertTrue(is_open_at(starts_ends, datetime(2025, 3, 29, 23, 0)))   # 토 24시간
+        self.assertFalse(is_open_at(starts_ends, datetime(2025, 3, 30, 15, 0)))  # 일 브레이크 타임
+        self.assertTrue(is_open_at(starts_ends, datetime(2025, 3, 30, 21, 0)))   # 일 저녁 (오후 생략)
+
+    def test_joined_string_matches_list(self):
+        self.assertEqual(parse_opening_hours(", ".join(WEEK)), parse_opening_hours(WEEK))
+
+    def test_week_wraps_to_monday(self):
+        week = ["일요일: 오후 10:00~오전 2:00" if day.startswith("일요일") else day for day in WEEK]
+        intervals = decode_intervals(encode_intervals(parse_opening_hours(week)))
+        self.assertTrue(is_open_at(intervals, datetime(2025, 3, 24, 1, 0)))  # 일 → 월 새벽
+
+    def test_unparseable(self):
+        for opening_hours in [WEEK[:6], ["매일 오전 11:00~오후 9:00"], WEEK[:1] + WEEK]:
+            with self.assertRaises(OpeningHoursParseError):
+                parse_opening_hours(opening_hours)
+
+
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_invalidate_turns_earlier_values_into_misses(self):
+        worker_a = TieredCache("test_tiered", shared=True)
+        worker_b = TieredCache("test_tiered", shared=True)  # 같은 공유 계층을 쓰는 다른 워커
+        worker_a.set_many({"a": 1, "b": 2})
+        self.assertEqual(worker_b.get_many(["a", "b"]), {"a": 1, "b": 2})
+
+        worker_a.invalidate()
+        worker_b.local.clear()  # 다른 워커의 로컬 계층은 버전 교체 때 각자 비움
+        self.assertEqual(worker_a.get_many(["a", "b"]), {})
+        self.assertEqual(worker_b.get_many(["a", "b"]), {})
+
+        worker_a.set("a", 3)
+        self.assertEqual(worker_b.get("a"), 3)
+
+    def test_invalidate_everywhere_from_unshared_process(self):
+        worker = TieredCache("test_tiered", shared=True)
+        worker.set("a", 1)
+        TieredCache("test_tiered").invalidate(everywhere=True)  # 구축 스크립트
+        worker.local.clear()
+        self.assertIsNone(worker.get("a"))
+
+    async def test_async_api_reads_after_invalidate_as_misses(self):
+        worker = TieredCache("test_tiered", shared=True)
+        await worker.aset_many({"a": 1, "b": 2})
+        self.assertEqual(await worker.aget("a"), 1)
+
+        worker.invalidate()
+        self.assertEqual(await worker.aget_many(["a", "b"]), {})
+
+
+class MicroBatcherTests(SimpleTestCase):
+    async def test_results_follow_input_order(self):
+        batches = []
+
+        async def handler(items):
+            batches.append(items)
+            return [item * 10 for item in items]
+
+        batcher = MicroBatcher(handler, window_ms=5, max_batch=16)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+        self.assertEqual(results, [0, 10, 20, 30, 40])
+        self.assertEqual(batches, [[0, 1, 2, 3, 4]])  # 한 번의 handler 호출
+
+    async def test_full_batch_flushes_without_waiting(self):
+        batches = []
+
+        async def handler(items):
+            batches.append(items)
+            return items
+
+        batcher = MicroBatcher(handler, window_ms=10_000, max_batch=2)
+        results = await asyncio.wait_for(asyncio.gather(*(batcher.submit(i) for i in range(4))), timeout=1)
+        self.assertEqual(results, [0, 1, 2, 3])
+        self.assertEqual(batches, [[0, 1], [2, 3]])
+
+    async def test_handler_error_reaches_every_caller(self):
+        async def handler(items):
+            raise RuntimeError("llm down")
+
+        batcher = MicroBatcher(handler, window_ms=5)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+
+        self.assertEqual(len(results), 3)
+        for result in results:
+            self.assertIsInstance(result, RuntimeError)
+
+
+class PlaceIndexTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.count = 200
+        self.vectors = rng.normal(size=(self.count, 16)).astype(np.float32)
+        self.queries = rng.normal(size=(4, 16)).astype(np.float32)
+        categories = ["카페", "한식", "전시", "카페|전시"]
+        latitudes, longitudes = random_places(self.count)
+        self.metadatas = [
+            {"place_id": f"p{i}", "categories": categories[i % 4], "latitude": latitudes[i], "longitude": longitudes[i]}
+            for i in range(self.count)
+        ]
+        self.index = PlaceIndex([f"p{i}" for i in range(self.count)], self.vectors, self.metadatas, [""] * self.count)
+
+    def brute_force(self, query, k, rows):
+        distances = ((self.vectors[rows] - query) ** 2).sum(axis=1)
+        order = np.argsort(distances)[:k]
+        return [f"p{rows[i]}" for i in order], distances[order]
+
+    def test_matches_brute_force_top_k(self):
+        rows = np.arange(self.count)
+        for query, results in zip(self.queries, self.index.search_by_vectors(self.queries, k=10)):
+            expected_ids, expected_distances = self.brute_force(query, 10, rows)
+            self.assertEqual([doc.id for doc, _ in results], expected_ids)
+            np.testing.assert_allclose([distance for _, distance in results], expected_distances, rtol=1e-4, atol=1e-4)
+
+    def test_category_mask_filters_before_top_k(self):
+        mask = self.index.mask(categories=["전시"])
+        rows = np.array([i for i in range(self.count) if i % 4 in (2, 3)])  # 전시, 카페|전시
+        self.assertEqual(np.flatnonzero(mask).tolist(), rows.tolist())
+
+        for query, results in zip(self.queries, self.index.search_by_vectors(self.queries, k=5, mask=mask)):
+            self.assertEqual([doc.id for doc, _ in results], self.brute_force(query, 5, rows)[0])
+
+    def test_k_larger_than_mask(self):
+        mask = np.zeros(self.count, dtype=bool)
+        mask[[3, 7]] = True
+        results = self.index.search_by_vectors(self.queries[:1], k=10, mask=mask)[0]
+        self.assertEqual(sorted(doc.id for doc, _ in results), ["p3", "p7"])
+
+
+class GridIndexTests(SimpleTestCase):
+    def test_matches_brute_force_haversine(self):
+        latitudes, longitudes = random_places(2000)
+        grid = GridIndex(latitudes, longitudes, cell_km=0.5)
+
+        rng = np.random.default_rng(2)
+        for latitude, longitude, radius_km in zip(
+            37.55 + rng.random(20) * 0.06, 126.95 + rng.random(20) * 0.06, [0.1, 0.5, 1.0, 2.5, 10.0] * 4
+        ):
+            expected = np.flatnonzero(haversine_km(latitude, longitude, latitudes, longitudes) <= radius_km)
+            self.assertEqual(grid.within(latitude, longitude, radius_km).tolist(), expected.tolist())
+
+    def test_huge_radius_only_scans_occupied_cells(self):
+        latitudes, longitudes = random_places(500)
+        grid = GridIndex(latitudes, longitudes, cell_km=0.5)
+        self.assertEqual(len(grid.within(37.57, 126.98, 20000)), 500)
+        self.assertEqual(len(grid.within(-33.86, 151.2, 1)), 0)  # 장소가 없는 곳
+        self.assertEqual(len(GridIndex([], []).within(37.57, 126.98, 5)), 0)
+
+
+class ScheduleProblemTests(SimpleTestCase):
+    def places(self):
+        docs = []
+        for i in range(12):
+            category = ["한식", "카페", "전시"][i % 3]
+            docs.append(Document(page_content=f"장소 {i}", metadata={
+                "place_id": f"p{i}",
+                "category": category,
+                "rating": 4.0 + (i % 5) / 10,
+                "latitude": 37.57 + i * 0.001,
+                "longitude": 126.98 + i * 0.001,
+                "distance": i * 0.1,
+            }))
+        return docs
+
+    def problem(self):
+        mapping = {"맛집": ["한식"], "카페": ["카페"], "볼거리": ["전시"]}
+        return ScheduleProblem(self.places(), ["맛집", "카페", "볼거리"], mapping, datetime(2025, 3, 24, 12, 0), slot_candidates=4)
+
+    def test_solve_many_returns_diverse_schedules(self):
+        schedules = self.problem().solve_many(3, max_shared=1)
+
+        self.assertEqual(len(schedules), 3)
+        self.assertEqual(schedules[0], self.problem().solve())
+        place_sets = [{row for _, row in schedule} for schedule in schedules]
+        for i in range(len(place_sets)):
+            self.assertEqual(len(place_sets[i]), 3)  # 한 일정 안에서 같은 장소를 두 번 방문하지 않음
+            for j in range(i + 1, len(place_sets)):
+                self.assertLessEqual(len(place_sets[i] & place_sets[j]), 1)
+
+    def test_slots_only_use_matching_categories(self):
+        places = self.places()
+        for slot, row in self.problem().solve():
+            expected = ["한식", "카페", "전시"][slot]
+            self.assertEqual(places[row].metadata["category"], expected)
+
+
+class FollowUpPatternTests(SimpleTestCase):
+    def test_more_results(self):
+        for query in ["더 보여줘", "더 없어?", "다음 장소 보여줘", "또 추천해줘"]:
+            self.assertTrue(MORE_RESULTS_PATTERN.search(query), query)
+        for query in ["카페 또 추천해줘", "야경 좋은 곳 더 알려줘", "더 가까운 카페 알려줘"]:
+            self.assertFalse(MORE_RESULTS_PATTERN.search(query), query)
+
+    def test_alternative_schedule(self):
+        for query in ["다른 일정으로 해줘", "일정 다른 걸로 바꿔줘", "다른 코스 보여줘"]:
+            self.assertTrue(ALTERNATIVE_SCHEDULE_PATTERN.search(query), query)
+        for query in ["다른 거 맛집 추천", "다른 거", "다른 코스로 종로 맛집 추천해줘"]:
+            self.assertFalse(ALTERNATIVE_SCHEDULE_PATTERN.search(query), query)
+
+
+class SingleFlightTests(SimpleTestCase):
+    async def test_concurrent_callers_share_one_call(self):
+        singleflight = SingleFlight("test_singleflight")
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"value": len(calls)}
+
+        results = await asyncio.gather(*(singleflight.do("key", compute) for _ in range(5)))
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+
+        await singleflight.do("key", compute)  # 끝난 작업은 공유하지 않음
+        self.assertEqual(len(calls), 2)
+
+    async def test_different_keys_run_separately(self):
+        singleflight = SingleFlight("test_singleflight")
+
+        async def compute(value):
+            await asyncio.sleep(0.01)
+            return value
+
+        results = await asyncio.gather(singleflight.do("a", lambda: compute("a")), singleflight.do("b", lambda: compute("b")))
+        self.assertEqual(results, ["a", "b"])
+
+
+class RequestCoalescingTests(SimpleTestCase):
+    async def test_same_request_runs_once_and_tags_split_keys(self):
+        calls = []
+
+        async def get_recommendation(user_query, session_id, username, latitude, longitude, timestamp, radius_km, user_tags):
+            calls.append(user_tags)
+            await asyncio.sleep(0.01)
+            return {"user_query": user_query, "response": f"태그: {user_tags}", "question_type": "unknown"}
+
+        def ask(session_id, user_tags):
+            return request_coalescer.coalesced_recommendation(
+                "병합 테스트 질문", session_id=session_id, username=session_id, user_tags=user_tags
+            )
+
+        with mock.patch.object(request_coalescer, "get_recommendation", get_recommendation):
+            same = await asyncio.gather(ask("s1", "카페"), ask("s2", "카페"), ask("s3", "카페"))
+            self.assertEqual(calls, ["카페"])
+            self.assertEqual({result["response"] for result in same}, {"태그: 카페"})
+
+            calls.clear()
+            different = await asyncio.gather(ask("s1", "카페"), ask("s2", "한식"))
+            self.assertEqual(sorted(calls), ["카페", "한식"])
+            self.assertEqual([result["response"] for result in different], ["태그: 카페", "태그: 한식"])
+
+
+class SyncCollectionTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.records = [make_record(f"qa:{i}", f"질문 {i} 답변 {i}", {"type": "qa", "index": i}) for i in range(10)]
+
+    def vector_store(self, embeddings):
+        return Chroma(collection_name="test_collection", embedding_function=embeddings, persist_directory=self.directory)
+
+    def sync(self, vector_store, records, **options):
+        options = {"batch_size": 3, "concurrency": 2, "backoff_seconds": 0, **options}
+        return sync_collection(vector_store, records, **options)
+
+    def test_second_run_is_noop(self):
+        embeddings = FlakyEmbeddings(size=16)
+        vector_store = self.vector_store(embeddings)
+
+        first = self.sync(vector_store, self.records)
+        self.assertEqual((first["added"], first["updated"], first["failed"]), (10, 0, 0))
+
+        calls = embeddings.calls
+        second = self.sync(vector_store, self.records)
+        self.assertEqual((second["added"], second["updated"], second["deleted"], second["unchanged"]), (0, 0, 0, 10))
+        self.assertEqual(embeddings.calls, calls)  # 임베딩/upsert 없음
+
+    def test_changed_and_removed_records(self):
+        vector_store = self.vector_store(FlakyEmbeddings(size=16))
+        self.sync(vector_store, self.records)
+
+        records = self.records[:8] + [make_record("qa:0", "바뀐 질문", {"type": "qa", "index": 0})]
+        records = records[1:]
+        stats = self.sync(vector_store, records)
+        self.assertEqual((stats["added"], stats["updated"], stats["deleted"], stats["unchanged"]), (0, 1, 2, 7))
+        self.assertEqual(len(vector_store.get()["ids"]), 8)
+
+    def test_embedding_model_change_reembeds_everything(self):
+        self.sync(self.vector_store(DeterministicFakeEmbedding(size=16)), self.records)
+
+        embeddings = FlakyEmbeddings(size=16)
+        vector_store = self.vector_store(embeddings)
+        stats = self.sync(vector_store, self.records)
+        self.assertEqual((stats["updated"], stats["unchanged"]), (10, 0))
+        self.assertEqual(collection_embedding_model(vector_store), "FlakyEmbeddings:16")
+
+        self.assertEqual(self.sync(vector_store, self.records)["unchanged"], 10)
+
+    def test_failed_batches_are_retried_on_next_run(self):
+        embeddings = FlakyEmbeddings(size=16, failures=2)
+        vector_store = self.vector_store(embeddings)
+
+        with mock.patch("chatbot.vector_ingest.time.sleep"):
+            first = self.sync(vector_store, self.records, max_retries=0, concurrency=1)
+        self.assertEqual(first["failed"], 6)  # 처음 두 배치(3건씩)는 재시도 없이 실패
+
+        second = self.sync(vector_store, self.records, max_retries=0)
+        self.assertEqual((second["added"], second["unchanged"], second["failed"]), (6, 4, 0))
+
+
+class CallWithRetryTests(SimpleTestCase):
+    def test_backoff_doubles_until_success(self):
+        attempts = []
+
+        def func():
+            attempts.append(len(attempts))
+            if len(attempts) < 3:
+                raise RuntimeError("temporary")
+            return "ok"
+
+        with mock.patch("chatbot.vector_ingest.time.sleep") as sleep, mock.patch("chatbot.vector_ingest.random.random", return_value=0):
+            self.assertEqual(call_with_retry(func, max_retries=5, backoff_seconds=1.0), "ok")
+        self.assertEqual([call.args[0] for call in sleep.call_args_list], [1.0, 2.0])
+
+    def test_gives_up_after_max_retries(self):
+        func = mock.Mock(side_effect=RuntimeError("permanent"))
+        with mock.patch("chatbot.vector_ingest.time.sleep"):
+            with self.assertRaises(RuntimeError):
+                call_with_retry(func, max_retries=2, backoff_seconds=0.5)
+        self.assertEqual(func.call_count, 3)
+
+
+class VectorSnapshotTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.embeddings = DeterministicFakeEmbedding(size=16)
+
+    def vector_store(self, name):
+        return Chroma(collection_name="place_collection", embedding_function=self.embeddings,
+                      persist_directory=f"{self.directory}/{name}")
+
+    def test_export_import_round_trip(self):
+        source = self.vector_store("source")
+        records = [
+            make_record(f"p{i}", f"장소 {i}", {"type": "place", "place_id": f"p{i}", "category": "카페"}) for i in range(7)
+        ] + [make_record("qa:1", "질문 답변", {"type": "qa"})]
+        sync_collection(source, records, batch_size=4, backoff_seconds=0)
+
+        snapshot = f"{self.directory}/snapshot"
+        manifest = export_snapshot(snapshot, {"place_collection": source}, embedding_model="DeterministicFakeEmbedding:16")
+        self.assertEqual(manifest["collections"]["place_collection"]["count"], 8)
+        self.assertEqual(manifest["collections"]["place_collection"]["dimensions"], 16)
+
+        target = self.vector_store("target")
+        target._collection.upsert(ids=["stale"], embeddings=[[0.0] * 16], documents=["없어질 레코드"])
+        results = import_snapshot(snapshot, {"place_collection": target}, embedding_model="DeterministicFakeEmbedding:16")
+        self.assertEqual(results["place_collection"], {"imported": 8, "deleted": 1})
+
+        include = ["embeddings", "metadatas", "documents"]
+        expected, actual = source._collection.get(include=include), target._collection.get(include=include)
+        order = np.argsort(expected["ids"]), np.argsort(actual["ids"])
+        self.assertEqual(sorted(expected["ids"]), sorted(actual["ids"]))
+        np.testing.assert_allclose(np.asarray(expected["embeddings"])[order[0]], np.asarray(actual["embeddings"])[order[1]])
+        self.assertEqual([expected["metadatas"][i] for i in order[0]], [actual["metadatas"][i] for i in order[1]])
+
+        # 장소 메모리 인덱스는 스냅샷에서 바로 로드 (type=place만)
+        place_index = PlaceIndex.from_snapshot(snapshot, embedding_model="DeterministicFakeEmbedding:16")
+        self.assertEqual(sorted(place_index.ids), [f"p{i}" for i in range(7)])
+
+        # 다음 export는 같은 카탈로그 지문
+        again = export_snapshot(f"{self.directory}/again", {"place_collection": target}, "DeterministicFakeEmbedding:16")
+        self.assertEqual(again["content_hash"], manifest["content_hash"])
+
+    def test_model_mismatch_is_rejected(self):
+        source = self.vector_store("source")
+        sync_collection(source, [make_record("p1", "장소", {"type": "place"})], backoff_seconds=0)
+
+        with self.assertRaises(SnapshotError):
+            export_snapshot(f"{self.directory}/snapshot", {"place_collection": source}, embedding_model="text-embedding-3-small")
+
+        export_snapshot(f"{self.directory}/snapshot", {"place_collection": source}, embedding_model="DeterministicFakeEmbedding:16")
+        with self.assertRaises(SnapshotError):
+            import_snapshot(f"{self.directory}/snapshot", {"place_collection": self.vector_store("target")}, embedding_model="other")
+
+
+class VectorVersionGCTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        for version in ["v1", "v2", "v3", "v4", "v5"]:
+            os.makedirs(version_dir(version, self.root))
+            write_version_info(version, {"created_at": time.time() - 3600}, root=self.root)
+
+    def heartbeat(self, name, versions, updated_at):
+        os.makedirs(os.path.join(self.root, "workers"), exist_ok=True)
+        with open(os.path.join(self.root, "workers", f"{name}.json"), "w", encoding="utf-8") as file:
+            json.dump({"versions": versions, "updated_at": updated_at}, file)
+
+    def test_keeps_active_and_referenced_versions(self):
+        write_pointer("v5", root=self.root)
+        self.heartbeat("worker-a", ["v5", "v2"], time.time())  # 교체 유예 중인 워커
+        self.heartbeat("worker-b", ["v1"], time.time() - 3600)  # 종료된 워커
+
+        removed = gc_versions(root=self.root, keep=0)
+
+        self.assertEqual(sorted(removed), ["v1", "v3", "v4"])
+        self.assertEqual(list_versions(self.root), ["v2", "v5"])
+        self.assertEqual(os.listdir(os.path.join(self.root, "workers")), ["worker-a.json"])
+
+    def test_keeps_recent_versions_for_rollback(self):
+        write_pointer("v5", root=self.root)
+        removed = gc_versions(root=self.root, keep=2)
+        self.assertEqual(sorted(removed), ["v1", "v2"])
+
+    def test_keeps_versions_still_being_published(self):
+        write_pointer("v1", root=self.root)
+        write_version_info("v5", {"created_at": time.time()}, root=self.root)  # 방금 만든 버전
+        removed = gc_versions(root=self.root, keep=0)
+        self.assertEqual(sorted(removed), ["v2", "v3", "v4"])
+
+
+class MergePlaceRowsTests(SimpleTestCase):
+    def test_multi_category_place_is_one_record(self):
+        shared = place("p1", "국립현대미술관", "관광명소")
+        records = merge_place_rows([
+            (shared, "관광명소"),
+            (place("p2", "카페 A", "카페"), "카페"),
+            (dict(shared, category="전시"), "전시"),
+            (dict(shared, category="관광명소"), "관광명소"),
+        ])
+
+        self.assertEqual([record["id"] for record in records], ["p1", "p2"])
+        metadata = records[0]["metadata"]
+        self.assertEqual(metadata["category"], "관광명소, 전시")
+        self.assertEqual(place_categories(metadata), ["관광명소", "전시"])
+        self.assertEqual(place_categories({"category": "카페"}), ["카페"])
+
+    def test_places_without_id_are_kept_apart(self):
+        records = merge_place_rows([
+            (place("N/A", "포장마차 A", "술집"), "술집"),
+            (place("N/A", "포장마차 B", "술집"), "술집"),
+        ])
+        self.assertEqual(len({record["id"] for record in records}), 2)
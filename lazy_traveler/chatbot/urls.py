@@ -1,7 +1,8 @@
 from django.urls import path
-from .views import ChatHistoryView
+from .views import ChatHistoryView, MetricsView
 app_name = "chatbot"
 
 urlpatterns = [
     path("chat_history/", ChatHistoryView.as_view(), name="chat_history"),
+    path("metrics/", MetricsView.as_view(), name="metrics"),
 ]
@@ -1,15 +1,27 @@
 import math
+import asyncio
+import logging
+from django.conf import settings
 from .models import ChatHistory
 from django.contrib.auth import get_user_model
 from datetime import datetime, timedelta
-from .openai_chroma_config import place_vector_store, llm
+from .openai_chroma_config import function_vector_store, place_vector_store, llm, embeddings
+from .vector_versions import VersionedVectorStore, current_version
+from langchain_core.documents import Document
 from asgiref.sync import sync_to_async
+from .executors import run_in_executor  # ORM을 쓰지 않는 동기 작업용 전용 스레드 풀
 from langchain.chains import LLMChain
 from .prompt import query_prompt, opening_hours_prompt
-from geopy.distance import geodesic  # 거리 계산 라이브러리
+from .place_index import get_place_index
+from .opening_hours import get_opening_intervals, is_open_at, verdict_cache, verdict_cache_key
+from . import metrics
+from .geo import distances_from, bounding_box  # 거리 계산 (numpy 벡터화 haversine)
+from .ranking import rank_places  # 유사도/거리/평점/리뷰 수 가중합 랭킹
+from .schedule_engine import ScheduleProblem  # 일정 슬롯 배정
 from typing import Set
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 #카테고리 대분류
 CATEGORY_MAPPING = {
@@ -20,11 +32,11 @@ CATEGORY_MAPPING = {
     "카페": ["카페", "브런치", "베이커리"]
 }
 
+classify_chain = LLMChain(llm=llm, prompt=query_prompt)
 #유저 질문 기능 분류(llm)
-@sync_to_async
+@run_in_executor
 def classify_question_with_llm(user_query):
-    chain = LLMChain(llm=llm, prompt=query_prompt)
-    result = chain.invoke({"question": user_query})
+    result = classify_chain.invoke({"question": user_query})
 
     category = result.get("text", "").strip().lower()
 
@@ -33,46 +45,64 @@ def classify_question_with_llm(user_query):
     
     return category
 
-#place 검색 및 거리 계산
-@sync_to_async
-def search_places(user_query, user_latitude, user_longitude):
-    # 1️⃣ 기본 벡터 검색 실행
-    place_results = place_vector_store.similarity_search_with_score(
+# 기능 질문과 가장 가까운 QA [(Document, score)] (벡터 DB 버전 확인/교체도 전용 스레드 풀에서)
+@run_in_executor
+def search_function_answer(user_query):
+    return function_vector_store.resolve().similarity_search_with_score(
         query=user_query,
-        k=10,  # 검색 결과를 넉넉히 받아온 후 필터링
-        filter={"type": "place"}
+        k=1,
+        filter={"type": "qa"}
     )
-    
-    # 2️⃣ 거리 기반 필터링 및 정렬
-    place_results_with_distance = []
-    for doc, _ in place_results:
-        place_metadata = doc.metadata
-        place_lat = float(place_metadata.get("latitude"))
-        place_lon = float(place_metadata.get("longitude"))
-
-        if place_lat is not None and place_lon is not None:
-            # 유클리드 거리 대신 실제 지구 거리(위경도) 계산
-            place_distance = geodesic((user_latitude, user_longitude), (place_lat, place_lon)).km
-            place_metadata["distance"] = place_distance
-            place_results_with_distance.append((doc, place_distance))
-
-    # 3️⃣ 거리 기반으로 정렬 (가까운 순서)
-    sorted_places = sorted(place_results_with_distance, key=lambda x: x[1])  # 거리 기준 정렬
-    return sorted_places[:3]  # 최종 상위 3개 선택
-
-#place 결과 html로 변환 
-@sync_to_async
-def format_place_results_to_html(place_results, top_k=3):
-    
-    top_k = min(top_k, len(place_results))
-    
-    html_blocks = []
 
-    for doc, score in place_results[:top_k]:
-        metadata = doc.metadata
-        content = doc.page_content
+#place 검색 및 거리 계산
+@run_in_executor
+def search_places(user_query, user_latitude, user_longitude, radius_km=None, top_k=3):
+    return rank_place_candidates(user_query, user_latitude, user_longitude, radius_km, top_k)[:top_k]
+
+# 랭킹 순으로 정렬한 후보 전체 [(doc, 거리 km), ...] (세션 후보 풀에 저장해 "더 보여줘"에 사용)
+@run_in_executor
+def search_place_candidates(user_query, user_latitude, user_longitude, radius_km=None, top_k=3):
+    return rank_place_candidates(user_query, user_latitude, user_longitude, radius_km, top_k)
+
+def rank_place_candidates(user_query, user_latitude, user_longitude, radius_km=None, top_k=3):
+    # 0️⃣ 검색 반경 (None이면 기본값, 0이면 반경 제한 없음)
+    radius_km = settings.PLACE_SEARCH_RADIUS_KM if radius_km is None else float(radius_km)
+    near = (float(user_latitude), float(user_longitude), radius_km) if radius_km > 0 else None
+
+    # 1️⃣ 반경 안의 장소 중에서 벡터 검색 실행 (랭킹 전에 후보를 넉넉히)
+    candidates = settings.PLACE_SEARCH_CANDIDATES
+    place_results = batch_similarity_search(
+        [user_query],
+        k=candidates,
+        filter={"type": "place"},
+        near=near
+    )[0]
+
+    # 반경 안 후보가 부족하면 전체 장소 검색 결과로 보충
+    if near and len(place_results) < top_k:
+        seen_ids = {doc.id for doc, _ in place_results}
+        place_results += [
+            (doc, score)
+            for doc, score in batch_similarity_search([user_query], k=candidates, filter={"type": "place"})[0]
+            if doc.id not in seen_ids
+        ]
+
+    # 2️⃣ 후보 전체의 거리를 한 번에 계산
+    docs = [doc for doc, _ in place_results]
+    distances = distances_from(user_latitude, user_longitude, docs)
+    for doc, place_distance in zip(docs, distances.tolist()):
+        doc.metadata["distance"] = place_distance
+
+    # 3️⃣ 유사도/거리/평점/리뷰 수 점수로 전체 후보를 정렬 (상위 top_k개는 호출하는 쪽에서 선택)
+    ranked = rank_places(docs, [score for _, score in place_results], distances, question_type="place")
+    return [(doc, doc.metadata["distance"]) for doc, _ in ranked]
+
+#place 결과 1건을 html 블록으로 변환 (스트리밍 시 블록 단위 전송에 사용)
+def place_result_to_html(doc):
+    metadata = doc.metadata
+    content = doc.page_content
 
-        html = f"""
+    return f"""
         <div class="schedule-item">
           ⏰ 추천 장소<br/>
           📍 <strong>{metadata.get('name', '장소명 없음')}</strong><br/>
@@ -88,7 +118,13 @@ def format_place_results_to_html(place_results, top_k=3):
         </div>
         <hr/>
         """
-        html_blocks.append(html)
+
+#place 결과 html로 변환 
+async def format_place_results_to_html(place_results, top_k=3):
+    
+    top_k = min(top_k, len(place_results))
+    
+    html_blocks = [place_result_to_html(doc) for doc, score in place_results[:top_k]]
 
     return f"""
     <div class="bot-response">
@@ -98,8 +134,7 @@ def format_place_results_to_html(place_results, top_k=3):
     """
 
 #시간 기반 스케줄링표 지정
-@sync_to_async
-def determine_schedule_template(current_time):
+async def determine_schedule_template(current_time):
     hour = current_time.hour
 
     # 오후 11시 ~ 오전 7시 59분까지는 스케줄링 불가
@@ -140,7 +175,7 @@ def determine_schedule_template(current_time):
     # 기본값 (예외)
     return "기본", ["맛집", "볼거리", "카페", "볼거리"]
 
-# 유저 태그 가져오기
+# 유저 태그 가져오기 (ORM 사용 → thread_sensitive 스레드에서 실행)
 @sync_to_async
 def get_user_tags(username):
     try:
@@ -152,8 +187,7 @@ def get_user_tags(username):
         return ""
 
 #대분류 중 사용자가 태그만 선택
-@sync_to_async
-def get_preferred_tags_by_schedule(user_tags, schedule_categories):
+async def get_preferred_tags_by_schedule(user_tags, schedule_categories):
 
     result = {}
     for category in schedule_categories:
@@ -164,53 +198,112 @@ def get_preferred_tags_by_schedule(user_tags, schedule_categories):
 
     return result
 
-#태그 기반으로 장소 검색
-@sync_to_async
-def search_places_by_preferred_tags(user_query, preferred_tag_mapping):
-    from .openai_chroma_config import place_vector_store
-    all_docs = []
-    seen_place_ids = set()
+# 여러 질의를 임베딩 1회 + Chroma 질의 1회로 검색 (질의 순서대로 [(Document, score), ...] 리스트 반환)
+# near=(위도, 경도, 반경 km)를 주면 반경 안의 장소 중에서만 검색
+def batch_similarity_search(queries, k, filter=None, vector_store=None, near=None):
+    vector_store = vector_store or place_vector_store
+    if not queries:
+        return []
+
+    # 벡터 DB 버전은 한 번만 확인 (교체 중에도 메모리 인덱스와 Chroma가 같은 버전을 보도록)
+    is_place_search = vector_store is place_vector_store
+    version = current_version()
+    if isinstance(vector_store, VersionedVectorStore):
+        vector_store = vector_store.resolve(version)
+
+    query_embeddings = embeddings.embed_documents(queries)
+
+    # 장소 검색은 메모리 인덱스가 있으면 Chroma 대신 사용
+    place_index = get_place_index(version) if is_place_search else None
+    if place_index is not None:
+        mask = place_index.mask(where=filter, near=near)
+        if mask is not None:
+            return place_index.search_by_vectors(query_embeddings, k, mask=mask)
+
+    where = filter
+    n_results = k
+    if near is not None:
+        # Chroma에서는 반경을 감싸는 위경도 사각형으로 거른 뒤, 아래에서 실제 거리로 다시 거름
+        min_lat, max_lat, min_lon, max_lon = bounding_box(*near)
+        where = {"$and": ([filter] if filter else []) + [
+            {"latitude": {"$gte": min_lat}},
+            {"latitude": {"$lte": max_lat}},
+            {"longitude": {"$gte": min_lon}},
+            {"longitude": {"$lte": max_lon}},
+        ]}
+        n_results = k * 2  # 사각형 모서리(반경 밖) 후보가 걸러질 만큼 넉넉히
+
+    results = vector_store._collection.query(
+        query_embeddings=query_embeddings,
+        n_results=n_results,
+        where=where,
+        include=["documents", "metadatas", "distances"]
+    )
 
-    for category, tags in preferred_tag_mapping.items():
-        for tag in tags:
-            results = place_vector_store.similarity_search(
-                query=f"{user_query} {tag}",
-                k=2,
-                filter={"type": "place"}
-            )
-            for doc in results:
-                place_id = doc.metadata.get("place_id")
-                if place_id not in seen_place_ids:
-                    all_docs.append(doc)
-                    seen_place_ids.add(place_id)
+    results_per_query = [
+        [
+            (Document(page_content=text, metadata=metadata or {}, id=doc_id), distance)
+            for doc_id, text, metadata, distance in zip(ids, texts, metadatas, distances)
+        ]
+        for ids, texts, metadatas, distances in zip(
+            results["ids"], results["documents"], results["metadatas"], results["distances"]
+        )
+    ]
 
+    if near is not None:
+        latitude, longitude, radius_km = near
+        results_per_query = [
+            [
+                result
+                for result, distance in zip(results, distances_from(latitude, longitude, [doc for doc, _ in results]))
+                if distance <= radius_km
+            ][:k]
+            for results in results_per_query
+        ]
+    return results_per_query
+
+# 질의별 검색 결과를 순서대로 합치면서 place_id 기준 중복 제거
+# (카탈로그는 구축 때 place_id별로 병합돼 한 질의 결과 안에는 중복이 없고, 여러 질의에 걸친 중복만 제거)
+# 랭킹에 쓰도록 질의들 중 가장 가까운 벡터 거리를 metadata["vector_score"]에 기록
+def merge_unique_places(results_per_query):
+    all_docs = []
+    docs_by_place_id = {}
+    for results in results_per_query:
+        for doc, score in results:
+            place_id = doc.metadata.get("place_id")
+            if not place_id:
+                continue
+            if place_id in docs_by_place_id:
+                seen_doc = docs_by_place_id[place_id]
+                seen_doc.metadata["vector_score"] = min(seen_doc.metadata["vector_score"], score)
+                continue
+            doc.metadata["vector_score"] = score
+            all_docs.append(doc)
+            docs_by_place_id[place_id] = doc
     return all_docs
 
-@sync_to_async
-def fast_search_places_by_preferred_tags(user_query, preferred_tag_mapping):
-    from .openai_chroma_config import place_vector_store
-
-    all_docs = []
-    seen_place_ids = set()
+#태그 기반으로 장소 검색
+@run_in_executor
+def search_places_by_preferred_tags(user_query, preferred_tag_mapping):
+    queries = [
+        f"{user_query} {tag}"
+        for category, tags in preferred_tag_mapping.items()
+        for tag in tags
+    ]
+    return merge_unique_places(batch_similarity_search(queries, k=2, filter={"type": "place"}))
 
+@run_in_executor
+def fast_search_places_by_preferred_tags(user_query, preferred_tag_mapping):
+    queries = []
     for category, tags in preferred_tag_mapping.items():
         if not tags:
             continue
 
         query = f"{user_query} " + " ".join(tags)
         print(f"[DEBUG] {category}' 쿼리: {query}")
+        queries.append(query)
 
-        results = place_vector_store.similarity_search(
-            query=query,
-            k=5,
-            filter={"type": "place"}
-        )
-
-        for doc in results:
-            place_id = doc.metadata.get("place_id")
-            if place_id and place_id not in seen_place_ids:
-                all_docs.append(doc)
-                seen_place_ids.add(place_id)
+    all_docs = merge_unique_places(batch_similarity_search(queries, k=5, filter={"type": "place"}))
 
     print(f"[DEBUG] 총 장소 결과 개수: {len(all_docs)}")
     return all_docs
@@ -230,106 +323,150 @@ def calculate_distance(lat1, lon1, lat2, lon2):
     return R * c  # km
 
 # 거리 계산 및 정렬
-@sync_to_async
+@run_in_executor
 def sort_places_by_distance(places, latitude, longitude):
-    for place in places:
-        lat = float(place.metadata.get('latitude', 0))
-        lon = float(place.metadata.get('longitude', 0))
-        distance = calculate_distance(latitude, longitude, lat, lon)
+    distances = distances_from(latitude, longitude, places)
+    for place, distance in zip(places, distances.tolist()):
         place.metadata['distance'] = distance
 
-    return sorted(
-        places,
-        key=lambda x: (
-            x.metadata.get('distance', float('inf')) if hasattr(x, "metadata") else x.get('distance', float('inf'))
-        )
-    )
+    order = distances.argsort(kind="stable")
+    return [places[i] for i in order]
+
+# 거리 계산 후 랭킹 점수 순 정렬 (merge_unique_places가 기록한 vector_score 사용)
+@run_in_executor
+def rank_places_by_preferences(places, latitude, longitude, question_type="schedule"):
+    distances = distances_from(latitude, longitude, places)
+    for place, distance in zip(places, distances.tolist()):
+        place.metadata['distance'] = distance
+
+    vector_scores = [place.metadata.get("vector_score", 0.0) for place in places]
+    return [place for place, _ in rank_places(places, vector_scores, distances, question_type=question_type)]
 
 llm_chain = LLMChain(llm=llm, prompt=opening_hours_prompt)
+
+# 파서로 해석하지 못한 영업시간만 LLM에 동시에(최대 N개) 물어봄
+async def ask_opening_hours_with_llm(opening_hours_list, weekday_korean, visit_time, stats):
+    semaphore = asyncio.Semaphore(settings.OPENING_HOURS_LLM_CONCURRENCY)
+    timeout = settings.OPENING_HOURS_LLM_TIMEOUT
+
+    # 판단하지 못한 경우(시간 초과/오류)는 None
+    async def ask(opening_hours):
+        async with semaphore:
+            stats["issued"] += 1
+            try:
+                response = await asyncio.wait_for(llm_chain.ainvoke({
+                    "opening_hours": opening_hours,
+                    "visit_time": visit_time,
+                    "weekday": weekday_korean
+                }), timeout=timeout)
+                return "열려 있음" in response.get("text", "").strip()
+            except asyncio.TimeoutError:
+                stats["timed_out"] += 1
+                return None
+            except Exception as e:
+                print(f"error: {e}")
+                return None
+
+    # gather는 입력 순서대로 결과를 돌려줌
+    return await asyncio.gather(*(ask(opening_hours) for opening_hours in opening_hours_list))
+
 #운영시간 확인
 async def filter_open_places_with_llm(docs, now: datetime):
 
-    results = []
     weekday_korean = ["월요일", "화요일", "수요일", "목요일", "금요일", "토요일", "일요일"][now.weekday()]
     visit_time = now.strftime("%Y-%m-%d %H:%M")
 
-    for doc in docs:
+    verdicts = [False] * len(docs)
+    pending = {}  # LLM 판단이 필요한 영업시간 문자열 → 해당 문서 인덱스들 (같은 문자열은 한 번만 질문)
+    cache_keys = {}  # LLM 판단이 필요한 문서 인덱스 → 판단 캐시 키
+    stats = {"issued": 0, "deduplicated": 0, "timed_out": 0, "cached": 0}
+
+    for i, doc in enumerate(docs):
         metadata = doc.metadata
         opening_hours = metadata.get("opening_hours")
 
         if not opening_hours:
             continue
 
-        try:
-            response = await llm_chain.ainvoke({
-                "opening_hours": opening_hours,
-                "visit_time": visit_time,
-                "weekday": weekday_korean
-            })
-            answer = response.get("text", "").strip()
-            if "열려 있음" in answer:
-                results.append(doc)
-        except Exception as e:
-            print(f"error: {e}")
+        # 파싱된 영업 구간이 있으면 LLM 없이 바로 판정
+        intervals = get_opening_intervals(metadata)
+        if intervals is not None:
+            verdicts[i] = is_open_at(intervals, now)
             continue
 
-    return results
+        cache_keys[i] = verdict_cache_key(metadata, now)
+
+    # 이전에 LLM으로 판단한 결과 재사용
+    cached = await verdict_cache.aget_many(list(set(cache_keys.values())))
+    for i, key in cache_keys.items():
+        if key in cached:
+            verdicts[i] = cached[key]
+            stats["cached"] += 1
+            continue
+
+        opening_hours = docs[i].metadata["opening_hours"]
+        if opening_hours in pending:
+            stats["deduplicated"] += 1
+        pending.setdefault(opening_hours, []).append(i)
+
+    if pending:
+        # 판단 불가 시 처리 ("open"이면 열린 것으로 간주)
+        unknown_verdict = settings.OPENING_HOURS_UNKNOWN_POLICY == "open"
+        answers = await ask_opening_hours_with_llm(list(pending), weekday_korean, visit_time, stats)
+
+        new_verdicts = {}
+        for indices, is_open in zip(pending.values(), answers):
+            for i in indices:
+                verdicts[i] = unknown_verdict if is_open is None else is_open
+                if is_open is not None:
+                    new_verdicts[cache_keys[i]] = is_open
+        await verdict_cache.aset_many(new_verdicts)
+
+    if cache_keys:
+        logger.info(f"영업시간 LLM 판단: {stats}")
+        for key, value in stats.items():
+            metrics.incr(f"opening_hours.llm.{key}", value)
+
+    return [doc for doc, is_open in zip(docs, verdicts) if is_open]
+
+# 일정 항목 1건 (슬롯 시각, 일정 카테고리, 장소 메타데이터)
+def schedule_item(time_slot, category, metadata):
+    return {
+        "time": time_slot,
+        "desc": category,
+        "name": metadata.get("name"),
+        "category": metadata.get("category"),
+        "opening_hours": metadata.get("opening_hours"),
+        "address": metadata.get("address"),
+        "distance_km": f"{metadata.get('distance', 0):.2f}km",
+        "rating": metadata.get("rating"),
+        "website": metadata.get("website"),
+        "place_id": metadata.get("place_id"),
+    }
 
 #선호 태그와 일정 카테고리 기반 스케줄 생성
-@sync_to_async
+# 슬롯별 후보 중 (선호도 + 평점 + 슬롯 시각 영업 여부 - 이동 거리)가 가장 좋은 조합을 선택 (schedule_engine 참고)
+@run_in_executor
 def build_schedule_by_categories_with_preferences(sorted_places, schedule_categories, preferred_tag_mapping, start_time):
-    schedule = []
-    used_place_ids = set()
-
-    time_slots = [
-        (start_time + timedelta(hours=i)).strftime("%H:%M") for i in range(len(schedule_categories))
+    return build_schedules(sorted_places, schedule_categories, preferred_tag_mapping, start_time, 1)[0]
+
+# 같은 후보 풀에서 서로 다른 일정 count개 (첫 번째가 최적 일정)
+@run_in_executor
+def build_alternative_schedules(sorted_places, schedule_categories, preferred_tag_mapping, start_time, count):
+    return build_schedules(sorted_places, schedule_categories, preferred_tag_mapping, start_time, count)
+
+def build_schedules(sorted_places, schedule_categories, preferred_tag_mapping, start_time, count):
+    problem = ScheduleProblem(sorted_places, schedule_categories, preferred_tag_mapping, start_time)
+    return [
+        [
+            schedule_item(problem.times[slot].strftime("%H:%M"), schedule_categories[slot], sorted_places[row].metadata)
+            for slot, row in assignment
+        ]
+        for assignment in problem.solve_many(count)
     ]
 
-    for i, category in enumerate(schedule_categories):
-        subcategory_tags = preferred_tag_mapping.get(category, [])
-
-        print(f"\n[DEBUG] 현재 카테고리: {category}")
-        print(f"[DEBUG] 선호 태그: {subcategory_tags}")
-
-        matched_place = None
-
-        # 선호 태그로 먼저 찾기
-        for place in sorted_places:
-            if place.metadata.get("place_id") in used_place_ids:
-                continue
-            if any(tag in place.metadata.get("category", "") for tag in subcategory_tags):
-                matched_place = place
-                break
-
-        # 못 찾으면 기본 카테고리에서 찾기
-        if not matched_place:
-            for place in sorted_places:
-                if place.metadata.get("place_id") in used_place_ids:
-                    continue
-                if place.metadata.get("category", "") in subcategory_tags:
-                    matched_place = place
-                    break
-
-        if matched_place:
-            metadata = matched_place.metadata
-            schedule.append({
-                "time": time_slots[i],
-                "desc": category,
-                "name": metadata.get("name"),
-                "category": metadata.get("category"),
-                "opening_hours": metadata.get("opening_hours"),
-                "address": metadata.get("address"),
-                "distance_km": f"{metadata.get('distance', 0):.2f}km",
-                "rating": metadata.get("rating"),
-                "website": metadata.get("website"),
-            })
-            used_place_ids.add(metadata.get("place_id"))
-
-    return schedule
-
 # 스케줄 데이터 텍스트 변환
-@sync_to_async
-def schedule_to_text(schedule):
+async def schedule_to_text(schedule):
     """
     스케줄 데이터를 텍스트로 변환해서 LLM에 넘길 수 있도록 준비
     """
@@ -347,13 +484,9 @@ def schedule_to_text(schedule):
         """)
     return "\n".join(lines)
 
-@sync_to_async
-def schedule_to_html(schedule: list[dict]) -> str:
-
-    html_blocks = []
-
-    for place in schedule:
-        html = f"""
+# 스케줄 항목 1건을 html 블록으로 변환 (스트리밍 시 블록 단위 전송에 사용)
+def schedule_item_to_html(place: dict) -> str:
+    return f"""
         <div class="schedule-item">
           ⏰ <strong>{place['time']}</strong> - {place['desc']}<br/>
           📍 <strong>{place['name']}</strong><br/>
@@ -366,7 +499,10 @@ def schedule_to_html(schedule: list[dict]) -> str:
         </div>
         <hr/>
         """
-        html_blocks.append(html)
+
+async def schedule_to_html(schedule: list[dict]) -> str:
+
+    html_blocks = [schedule_item_to_html(place) for place in schedule]
 
     return f"""
     <div class="bot-response">
@@ -375,7 +511,7 @@ def schedule_to_html(schedule: list[dict]) -> str:
     </div>
     """
 
-# 대화 내역을 가져오는 함수
+# 대화 내역을 가져오는 함수 (ORM 사용 → thread_sensitive 스레드에서 실행)
 @sync_to_async
 def get_context(session_id, max_turns=5):
     chat_history = ChatHistory.objects.filter(session_id=session_id).order_by("-created_at")[:max_turns]
@@ -0,0 +1,356 @@
+import hashlib
+import json
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+
+from .opening_hours import parse_opening_hours, encode_intervals, OpeningHoursParseError
+
+# 벡터 DB 증분 구축.
+# 같은 place_id가 여러 카테고리 파일에 있으면 카테고리 집합을 가진 레코드 하나로 병합해 한 번만 임베딩합니다.
+# 레코드마다 고정 ID(장소는 place_id, 기능 QA는 질문 해시)와 텍스트+메타데이터 지문(content_hash)을 붙이고,
+# 컬렉션에 저장된 지문과 비교해 새로 생겼거나 바뀐 레코드만 임베딩/upsert, 원본에서 사라진 레코드는 삭제합니다.
+# 레코드: {"id": 고정 ID, "text": 임베딩할 텍스트, "metadata": {..., "content_hash": 지문}}
+#
+# 임베딩은 batch_size개씩 묶어 concurrency개 배치를 동시에 요청하고, 실패한 배치는 지수 백오프로 재시도합니다.
+# 배치마다 바로 upsert하므로 중단된 구축을 다시 실행하면 이미 저장된 레코드는 지문이 같아 건너뜁니다.
+# 진행 상황은 progress_path(JSON)에 배치마다 기록하고, 모두 성공하면 지웁니다.
+# 컬렉션 메타데이터에 임베딩 모델을 기록해 두고, 모델이 바뀌면(가짜 임베딩 → OpenAI 등) 지문이 같아도 전부 다시 임베딩합니다.
+
+CHATBOT_DIR = os.path.dirname(os.path.abspath(__file__))
+QA_FOLDER = os.path.join(CHATBOT_DIR, "qa_folder")
+PLACE_FOLDER = os.path.join(CHATBOT_DIR, "place_folder")
+
+# 여러 카테고리 파일에 있는 장소의 카테고리 구분자 (metadata["categories"])
+CATEGORY_SEPARATOR = "|"
+
+# 컬렉션을 임베딩한 모델 이름을 담는 컬렉션 메타데이터 키
+EMBEDDING_MODEL_KEY = "embedding_model"
+
+
+def content_hash(text, metadata):
+    """텍스트와 메타데이터(키 순서 무관)의 sha256 지문"""
+    payload = json.dumps({"text": text, "metadata": metadata}, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def make_record(record_id, text, metadata):
+    return {"id": record_id, "text": text, "metadata": {**metadata, "content_hash": content_hash(text, metadata)}}
+
+
+def _json_files(folder):
+    return sorted(f for f in os.listdir(folder) if f.endswith(".json"))
+
+
+def load_qa_records(qa_folder=QA_FOLDER):
+    """qa_folder의 질문/답변 → 레코드 목록 (ID: 질문 해시, 같은 질문은 뒤의 것으로 대체)"""
+    records = {}
+    for qa_filename in _json_files(qa_folder):
+        with open(os.path.join(qa_folder, qa_filename), "r", encoding="utf-8") as file:
+            qa_data = json.load(file)
+
+        for qa in qa_data.get("질문들", []):  # "질문들" 키 아래의 데이터 처리
+            question = qa.get("question", "Unknown question")
+            answer = qa.get("answer", "Unknown answer")
+
+            # 질문과 답변을 하나의 텍스트로 결합하여 벡터화
+            text_data = f"질문: {question} 답변: {answer}"
+            metadata = {
+                "question": question,
+                "answer": answer,
+                "type": "qa"
+            }
+
+            record_id = "qa:" + hashlib.sha1(question.encode("utf-8")).hexdigest()[:16]
+            records[record_id] = make_record(record_id, text_data, metadata)
+    return list(records.values())
+
+
+def place_metadata(place):
+    metadata = {
+        "name": place.get('name', 'Unknown'),
+        "category": place.get('category', 'Unknown'),
+        "address": place.get('address', 'Unknown'),
+        "latitude": place.get('latitude', 0),
+        "longitude": place.get('longitude', 0),
+        "rating": place.get('rating', 'N/A'),
+        "review_count": place.get('review_count', 'N/A'),
+        "opening_hours": ', '.join(place.get('opening_hours', [])) if isinstance(place.get('opening_hours', []), list) else str(place.get('opening_hours', 'N/A')),
+        "phone": place.get('phone', 'N/A'),
+        "website": place.get('website', 'N/A'),
+        "place_id": place.get('place_id', 'N/A'),
+        "type": "place"
+    }
+
+    # 영업시간을 주간 분 구간으로 미리 파싱 (파싱 불가 시 조회 때 LLM으로 판단)
+    try:
+        metadata["opening_intervals"] = encode_intervals(parse_opening_hours(place.get('opening_hours', [])))
+    except OpeningHoursParseError as e:
+        print(f"⚠️ 영업시간 파싱 실패 ({metadata['name']}): {e}")
+    return metadata
+
+
+def place_categories(metadata):
+    """장소의 카테고리 목록 (병합된 장소는 metadata["categories"], 없으면 category 하나)"""
+    categories = metadata.get("categories")
+    if categories:
+        return categories.split(CATEGORY_SEPARATOR)
+    category = metadata.get("category")
+    return [category] if category else []
+
+
+def read_place_rows(place_folder=PLACE_FOLDER):
+    """place_folder의 카테고리별 파일 → [(장소 dict, 카테고리), ...] (파일 이름 순)"""
+    rows = []
+    for place_filename in _json_files(place_folder):
+        with open(os.path.join(place_folder, place_filename), "r", encoding="utf-8") as file:
+            places = json.load(file)
+        rows.extend((place, place.get('category', 'Unknown')) for place in places)
+    return rows
+
+
+def merge_place_rows(rows):
+    """
+    같은 place_id의 행(카테고리 파일별 사본)을 카테고리 집합을 가진 레코드 하나로 병합.
+    ID는 place_id (없으면 내용 지문). metadata["category"]는 표시용 "관광명소, 전시",
+    metadata["categories"]는 필터용 "관광명소|전시"입니다 (Chroma 메타데이터는 스칼라만 허용).
+    """
+    grouped = {}
+    for place, category in rows:
+        place_id = place.get('place_id') or None
+        key = place_id if place_id not in (None, "N/A") else id(place)
+        entry = grouped.setdefault(key, {"place": place, "categories": []})
+        if category not in entry["categories"]:
+            entry["categories"].append(category)
+
+    records = []
+    for key, entry in grouped.items():
+        place, categories = entry["place"], entry["categories"]
+        metadata = place_metadata(place)
+        metadata["category"] = ", ".join(categories)
+        metadata["categories"] = CATEGORY_SEPARATOR.join(categories)
+        text_data = f"{place.get('name', 'Unknown')} {' '.join(categories)} {place.get('address', 'Unknown')}"
+
+        record_id = key if isinstance(key, str) else "place:" + content_hash(text_data, metadata)[:16]
+        records.append(make_record(record_id, text_data, metadata))
+    return records
+
+
+def load_place_records(place_folder=PLACE_FOLDER):
+    """place_folder의 장소 → place_id별로 병합된 레코드 목록"""
+    return merge_place_rows(read_place_rows(place_folder))
+
+
+def dedupe_savings(rows, records, dimensions):
+    """
+    병합으로 줄어든 벡터 수와 바이트 수 (사본마다 저장됐을 float32 임베딩 + 문서/메타데이터 JSON 크기).
+
+    Args:
+        rows: read_place_rows 결과.
+        records: merge_place_rows 결과.
+        dimensions: 임베딩 차원.
+    """
+    copies = Counter(place.get('place_id') for place, _ in rows)
+    vectors, saved_bytes = 0, 0
+    for record in records:
+        extra = copies.get(record["id"], 1) - 1
+        if extra > 0:
+            record_bytes = len(json.dumps([record["text"], record["metadata"]], ensure_ascii=False).encode("utf-8"))
+            vectors += extra
+            saved_bytes += extra * (dimensions * 4 + record_bytes)
+    return {"vectors": vectors, "bytes": saved_bytes}
+
+
+def stored_hashes(vector_store):
+    """컬렉션에 저장된 {ID: content_hash} (지문이 없는 예전 레코드는 None)"""
+    stored = vector_store.get(include=["metadatas"])
+    return {
+        record_id: (metadata or {}).get("content_hash")
+        for record_id, metadata in zip(stored["ids"], stored["metadatas"])
+    }
+
+
+def embedding_model_name(embeddings):
+    """임베딩 모델 식별자 (CachedEmbeddings는 model_name, OpenAIEmbeddings는 model, 그 외는 클래스 이름:차원)"""
+    name = getattr(embeddings, "model_name", None) or getattr(embeddings, "model", None)
+    if name:
+        return str(name)
+    size = getattr(embeddings, "size", None)
+    return f"{embeddings.__class__.__name__}:{size}" if size else embeddings.__class__.__name__
+
+
+def collection_embedding_model(vector_store):
+    """컬렉션 메타데이터에 기록된 임베딩 모델 (없으면 None)"""
+    return (vector_store._collection.metadata or {}).get(EMBEDDING_MODEL_KEY)
+
+
+def set_collection_embedding_model(vector_store, model):
+    # 거리 함수(hnsw:space)는 생성 후 바꿀 수 없어 modify에 다시 넘기지 않음
+    metadata = {key: value for key, value in (vector_store._collection.metadata or {}).items() if key != "hnsw:space"}
+    vector_store._collection.modify(metadata={**metadata, EMBEDDING_MODEL_KEY: model})
+
+
+def plan_sync(stored, records):
+    """(임베딩/upsert할 레코드, 삭제할 ID 목록, 새 레코드 수)"""
+    changed = [record for record in records if stored.get(record["id"]) != record["metadata"]["content_hash"]]
+    wanted = {record["id"] for record in records}
+    deleted = [record_id for record_id in stored if record_id not in wanted]
+    added = sum(1 for record in changed if record["id"] not in stored)
+    return changed, deleted, added
+
+
+def call_with_retry(func, max_retries, backoff_seconds):
+    """func() 실패 시 backoff_seconds * 2^n (+지터) 초 쉬고 최대 max_retries번 재시도"""
+    for attempt in range(max_retries + 1):
+        try:
+            return func()
+        except Exception:
+            if attempt == max_retries:
+                raise
+            time.sleep(backoff_seconds * (2 ** attempt) * (1 + random.random() * 0.1))
+
+
+class IngestProgress:
+    """
+    구축 진행 상황 파일. 이전 구축이 중단됐으면 시작할 때 알려줍니다.
+
+    Args:
+        path: 진행 상황 JSON 경로 (None이면 기록하지 않음).
+        collection: 컬렉션 이름.
+    """
+
+    def __init__(self, path, collection):
+        self.path = path
+        self.collection = collection
+        self.state = {"collection": collection, "planned": 0, "done": 0, "failed": 0}
+
+    def previous(self):
+        """중단된 이전 구축의 진행 상황 (없으면 None)"""
+        if not self.path or not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                state = json.load(file)
+        except (OSError, ValueError):
+            return None
+        return state if state.get("collection") == self.collection else None
+
+    def start(self, planned):
+        self.state.update(planned=planned, done=0, failed=0)
+        self._write()
+
+    def advance(self, done=0, failed=0):
+        self.state["done"] += done
+        self.state["failed"] += failed
+        self._write()
+
+    def finish(self):
+        if self.path and not self.state["failed"] and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _write(self):
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({**self.state, "updated_at": time.time()}, file)
+        os.replace(tmp_path, self.path)
+
+
+def embed_and_upsert(vector_store, records, embeddings=None, batch_size=None, concurrency=None,
+                     max_retries=None, backoff_seconds=None, progress=None):
+    """
+    records를 batch_size개씩 임베딩(concurrency개 배치 동시, 배치별 재시도)해서 upsert.
+    재시도 후에도 실패한 배치는 건너뛰고 다음 구축 때 다시 시도됩니다.
+
+    Returns:
+        (upsert한 레코드 수, 실패한 레코드 ID 목록)
+    """
+    embeddings = embeddings or vector_store.embeddings
+    batch_size = batch_size or settings.VECTOR_BUILD_BATCH_SIZE
+    concurrency = concurrency or settings.VECTOR_BUILD_CONCURRENCY
+    max_retries = settings.VECTOR_BUILD_MAX_RETRIES if max_retries is None else max_retries
+    backoff_seconds = settings.VECTOR_BUILD_BACKOFF_SECONDS if backoff_seconds is None else backoff_seconds
+
+    batches = [records[i:i + batch_size] for i in range(0, len(records), batch_size)]
+    done, failed_ids = 0, []
+
+    def embed(batch):
+        return call_with_retry(lambda: embeddings.embed_documents([record["text"] for record in batch]), max_retries, backoff_seconds)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {executor.submit(embed, batch): batch for batch in batches}
+        # Chroma 쓰기는 이 스레드에서만 (배치가 끝나는 대로 저장)
+        for future in as_completed(futures):
+            batch = futures[future]
+            try:
+                vectors = future.result()
+                call_with_retry(lambda: vector_store._collection.upsert(
+                    ids=[record["id"] for record in batch],
+                    embeddings=vectors,
+                    metadatas=[record["metadata"] for record in batch],
+                    documents=[record["text"] for record in batch]
+                ), max_retries, backoff_seconds)
+            except Exception as e:
+                print(f"⚠️ 배치 {len(batch)}건 저장 실패 ({batch[0]['id']} 외): {str(e)}")
+                failed_ids.extend(record["id"] for record in batch)
+                if progress:
+                    progress.advance(failed=len(batch))
+                continue
+
+            done += len(batch)
+            if progress:
+                progress.advance(done=len(batch))
+    return done, failed_ids
+
+
+def sync_collection(vector_store, records, progress_path=None, **pipeline_options):
+    """
+    컬렉션을 records와 같게 맞춤. 바뀌지 않은 레코드는 임베딩하지 않습니다.
+    pipeline_options는 embed_and_upsert에 전달 (embeddings, batch_size, concurrency, max_retries, backoff_seconds).
+
+    Returns:
+        dict: {"total", "added", "updated", "deleted", "unchanged", "failed"} 레코드 수,
+              "seconds": 소요 시간, "records_per_second": 임베딩/저장 처리량
+    """
+    start = time.perf_counter()
+    progress = IngestProgress(progress_path, vector_store._collection.name)
+    previous = progress.previous()
+    if previous:
+        print(f"↩️ 중단된 이전 구축 이어서 진행 ({previous['collection']}: {previous['done']}/{previous['planned']}건 저장됨)")
+
+    model = embedding_model_name(pipeline_options.get("embeddings") or vector_store.embeddings)
+    stored_model = collection_embedding_model(vector_store)
+    stored = stored_hashes(vector_store)
+    if stored and stored_model != model:
+        # 다른 모델로 만든 벡터는 지문이 같아도 쓸 수 없으므로 전부 변경으로 처리
+        print(f"♻️ 임베딩 모델이 달라 전부 다시 임베딩합니다 ({vector_store._collection.name}: {stored_model} → {model})")
+        stored = dict.fromkeys(stored)
+
+    changed, deleted, added = plan_sync(stored, records)
+
+    if deleted:
+        vector_store.delete(ids=deleted)
+
+    progress.start(len(changed))
+    done, failed_ids = embed_and_upsert(vector_store, changed, progress=progress, **pipeline_options) if changed else (0, [])
+    progress.finish()
+    if stored_model != model and (not stored or not failed_ids):
+        # 다른 모델의 벡터가 남아 있으면 모두 교체된 뒤에만 기록 (일부 실패하면 다음 구축도 전부 다시 임베딩)
+        set_collection_embedding_model(vector_store, model)
+
+    seconds = time.perf_counter() - start
+    return {
+        "total": len(records),
+        "added": added,
+        "updated": len(changed) - added,
+        "deleted": len(deleted),
+        "unchanged": len(records) - len(changed),
+        "failed": len(failed_ids),
+        "seconds": seconds,
+        "records_per_second": done / seconds if seconds else 0.0,
+    }
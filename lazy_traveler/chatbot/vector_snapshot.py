@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+from .vector_ingest import collection_embedding_model, set_collection_embedding_model
+
+# 벡터 스냅샷: Chroma 컬렉션의 임베딩/ID/메타데이터/문서를 파일로 내보내고 다시 불러옴.
+# 새 컨테이너는 OpenAI 호출이나 구축 과정 없이 스냅샷을 Chroma에 넣거나(import_vectors)
+# 장소 메모리 인덱스로 바로 올릴 수 있습니다 (PLACE_INDEX_SNAPSHOT).
+#
+# 스냅샷 디렉토리
+#   manifest.json: {"format", "created_at", "embedding_model", "content_hash",
+#                   "collections": {이름: {"file", "count", "dimensions", "sha256", "content_hash"}}}
+#   <컬렉션 이름>.npz: ids, embeddings(float32), documents, metadatas(JSON 문자열)
+
+SNAPSHOT_FORMAT = 1
+MANIFEST_FILENAME = "manifest.json"
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def catalog_hash(ids, metadatas):
+    """레코드 ID + content_hash(없으면 메타데이터 전체)로 만든 카탈로그 지문 (임베딩과 무관)"""
+    digest = hashlib.sha256()
+    for record_id, metadata in sorted(zip(ids, metadatas), key=lambda pair: pair[0]):
+        fingerprint = metadata.get("content_hash") or json.dumps(metadata, ensure_ascii=False, sort_keys=True)
+        digest.update(f"{record_id}\0{fingerprint}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def export_snapshot(path, vector_stores, embedding_model):
+    """
+    컬렉션들을 path 디렉토리에 스냅샷으로 저장.
+
+    Args:
+        path: 스냅샷 디렉토리 (없으면 생성).
+        vector_stores: {컬렉션 이름: Chroma}.
+        embedding_model: 컬렉션을 만든 임베딩 모델 이름 (import 시 확인).
+
+    Returns:
+        dict: manifest
+    """
+    for name, vector_store in vector_stores.items():
+        stored_model = collection_embedding_model(vector_store)
+        if stored_model and stored_model != embedding_model:
+            raise SnapshotError(f"{name} 컬렉션은 다른 임베딩 모델로 만들어졌습니다 (컬렉션: {stored_model}, 현재: {embedding_model})")
+
+    os.makedirs(path, exist_ok=True)
+    collections = {}
+    for name, vector_store in vector_stores.items():
+        data = vector_store._collection.get(include=["embeddings", "metadatas", "documents"])
+        vectors = data["embeddings"]
+        vectors = np.asarray(vectors, dtype=np.float32) if vectors is not None and len(vectors) else np.zeros((0, 0), dtype=np.float32)
+        metadatas = [metadata or {} for metadata in data["metadatas"]]
+
+        filename = f"{name}.npz"
+        file_path = os.path.join(path, filename)
+        with open(file_path, "wb") as file:
+            np.savez(
+                file,
+                ids=np.asarray(data["ids"], dtype=str),
+                embeddings=vectors,
+                documents=np.asarray([document or "" for document in data["documents"]], dtype=str),
+                metadatas=np.asarray([json.dumps(metadata, ensure_ascii=False) for metadata in metadatas], dtype=str)
+            )
+        collections[name] = {
+            "file": filename,
+            "count": len(data["ids"]),
+            "dimensions": int(vectors.shape[1]) if vectors.ndim == 2 else 0,
+            "sha256": _file_sha256(file_path),
+            "content_hash": catalog_hash(data["ids"], metadatas),
+        }
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "created_at": time.time(),
+        "embedding_model": embedding_model,
+        "content_hash": hashlib.sha256("".join(
+            collections[name]["content_hash"] for name in sorted(collections)
+        ).encode("utf-8")).hexdigest(),
+        "collections": collections,
+    }
+    tmp_path = os.path.join(path, f"{MANIFEST_FILENAME}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(manifest, file, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, os.path.join(path, MANIFEST_FILENAME))
+    return manifest
+
+
+def read_manifest(path, embedding_model=None):
+    """manifest를 읽고 형식/임베딩 모델을 확인 (embedding_model이 None이면 모델 확인 생략)"""
+    manifest_path = os.path.join(path, MANIFEST_FILENAME)
+    if not os.path.exists(manifest_path):
+        raise SnapshotError(f"스냅샷 manifest가 없습니다: {manifest_path}")
+    with open(manifest_path, "r", encoding="utf-8") as file:
+        manifest = json.load(file)
+
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise SnapshotError(f"지원하지 않는 스냅샷 형식입니다: {manifest.get('format')}")
+    if embedding_model is not None and manifest.get("embedding_model") != embedding_model:
+        raise SnapshotError(
+            f"임베딩 모델이 다릅니다 (스냅샷: {manifest.get('embedding_model')}, 현재: {embedding_model})"
+        )
+    return manifest
+
+
+def load_collection(path, manifest, name, verify=True):
+    """스냅샷의 한 컬렉션 → (ids, 임베딩 행렬, metadatas, documents)"""
+    entry = manifest["collections"].get(name)
+    if entry is None:
+        raise SnapshotError(f"스냅샷에 {name} 컬렉션이 없습니다.")
+
+    file_path = os.path.join(path, entry["file"])
+    if verify and _file_sha256(file_path) != entry["sha256"]:
+        raise SnapshotError(f"스냅샷 파일이 손상됐습니다: {file_path}")
+
+    with np.load(file_path) as data:
+        ids = data["ids"].tolist()
+        vectors = data["embeddings"].astype(np.float32, copy=False)
+        documents = data["documents"].tolist()
+        metadatas = [json.loads(metadata) for metadata in data["metadatas"].tolist()]
+    return ids, vectors, metadatas, documents
+
+
+def import_snapshot(path, vector_stores, embedding_model=None, batch_size=1000):
+    """
+    스냅샷을 Chroma 컬렉션들에 upsert (임베딩 호출 없음). 스냅샷에 없는 레코드는 삭제해 스냅샷과 같게 맞춥니다.
+
+    Args:
+        vector_stores: {컬렉션 이름: Chroma}. 스냅샷에 없는 컬렉션은 건너뜀.
+        embedding_model: 현재 임베딩 모델 이름 (다르면 SnapshotError, None이면 확인 생략).
+
+    Returns:
+        dict: {컬렉션 이름: {"imported", "deleted"}}
+    """
+    manifest = read_manifest(path, embedding_model)
+    results = {}
+    for name, vector_store in vector_stores.items():
+        if name not in manifest["collections"]:
+            continue
+        ids, vectors, metadatas, documents = load_collection(path, manifest, name)
+
+        wanted = set(ids)
+        stale = [record_id for record_id in vector_store._collection.get(include=[])["ids"] if record_id not in wanted]
+        if stale:
+            vector_store._collection.delete(ids=stale)
+
+        for start in range(0, len(ids), batch_size):
+            end = start + batch_size
+            vector_store._collection.upsert(
+                ids=ids[start:end],
+                embeddings=vectors[start:end],
+                metadatas=metadatas[start:end],
+                documents=documents[start:end]
+            )
+        if manifest.get("embedding_model"):
+            set_collection_embedding_model(vector_store, manifest["embedding_model"])
+        results[name] = {"imported": len(ids), "deleted": len(stale)}
+    return results
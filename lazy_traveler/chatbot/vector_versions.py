@@ -0,0 +1,272 @@
+import json
+import logging
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# 벡터 DB 버전 관리. VECTOR_STORE_ROOT가 비어 있으면 현재 디렉토리의 vector_function/vector_place를 그대로 사용합니다.
+#
+# VECTOR_STORE_ROOT/
+#   current.json              활성 버전 포인터 {"version", "updated_at"} (os.replace로 원자적 교체)
+#   versions/<버전>/           버전별 vector_function/, vector_place/, version.json
+#   workers/<호스트>-<pid>.json 워커가 참조 중인 버전 {"versions", "updated_at"} (GC가 지우지 않도록)
+#
+# 워커는 벡터 DB에 접근할 때 VECTOR_STORE_POLL_SECONDS마다 포인터를 확인하고, 바뀌었으면 새 버전을 연 뒤
+# 참조를 한 번에 교체합니다. 이미 이전 버전 Chroma/인덱스를 잡고 있는 요청은 그대로 끝까지 실행되고,
+# 교체 후 VECTOR_STORE_GRACE_SECONDS 동안은 이전 버전도 참조 중으로 기록합니다.
+# 유예 시간이 지나면 이전 버전의 Chroma 클라이언트(SQLite 연결, 로드된 세그먼트)를 닫아 GC가 지운 파일을 잡고 있지 않게 합니다.
+
+POINTER_FILENAME = "current.json"
+VERSION_FILENAME = "version.json"
+LEGACY_VERSION = "legacy"
+
+
+def _root(root=None):
+    return root or settings.VECTOR_STORE_ROOT
+
+
+def version_dir(version, root=None):
+    return os.path.join(_root(root), "versions", version)
+
+
+def new_version_id():
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+def list_versions(root=None):
+    path = os.path.join(_root(root), "versions")
+    return sorted(os.listdir(path)) if os.path.isdir(path) else []
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(data, file, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def read_pointer(root=None):
+    """활성 버전 이름 (아직 게시된 버전이 없으면 None)"""
+    pointer = _read_json(os.path.join(_root(root), POINTER_FILENAME))
+    return pointer.get("version") if pointer else None
+
+
+def write_pointer(version, root=None):
+    """활성 버전을 version으로 교체 (각 워커는 다음 폴링 때 새 버전으로 전환)"""
+    if not os.path.isdir(version_dir(version, root)):
+        raise FileNotFoundError(f"벡터 DB 버전이 없습니다: {version}")
+    _write_json(os.path.join(_root(root), POINTER_FILENAME), {"version": version, "updated_at": time.time()})
+
+
+def read_version_info(version, root=None):
+    return _read_json(os.path.join(version_dir(version, root), VERSION_FILENAME)) or {}
+
+
+def write_version_info(version, info, root=None):
+    _write_json(os.path.join(version_dir(version, root), VERSION_FILENAME), {"version": version, **info})
+
+
+class VectorVersion:
+    """
+    한 버전의 벡터 DB: 컬렉션별 Chroma와 장소 메모리 인덱스(get_place_index가 채움).
+
+    Args:
+        version: 버전 이름 (VECTOR_STORE_ROOT가 없으면 "legacy").
+        base_dir: vector_function/vector_place가 있는 디렉토리 (None이면 현재 디렉토리).
+    """
+
+    def __init__(self, version, base_dir=None):
+        from .openai_chroma_config import VECTOR_STORE_DIRS, open_vector_store
+
+        self.version = version
+        self.base_dir = base_dir
+        self.stores = {name: open_vector_store(name, base_dir=base_dir) for name in VECTOR_STORE_DIRS}
+        self.place_index = None
+        self.place_index_retry_at = 0.0  # 인덱스 로드 실패 시 다시 시도할 시각 (time.monotonic)
+
+    def close(self):
+        """
+        이 버전의 Chroma 시스템을 멈추고 프로세스 전역 캐시에서 제거 (이후 stores는 사용 불가).
+        chromadb는 persist_directory별 System을 SharedSystemClient에 계속 보관하므로 직접 꺼내서 정리합니다.
+        """
+        from chromadb.api.shared_system_client import SharedSystemClient
+
+        self.place_index = None
+        for store in self.stores.values():
+            client_settings = store._client_settings
+            if client_settings is None or not client_settings.persist_directory:
+                continue
+            system = SharedSystemClient._identifier_to_system.pop(client_settings.persist_directory, None)
+            if system is not None:
+                system.stop()
+
+
+class VersionedVectorStore:
+    """
+    현재 버전의 컬렉션 Chroma에 속성 접근을 위임하는 객체 (openai_chroma_config.place_vector_store 등).
+    호출마다 현재 버전을 찾으므로 워커를 재시작하지 않아도 새 버전이 적용됩니다.
+    버전 확인은 교체 시 파일 I/O와 Chroma 로드를 하므로 전용 스레드 풀에서 resolve()로 한 번 찾아 사용합니다.
+    """
+
+    def __init__(self, collection_name):
+        self.collection_name = collection_name
+
+    def resolve(self, version=None):
+        """version(기본: 현재 버전)의 컬렉션 Chroma"""
+        return (version or current_version()).stores[self.collection_name]
+
+    def __getattr__(self, name):
+        return getattr(self.resolve(), name)
+
+
+_current = None
+_retired = []  # [(교체된 이전 VectorVersion, 교체 시각)] 유예 시간이 지나면 닫음
+_next_check = 0.0
+_lock = threading.Lock()
+
+metrics.register_gauge("vector_store", lambda: {"version": _current.version if _current else None})
+
+
+def current_version():
+    """이 워커가 사용 중인 VectorVersion. VECTOR_STORE_POLL_SECONDS마다 포인터를 확인해 바뀌었으면 교체"""
+    global _next_check
+    if _current is not None and (not settings.VECTOR_STORE_ROOT or time.monotonic() < _next_check):
+        return _current
+
+    with _lock:
+        if _current is None or (settings.VECTOR_STORE_ROOT and time.monotonic() >= _next_check):
+            _next_check = time.monotonic() + settings.VECTOR_STORE_POLL_SECONDS
+            try:
+                _refresh()
+            except Exception as e:
+                if _current is None:
+                    raise
+                logger.warning(f"벡터 DB 버전 확인 실패 (기존 버전 유지): {str(e)}")
+    return _current
+
+
+def _refresh():
+    version = read_pointer() if settings.VECTOR_STORE_ROOT else None
+    if version is None:
+        # 버전 관리를 쓰지 않거나 아직 게시된 버전이 없으면 현재 디렉토리의 벡터 DB 사용
+        if _current is None:
+            _swap(VectorVersion(LEGACY_VERSION))
+    elif _current is None or version != _current.version:
+        _swap(VectorVersion(version, version_dir(version)))
+
+    _release_retired()
+    if settings.VECTOR_STORE_ROOT:
+        write_heartbeat()
+
+
+def _swap(new_version):
+    """새 버전을 완전히 연 뒤 참조를 교체하고, 카탈로그 기준 캐시 무효화"""
+    global _current
+    from .place_index import load_place_index
+
+    if settings.PLACE_INDEX_ENABLED:
+        # 교체 직후 요청이 인덱스 로드를 기다리지 않도록 미리 로드 (실패하면 get_place_index가 다시 시도)
+        new_version.place_index = load_place_index(new_version)
+
+    old_version = _current
+    _current = new_version
+    if old_version is None:
+        return
+
+    _retired.append((old_version, time.time()))
+    invalidate_catalog_caches()
+    metrics.incr("vector_store.swap")
+    logger.info(f"벡터 DB 버전 교체: {old_version.version} → {new_version.version}")
+
+
+def invalidate_catalog_caches():
+    """장소 카탈로그를 기준으로 만든 캐시 무효화 (영업 여부 판단, 장소/일정 응답)"""
+    from .opening_hours import verdict_cache
+    from .response_cache import response_cache
+
+    verdict_cache.invalidate()
+    response_cache.invalidate()
+
+
+def _release_retired():
+    """교체 후 유예 시간이 지난 이전 버전을 닫음"""
+    deadline = time.time() - settings.VECTOR_STORE_GRACE_SECONDS
+    while _retired and _retired[0][1] <= deadline:
+        old_version, _ = _retired.pop(0)
+        try:
+            old_version.close()
+        except Exception as e:
+            logger.warning(f"이전 벡터 DB 버전 정리 실패 ({old_version.version}): {str(e)}")
+
+
+def referenced_versions():
+    """이 워커가 참조 중인 버전 (현재 버전 + 교체 후 유예 시간 안의 이전 버전)"""
+    versions = [_current.version] if _current is not None else []
+    deadline = time.time() - settings.VECTOR_STORE_GRACE_SECONDS
+    versions.extend(old_version.version for old_version, swapped_at in _retired if swapped_at > deadline)
+    return versions
+
+
+def write_heartbeat(root=None):
+    path = os.path.join(_root(root), "workers", f"{socket.gethostname()}-{os.getpid()}.json")
+    try:
+        _write_json(path, {"versions": referenced_versions(), "updated_at": time.time()})
+    except OSError as e:
+        logger.warning(f"벡터 DB 워커 상태 기록 실패: {str(e)}")
+
+
+def gc_versions(root=None, keep=None):
+    """
+    활성 버전, 살아 있는 워커가 참조 중인 버전, 최근 keep개(롤백용)를 제외한 버전 디렉토리 삭제.
+    만들어진 지 VECTOR_STORE_WORKER_TTL이 안 된 버전(게시 중일 수 있음)도 남겨둡니다.
+
+    Returns:
+        list: 삭제한 버전 이름
+    """
+    keep = settings.VECTOR_STORE_KEEP_VERSIONS if keep is None else keep
+    now = time.time()
+    deadline = now - settings.VECTOR_STORE_WORKER_TTL
+
+    in_use = {read_pointer(root)}
+    workers_dir = os.path.join(_root(root), "workers")
+    for filename in os.listdir(workers_dir) if os.path.isdir(workers_dir) else []:
+        path = os.path.join(workers_dir, filename)
+        heartbeat = _read_json(path)
+        if heartbeat and heartbeat.get("updated_at", 0) >= deadline:
+            in_use.update(heartbeat.get("versions", []))
+        else:
+            # 종료된 워커
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    candidates = [version for version in list_versions(root) if version not in in_use]
+    removable = candidates[:-keep] if keep > 0 else candidates
+
+    removed = []
+    for version in removable:
+        path = version_dir(version, root)
+        if read_version_info(version, root).get("created_at", os.path.getmtime(path)) >= deadline:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        removed.append(version)
+    return removed
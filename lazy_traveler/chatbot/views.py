@@ -2,10 +2,11 @@ import uuid
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from .models import ChatHistory
 from .serializers import ChatHistorySerializer
 from .recommendation_service import get_recommendation
+from . import metrics
 from django.db.models import Min
 from collections import defaultdict
 
@@ -127,4 +128,14 @@ class ChatHistoryView(APIView):
                 for date, sessions in grouped_sessions.items()
             ]
     
-            return Response(session_list, status=status.HTTP_200_OK)
\ No newline at end of file
+            return Response(session_list, status=status.HTTP_200_OK)
+
+
+class MetricsView(APIView):
+    """
+    현재 워커 프로세스의 성능 지표(캐시 적중률, fast path 비율 등)를 조회하는 API. (관리자 전용)
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(metrics.report(), status=status.HTTP_200_OK)
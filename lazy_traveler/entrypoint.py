@@ -21,9 +21,19 @@ while True:
 
 print("Database is ready!")
 
-# 벡터 DB 구축 스크립트 실행
-print("Running vector database build script...")
-subprocess.run(["python", "chatbot/build_vector_store.py"], check=True)
+# 벡터 스냅샷이 있으면 가져오고(임베딩 API 호출 없음), 없으면 벡터 DB 구축 스크립트 실행
+# VECTOR_STORE_ROOT가 있으면 새 버전으로 게시 (변경이 없으면 기존 활성 버전 유지)
+vector_snapshot = os.getenv("VECTOR_SNAPSHOT_PATH")
+if os.getenv("VECTOR_STORE_ROOT"):
+    print("Publishing vector store version...")
+    publish_args = ["--snapshot", vector_snapshot] if vector_snapshot else []
+    subprocess.run(["python", "manage.py", "publish_vectors", *publish_args], check=True)
+elif vector_snapshot:
+    print("Importing vector snapshot...")
+    subprocess.run(["python", "manage.py", "import_vectors", vector_snapshot], check=True)
+else:
+    print("Running vector database build script...")
+    subprocess.run(["python", "chatbot/build_vector_store.py"], check=True)
 
 # Django 마이그레이션 
 print("Running makemigrations for all apps...")
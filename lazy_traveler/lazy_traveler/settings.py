@@ -14,6 +14,7 @@ from datetime import timedelta
 from pathlib import Path
 # 💡 .env 파일에 있는 django 시크릿 키 사용하기
 import os
+import json
 from dotenv import load_dotenv
 
 # 💡.env 파일 로드, 환경변수 설정
@@ -86,6 +87,22 @@ CHANNEL_LAYERS = {
     },
 }
 
+# 🗄️ Django 캐시 (REDIS_CACHE_URL이 있으면 워커 간 공유되는 Redis 사용, 없으면 프로세스 메모리)
+REDIS_CACHE_URL = os.getenv("REDIS_CACHE_URL")
+if REDIS_CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # CORS 설정
 #CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOWED_ORIGINS = os.getenv('CORS_ALLOWED_ORIGINS', '127.0.0.1,localhost').split(',')
@@ -186,4 +203,92 @@ USE_TZ = False # ✅ 서버 시간대
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
-DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# 🕒 영업시간 LLM 판단 (영업시간 파서가 해석하지 못한 장소에만 사용)
+OPENING_HOURS_LLM_CONCURRENCY = int(os.getenv("OPENING_HOURS_LLM_CONCURRENCY", "5"))  # 동시 호출 상한
+OPENING_HOURS_LLM_TIMEOUT = float(os.getenv("OPENING_HOURS_LLM_TIMEOUT", "5"))  # 호출당 제한 시간(초)
+OPENING_HOURS_UNKNOWN_POLICY = os.getenv("OPENING_HOURS_UNKNOWN_POLICY", "closed")  # 판단 불가(시간 초과/오류) 시 "open" | "closed"
+
+# 🕒 영업시간 LLM 판단 결과 캐시 (place_id, 요일, 시간 버킷 단위)
+OPENING_HOURS_CACHE_BUCKET_MINUTES = int(os.getenv("OPENING_HOURS_CACHE_BUCKET_MINUTES", "15"))
+OPENING_HOURS_CACHE_SIZE = int(os.getenv("OPENING_HOURS_CACHE_SIZE", "4096"))
+OPENING_HOURS_CACHE_TTL = int(os.getenv("OPENING_HOURS_CACHE_TTL", str(60 * 60 * 24)))  # 초
+OPENING_HOURS_CACHE_SHARED = os.getenv("OPENING_HOURS_CACHE_SHARED", "False") == "True"  # True면 Django 캐시(Redis)도 사용
+
+# 🧭 LLM 질문 분류 마이크로 배칭 (WINDOW_MS 동안 모은 질문을 한 번에 분류, 0이면 비활성화)
+INTENT_BATCH_WINDOW_MS = int(os.getenv("INTENT_BATCH_WINDOW_MS", "10"))
+INTENT_BATCH_MAX_SIZE = int(os.getenv("INTENT_BATCH_MAX_SIZE", "16"))
+
+# 🧵 벡터 검색/일정 계산/동기 LLM 호출용 전용 스레드 풀 크기 (ORM 접근은 계속 thread_sensitive 스레드에서 실행)
+CHATBOT_EXECUTOR_WORKERS = int(os.getenv("CHATBOT_EXECUTOR_WORKERS", str(min(32, (os.cpu_count() or 1) + 4))))
+
+# 🧮 임베딩 캐시 (PATH가 비어 있으면 메모리 캐시만 사용)
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", str(BASE_DIR / "embedding_cache" / "embeddings.sqlite3"))
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))  # 메모리 LRU 항목 수
+
+# 🧮 벡터 DB 구축 (build_vector_store): 임베딩 배치 크기 / 동시 배치 수 / 배치별 최대 재시도 횟수 / 첫 재시도 대기(초, 이후 2배씩)
+VECTOR_BUILD_BATCH_SIZE = int(os.getenv("VECTOR_BUILD_BATCH_SIZE", "64"))
+VECTOR_BUILD_CONCURRENCY = int(os.getenv("VECTOR_BUILD_CONCURRENCY", "4"))
+VECTOR_BUILD_MAX_RETRIES = int(os.getenv("VECTOR_BUILD_MAX_RETRIES", "5"))
+VECTOR_BUILD_BACKOFF_SECONDS = float(os.getenv("VECTOR_BUILD_BACKOFF_SECONDS", "1.0"))
+
+# 🧮 벡터 DB 버전 관리 (manage.py publish_vectors): 버전 디렉토리 루트(비어 있으면 현재 디렉토리의 vector_place 등 사용) /
+#    워커의 활성 버전 확인 주기(초) / 교체 후 이전 버전을 참조 중으로 두는 시간(초) / 워커 상태가 유효한 시간(초) / GC 후에도 남길 이전 버전 수
+VECTOR_STORE_ROOT = os.getenv("VECTOR_STORE_ROOT", "")  # 예: BASE_DIR / "vector_store" (.gitignore에 포함)
+VECTOR_STORE_POLL_SECONDS = float(os.getenv("VECTOR_STORE_POLL_SECONDS", "10"))
+VECTOR_STORE_GRACE_SECONDS = float(os.getenv("VECTOR_STORE_GRACE_SECONDS", "120"))
+VECTOR_STORE_WORKER_TTL = float(os.getenv("VECTOR_STORE_WORKER_TTL", "300"))
+VECTOR_STORE_KEEP_VERSIONS = int(os.getenv("VECTOR_STORE_KEEP_VERSIONS", "2"))
+
+# 📍 장소 검색용 메모리 인덱스 (워커마다 place_collection을 numpy 행렬로 올려 정확 top-k 검색, False면 Chroma 사용)
+PLACE_INDEX_ENABLED = os.getenv("PLACE_INDEX_ENABLED", "True") == "True"
+# 장소 메모리 인덱스를 Chroma 대신 벡터 스냅샷 디렉토리에서 로드 (manage.py export_vectors로 생성, 비어 있으면 Chroma 사용,
+# VECTOR_STORE_ROOT를 쓰면 무시하고 활성 버전의 Chroma에서 로드)
+PLACE_INDEX_SNAPSHOT = os.getenv("PLACE_INDEX_SNAPSHOT", "")
+
+# 📍 장소 검색 반경 (WebSocket 메시지의 "radius"가 없을 때 기본값, km, 0이면 제한 없음) / 클라이언트가 보낼 수 있는 최대 반경(km) / 공간 격자 크기(km)
+PLACE_SEARCH_RADIUS_KM = float(os.getenv("PLACE_SEARCH_RADIUS_KM", "2"))
+PLACE_SEARCH_MAX_RADIUS_KM = float(os.getenv("PLACE_SEARCH_MAX_RADIUS_KM", "20"))
+PLACE_GRID_CELL_KM = float(os.getenv("PLACE_GRID_CELL_KM", "0.5"))
+
+# 📍 장소 랭킹: 랭킹 전에 받아올 후보 수 / 거리 감쇠 기준(km) / 질문 유형별 가중치 덮어쓰기(JSON)
+# 예) PLACE_RANKING_WEIGHTS='{"place": {"similarity": 0.6, "distance": 0.2}}'
+PLACE_SEARCH_CANDIDATES = int(os.getenv("PLACE_SEARCH_CANDIDATES", "30"))
+PLACE_RANKING_DISTANCE_SCALE_KM = float(os.getenv("PLACE_RANKING_DISTANCE_SCALE_KM", "1.0"))
+PLACE_RANKING_WEIGHTS = json.loads(os.getenv("PLACE_RANKING_WEIGHTS", "{}"))
+
+# 📍 일정 슬롯 배정: 슬롯별 후보 수 / 평가할 최대 조합 수 / 가중치 덮어쓰기(JSON, 예: '{"walk_km": 0.5}')
+SCHEDULE_SLOT_CANDIDATES = int(os.getenv("SCHEDULE_SLOT_CANDIDATES", "6"))
+SCHEDULE_MAX_COMBINATIONS = int(os.getenv("SCHEDULE_MAX_COMBINATIONS", "5000"))
+SCHEDULE_WEIGHTS = json.loads(os.getenv("SCHEDULE_WEIGHTS", "{}"))
+
+# 📍 대안 일정: 한 번에 만들 일정 수 / 일정끼리 겹쳐도 되는 최대 장소 수
+SCHEDULE_ALTERNATIVES = int(os.getenv("SCHEDULE_ALTERNATIVES", "3"))
+SCHEDULE_ALTERNATIVE_MAX_SHARED = int(os.getenv("SCHEDULE_ALTERNATIVE_MAX_SHARED", "1"))
+
+# 📍 세션 후보 풀 ("더 보여줘", "다른 일정으로 해줘"): 유효 시간(초) / 최대 세션 수 / 메모리 상한(바이트) / Redis 공유 여부
+SESSION_POOL_TTL = int(os.getenv("SESSION_POOL_TTL", "1800"))
+SESSION_POOL_MAX_ENTRIES = int(os.getenv("SESSION_POOL_MAX_ENTRIES", "2000"))
+SESSION_POOL_MAX_BYTES = int(os.getenv("SESSION_POOL_MAX_BYTES", str(64 * 1024 * 1024)))
+SESSION_POOL_SHARED = os.getenv("SESSION_POOL_SHARED", "False") == "True"
+
+# 📍 장소/일정 응답 캐시: 위경도 격자 칸(km) / 시간 구간(분) / 유효 시간(초) / 로컬 항목 수 / Django 캐시(Redis) 공유, 워커 간 락 유효 시간(초)
+RESPONSE_CACHE_CELL_KM = float(os.getenv("RESPONSE_CACHE_CELL_KM", "0.5"))
+RESPONSE_CACHE_BUCKET_MINUTES = int(os.getenv("RESPONSE_CACHE_BUCKET_MINUTES", "30"))
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "1800"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+RESPONSE_CACHE_SHARED = os.getenv("RESPONSE_CACHE_SHARED", "True") == "True"
+RESPONSE_CACHE_LOCK_TIMEOUT = int(os.getenv("RESPONSE_CACHE_LOCK_TIMEOUT", "30"))
+
+# 📍 일정 안내 LLM 응답 의미 기반 캐시 (recommendation_service): 사용 여부 / 보관할 맥락(대화 기록 + 일정 데이터, 위치, 시간) 수 / 유효 시간(초) / 질문 유사도 임계값
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "True") == "True"
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "512"))
+SEMANTIC_CACHE_TTL = int(os.getenv("SEMANTIC_CACHE_TTL", "3600"))
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+
+# 📍 동일 요청 병합: 사용 여부 / Django 캐시(Redis) 락으로 워커 간 병합 / 락 유효 시간(초) / 결과 보관 시간(초)
+REQUEST_COALESCING_ENABLED = os.getenv("REQUEST_COALESCING_ENABLED", "True") == "True"
+REQUEST_COALESCING_SHARED = os.getenv("REQUEST_COALESCING_SHARED", "False") == "True"
+REQUEST_COALESCING_LOCK_TIMEOUT = int(os.getenv("REQUEST_COALESCING_LOCK_TIMEOUT", "60"))
+REQUEST_COALESCING_RESULT_TTL = int(os.getenv("REQUEST_COALESCING_RESULT_TTL", "5"))